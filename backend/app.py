@@ -1,17 +1,33 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import Optional
 import asyncio
+import json
 import numpy as np
 import time
 import uuid
 
 from utils.audio_buffers import SlidingWindowBuffer
+from utils.audio_codec import decode as decode_audio, negotiate_codec
 from utils.vad import EnergyVAD
-from pipeline.asr_stream import WhisperStreamer
-from pipeline.intent import score_intent
-from pipeline.antispoof import AASISTScorer
-from pipeline.fuse import fuse_scores
-from pipeline.diarization import OnlineDiarizer
+from utils.executor import build_executor
+from utils.metrics import METRICS
+from utils.report_store import build_report_store
+from utils.readiness import Readiness
+from utils.scheduler import TickScheduler
+from utils.protocol import PROTO_DELTA, DeltaEncoder, encode_message, negotiate
+from pipeline.asr_batch import BatchingAsrDecoder
+from pipeline.asr_stream import WhisperModelPool, WhisperStreamer
+from pipeline.intent import IntentScanner, keyword_automaton, load_keyword_packs, merge_refinement
+from pipeline.lid import LanguageIdentifier
+from pipeline.watchlist import VoiceWatchlist, WatchlistMatch, match_signal
+from pipeline.llm_refine import build_refiner
+from pipeline.antispoof import AASISTScorer, BatchingSpoofScorer, SpoofScheduler
+from pipeline.fuse import RiskAccumulator
+from pipeline.diarization import OnlineDiarizer, StreamingDiarizer
+from pipeline.cascade import TIER_FULL, TIER_SCREEN, CascadePolicy, CascadeStats
+from pipeline.remote import InferenceClient, RemoteDiarizer, RemoteSpoofScorer, remote_whisper_factory
+from pipeline.stubs import StubSpoofScorer, StubWhisperModel
 from config import settings
 import logging
 
@@ -20,24 +36,234 @@ app = FastAPI(title="Voice Scam Shield")
 logger = logging.getLogger("vss")
 logging.basicConfig(level=logging.INFO)
 
-# Optional global components (initialized once)
-DIARIZER = OnlineDiarizer(hf_token=settings.pyannote_token, window_seconds=5.0)
-if DIARIZER and DIARIZER.available:
-    logger.info("Diarization enabled (pyannote)")
+METRICS.enabled = settings.metrics_enabled
+STUB_MODELS = settings.model_backend == "stub"
+if STUB_MODELS:
+    logger.info("Using stub model backends (benchmark mode)")
+
+# Optional global components (constructed cheaply here; heavy imports and model loads
+# happen in the background warm-up started on startup, see warm_models / READINESS).
+# With INFERENCE_SOCKET set, models live in inference_server.py and these are proxies.
+INFERENCE = (
+    InferenceClient(
+        settings.inference_socket,
+        shm_bytes=settings.inference_shm_mb * 1024 * 1024,
+        timeout_s=settings.inference_timeout_s,
+        connect_timeout_s=settings.inference_connect_timeout_s,
+    )
+    if settings.inference_socket
+    else None
+)
+if INFERENCE is not None:
+    logger.info("Using inference server at %s", settings.inference_socket)
+    DIARIZER = RemoteDiarizer(INFERENCE)
+    SPOOF_SCORER = RemoteSpoofScorer(INFERENCE)
 else:
-    logger.info("Diarization disabled or unavailable; using mixed audio")
-SPOOF_SCORER = AASISTScorer(checkpoint_path=settings.aasist_checkpoint_path, device="cpu")
-if SPOOF_SCORER and SPOOF_SCORER.available:
-    logger.info("AASIST enabled (%s)", settings.aasist_checkpoint_path)
+    DIARIZER = OnlineDiarizer(hf_token=None if STUB_MODELS else settings.pyannote_token, window_seconds=5.0, load=False)
+    if STUB_MODELS:
+        SPOOF_SCORER = StubSpoofScorer(latency_ms=settings.stub_spoof_ms)
+    else:
+        SPOOF_SCORER = AASISTScorer(
+            checkpoint_path=settings.aasist_checkpoint_path,
+            device="cpu",
+            load=False,
+            backend=settings.aasist_backend,
+            threads=settings.aasist_threads,
+        )
+READINESS = Readiness()
+# Shared async LLM refinement (None when no key/base URL is configured)
+REFINER = build_refiner(
+    settings.openai_api_key,
+    base_url=settings.llm_base_url,
+    model=settings.llm_model,
+    timeout_s=settings.llm_timeout_s,
+    cache_size=settings.llm_cache_size,
+    debounce_s=settings.llm_debounce_s,
+    context_chars=settings.llm_context_chars,
+    metrics=METRICS,
+)
+# Shared Whisper models: one copy per (size, compute_type) for the whole process
+if INFERENCE is not None:
+    _whisper_factory = remote_whisper_factory(INFERENCE)
+elif STUB_MODELS:
+    _whisper_factory = lambda *a, **kw: StubWhisperModel(*a, rtf=settings.stub_asr_rtf, **kw)  # noqa: E731
 else:
-    logger.info("AASIST unavailable; using fallback spoof score")
+    _whisper_factory = None
+ASR_POOL = WhisperModelPool(max_concurrent=settings.asr_decode_slots, model_factory=_whisper_factory)
+# Blocking inference runs on per-stage worker pools so the event loop never stalls
+EXECUTOR = build_executor(
+    asr=settings.executor_asr_workers,
+    diarization=settings.executor_diarization_workers,
+    spoof=settings.executor_spoof_workers,
+    lid=settings.executor_lid_workers,
+    watchlist=settings.executor_watchlist_workers,
+    max_queue=settings.executor_max_queue,
+    process_stages=settings.executor_process_stages,
+    metrics=METRICS,
+)
+METRICS.queue_depth.set_function(lambda: {(stage,): EXECUTOR.queue_depth(stage) for stage in EXECUTOR.stages})
+
+
+def _model_load_times() -> dict:
+    return {(name,): st.seconds for name, st in READINESS.models.items() if st.seconds is not None}
+
+
+METRICS.model_load_seconds.set_function(_model_load_times)
+
+# Tiered cascade (CASCADE_ENABLED): escalation thresholds and per-tier counters
+CASCADE = CascadePolicy.from_settings(
+    settings.cascade_escalate_risk, settings.cascade_escalate_spoof, settings.cascade_escalate_tags
+)
+CASCADE_STATS = CascadeStats()
+METRICS.sessions_by_tier.set_function(lambda: {(tier,): n for tier, n in CASCADE_STATS.sessions.items()})
+
+
+async def _score_spoof_batch(windows: list[np.ndarray]) -> list[float]:
+    return await EXECUTOR.run("spoof", SPOOF_SCORER.score_batch, windows)
+
+
+# Collects AASIST windows from all sessions into batched forward passes
+SPOOF_BATCHER = BatchingSpoofScorer(
+    SPOOF_SCORER,
+    max_batch_size=settings.spoof_batch_max_size,
+    max_wait_ms=settings.spoof_batch_max_wait_ms,
+    run_batch=_score_spoof_batch,
+)
+
+
+# Known fraudster voices, memory-mapped (shared page cache across workers); opened during warm-up
+WATCHLIST: Optional[VoiceWatchlist] = None
+
+# Candidate languages for language ID (None = any language Whisper knows)
+LID_LANGUAGES = [lang.strip() for lang in settings.lid_languages.split(",") if lang.strip()] or None
+
+# Batches streaming Whisper decodes of all sessions (ASR_BATCH_MAX_SIZE > 1)
+ASR_BATCHER = (
+    BatchingAsrDecoder(
+        ASR_POOL,
+        max_batch_size=settings.asr_batch_max_size,
+        max_wait_ms=settings.asr_batch_max_wait_ms,
+        run=lambda fn, *args: EXECUTOR.run("asr", fn, *args),
+    )
+    if settings.asr_batch_max_size > 1
+    else None
+)
+
+
+def _warm_asr() -> bool:
+    """Load the shared Whisper model once and warm it up before sessions need it."""
+    if INFERENCE is not None:
+        INFERENCE.status()  # wait for the inference server before the pool caches a miss
+    sizes = [settings.asr_model_size]
+    if settings.cascade_enabled:
+        sizes.append(settings.cascade_asr_model_size)
+    for size in sizes:
+        asr = WhisperStreamer(model_size=size, device="cpu", compute_type=settings.asr_compute_type, pool=ASR_POOL)
+        try:
+            _ = asr.transcribe_chunk(np.zeros(16000, dtype=np.float32), sample_rate=16000)
+        except Exception:
+            pass
+    if not asr.available:
+        logger.info("ASR unavailable; transcripts will be empty")
+    return asr.available
+
+
+def _warm_diarization() -> bool:
+    if DIARIZER.load():
+        logger.info("Diarization enabled (pyannote)")
+        return True
+    logger.info("Diarization disabled or unavailable; using mixed audio")
+    return False
+
+
+def _warm_spoof() -> bool:
+    if getattr(SPOOF_SCORER, "load", None) is not None:
+        SPOOF_SCORER.load()
+    if not SPOOF_SCORER.available:
+        logger.info("AASIST unavailable; using fallback spoof score")
+        return False
+    logger.info("AASIST enabled (%s, %s)", settings.aasist_checkpoint_path, settings.aasist_backend)
+    if getattr(SPOOF_SCORER, "warmup", None) is not None:
+        SPOOF_SCORER.warmup()
+    return True
+
+
+def _warm_watchlist() -> bool:
+    global WATCHLIST
+    WATCHLIST = VoiceWatchlist(settings.watchlist_path)
+    logger.info(
+        "Voice watchlist: %d entries (%s, %d IVF clusters)", len(WATCHLIST), WATCHLIST.dtype, WATCHLIST.ivf_clusters
+    )
+    return True
+
+
+def _warm_keywords() -> bool:
+    load_keyword_packs(settings.intent_keyword_packs_dir)
+    keyword_automaton()
+    return True
+
+
+@app.on_event("startup")
+async def warm_models() -> None:
+    """Start loading all models in the background; the server accepts traffic immediately."""
+    loaders = {
+        "asr": _warm_asr,
+        "diarization": _warm_diarization,
+        "spoof": _warm_spoof,
+        "keywords": _warm_keywords,
+    }
+    if settings.watchlist_path:
+        loaders["watchlist"] = _warm_watchlist
+    READINESS.start(loaders)
+
+
+@app.on_event("shutdown")
+async def stop_executor() -> None:
+    await SPOOF_BATCHER.stop()
+    if ASR_BATCHER is not None:
+        await ASR_BATCHER.stop()
+    if REFINER is not None:
+        await REFINER.close()
+    EXECUTOR.shutdown(wait=False)
+    REPORTS.close()
+    if INFERENCE is not None:
+        INFERENCE.close()
 
 
 @app.get("/health")
 def health():
+    """Liveness: the process is up (models may still be loading)."""
     return {"ok": True}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once every model finished loading (or settled as unavailable), else 503."""
+    snap = READINESS.snapshot()
+    return JSONResponse(status_code=200 if snap["ready"] else 503, content=snap)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of stage latencies, tick overruns, queues and sessions."""
+    if not METRICS.enabled:
+        return JSONResponse(status_code=404, content={"error": "metrics disabled"})
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+def stats():
+    """Batching and queue diagnostics for tuning worker/batch settings."""
+    return {
+        "spoof_batching": SPOOF_BATCHER.stats.snapshot(),
+        "asr_batching": ASR_BATCHER.snapshot() if ASR_BATCHER is not None else None,
+        "llm_refiner": vars(REFINER.stats) if REFINER is not None else None,
+        "queue_depth": {stage: EXECUTOR.queue_depth(stage) for stage in EXECUTOR.stages},
+        "scheduler": SCHEDULER.stats(),
+        "cascade": CASCADE_STATS.snapshot() if settings.cascade_enabled else None,
+    }
+
+
 @app.post("/enroll")
 async def enroll_user(body: bytes):
     """Enroll local user voice for diarization.
@@ -47,99 +273,258 @@ async def enroll_user(body: bytes):
     if not DIARIZER or not DIARIZER.available:
         return JSONResponse(status_code=503, content={"ok": False, "error": "diarization_unavailable"})
     samples = pcm16le_bytes_to_float32(body)
-    ok = DIARIZER.enroll_user(samples, sample_rate=16000)
+    ok = await EXECUTOR.run("diarization", DIARIZER.enroll_user, samples, 16000)
     return {"ok": bool(ok)}
 
 
-# In-memory report store (simple, non-persistent)
-REPORTS: dict[str, dict] = {}
+# Shared tick budget: stretches non-priority sessions under load and gates admission
+SCHEDULER = TickScheduler(
+    base_interval=settings.tick_interval_s,
+    max_interval=settings.tick_max_interval_s,
+    budget=settings.tick_cpu_budget or None,
+    max_sessions=settings.max_sessions,
+    metrics=METRICS,
+)
+
+# Session reports are written behind (off the event loop) and pruned by TTL / count
+REPORTS = build_report_store(
+    settings.report_store,
+    settings.report_db_path,
+    ttl_s=settings.report_ttl_hours * 3600.0,
+    max_sessions=settings.report_max_sessions,
+    flush_interval_s=settings.report_flush_ms / 1000.0,
+)
 
 
 def pcm16le_bytes_to_float32(data: bytes) -> np.ndarray:
-    if not data:
-        return np.zeros(0, dtype=np.float32)
-    arr = np.frombuffer(data, dtype=np.int16)
-    # Normalize to [-1, 1]
-    return (arr.astype(np.float32) / 32768.0).astype(np.float32)
+    # Normalize to [-1, 1] in one step
+    return decode_audio(data, "pcm16")
 
 
 @app.websocket("/ws/audio")
-async def ws_audio(ws: WebSocket):
+async def ws_audio(ws: WebSocket, proto: Optional[str] = None, enc: Optional[str] = None, audio: Optional[str] = None):
     await ws.accept()
+    # Uplink: any frame size (clients batch 60-200 ms); ?audio=mulaw halves the bytes per sample
+    audio_codec = negotiate_codec(audio)
+    # ?proto=2 selects delta updates (optionally ?enc=msgpack); the default stays the v1 full-payload JSON
+    proto_version, encoding = negotiate(proto, enc)
+    delta = DeltaEncoder(keyframe_every=settings.ws_keyframe_every) if proto_version >= PROTO_DELTA else None
+    # Admission control: while the node is saturated the client is told it is queued; if no
+    # capacity frees up in time the socket is closed with 1013 (try again later)
     session_id = str(uuid.uuid4())
+    if not await SCHEDULER.admit(session_id, settings.admission_queue_s, notify=ws.send_json):
+        await ws.send_json({"error": "overloaded", "retry_after_s": settings.admission_queue_s})
+        await ws.close(code=1013, reason="overloaded")
+        return
+    # The admitted slot is reserved from here on: release it if the client is already gone
+    try:
+        # Send session id (and the negotiated protocol) to client; always JSON text
+        await ws.send_json({"session_id": session_id, "proto": proto_version, "enc": encoding, "audio": audio_codec})
+    except Exception:
+        SCHEDULER.unregister(session_id)
+        return
     session = {
         "id": session_id,
         "start": time.time(),
         "end": None,
-        "events": [],
         "transcript": "",
         "lang": None,
         "last_label": "SAFE",
+        "tick_overruns": 0,
     }
-    # Send session id to client
-    await ws.send_json({"session_id": session_id})
-    buffer = SlidingWindowBuffer(capacity_samples=16000 * 6)  # 6s buffer
+    METRICS.sessions_total.inc()
+    REPORTS.open_session(session)
+    # 8s mirrored ring: contiguous zero-copy views for synchronous reads (levels, VAD); the
+    # analysis window is copied once per tick before it crosses an await or a worker pool,
+    # since the receive loop keeps pushing meanwhile. Sessions opened while models are still
+    # loading get a longer ring so their audio can be caught up afterwards.
+    ring_seconds = 8 if READINESS.ready else max(8, int(settings.ready_backlog_s))
+    # Cascade: sessions start on the screening tier; the ring also retains the audio re-decoded on escalation
+    tier = TIER_SCREEN if settings.cascade_enabled else TIER_FULL
+    if settings.cascade_enabled:
+        ring_seconds = max(ring_seconds, int(np.ceil(settings.cascade_retain_s)) + 1)
+    buffer = SlidingWindowBuffer(capacity_samples=16000 * ring_seconds, mirrored=True)
     vad = EnergyVAD(sample_rate=16000, frame_ms=20.0, threshold_db=-55.0, hangover_ms=300.0)
-    asr = WhisperStreamer(model_size=settings.asr_model_size, device="cpu", compute_type="int8")
-    # Warm-up ASR to initialize model early and avoid transient 'unavailable' logs
-    try:
-        _ = asr.transcribe_chunk(np.zeros(16000, dtype=np.float32), sample_rate=16000)
-    except Exception:
-        pass
-    # Global DIARIZER and SPOOF_SCORER are initialized at startup
+    # Per-session decoding state only; the model itself is shared via ASR_POOL (warmed at startup)
+    asr = WhisperStreamer(
+        model_size=settings.asr_model_size if tier == TIER_FULL else settings.cascade_asr_model_size,
+        device="cpu",
+        compute_type=settings.asr_compute_type,
+        pool=ASR_POOL,
+        min_chunk_seconds=settings.asr_stream_min_chunk_s,
+        context_seconds=settings.asr_stream_context_s,
+        # With language ID on, no per-window guess is locked in before it decides
+        follow_detection=not settings.lid_enabled,
+    )
+    # Global DIARIZER and SPOOF_SCORER are loaded in the background; diarization state is per
+    # session and, like the keyword scanner, created on the first tick after models are ready
+    diarizer = None
+    intent_scanner = None
+    # Language decided once per caller speaker; pins the decode language and the keyword pack
+    lid = (
+        LanguageIdentifier(
+            vad,
+            min_speech_seconds=settings.lid_min_speech_s,
+            recheck_seconds=settings.lid_recheck_s,
+            max_speech_seconds=settings.lid_max_speech_s,
+            min_confidence=settings.lid_min_confidence,
+        )
+        if settings.lid_enabled
+        else None
+    )
+    spoof_sched = SpoofScheduler(
+        vad,
+        window_samples=SPOOF_SCORER.target_samples,
+        hop_seconds=settings.spoof_hop_s,
+        min_speech_seconds=settings.spoof_min_speech_s,
+    )
 
     # Streaming accumulation/smoothing state
-    ema_intent = 0.0
-    ema_spoof = 0.0
-    ema_risk = 0.0
-    sticky_intent = 0.0
-    sticky_spoof = 0.0
-    # Update every 0.5s, use gentle decay so evidence persists across the call
-    DECAY_PER_TICK = 0.98  # ~17s half-life at 0.5s tick
-    ALPHA_INTENT = 0.4
-    ALPHA_SPOOF = 0.3
-    ALPHA_RISK = 0.3
-    last_intent_eval_len = 0
-    last_intent_score = 0.0
-    last_intent_tags: list[str] = []
+    acc = RiskAccumulator()
+    # LLM refinement runs in the background; ticks merge whatever result is latest
+    refiner = REFINER.session() if REFINER is not None else None
 
     last_rx_level = 0.0
     frames_received = 0
+    processed_until = 0  # absolute sample index already handed to the streaming stages (ASR, spoof)
     first_frame_logged = False
 
+    async def send_update(msg: dict) -> None:
+        data = encode_message(msg, encoding)
+        if isinstance(data, bytes):
+            await ws.send_bytes(data)
+        else:
+            await ws.send_text(data)
+
+    def start_pipeline() -> None:
+        nonlocal diarizer, intent_scanner
+        if DIARIZER.available and tier == TIER_FULL:
+            diarizer = StreamingDiarizer(
+                DIARIZER,
+                chunk_seconds=settings.diar_chunk_s,
+                similarity_threshold=settings.diar_similarity_threshold,
+                vad=vad,
+            )
+        intent_scanner = IntentScanner(keyword_automaton(asr.language))
+
+    def escalate(reason: str) -> None:
+        """Move this session to the full pipeline for the rest of the call."""
+        nonlocal tier
+        tier = TIER_FULL
+        CASCADE_STATS.escalate(reason, time.time() - session["start"])
+        METRICS.escalations.inc(reason)
+        logger.info("session %s escalated to full tier (%s)", session_id, reason)
+        asr.use_model(settings.asr_model_size)
+        if settings.asr_streaming:
+            # Re-decode the retained recent audio with the full model (takes effect next tick)
+            retained = min(processed_until - (buffer.total_samples - buffer.size()), int(16000 * settings.cascade_retain_s))
+            if retained > 0:
+                n = asr.rewind(retained)
+                asr.push_audio(buffer.get_range(processed_until - n, processed_until, copy=True), voiced=True)
+        # Rescan the (partly rewritten) transcript from scratch; adds diarization if available
+        start_pipeline()
+
     async def emit_loop():
-        nonlocal ema_intent, ema_spoof, ema_risk, sticky_intent, sticky_spoof
-        nonlocal last_intent_eval_len, last_intent_score, last_intent_tags
-        # Emit status every 500ms
+        nonlocal processed_until, intent_scanner
+        # Watchlist lookups of the caller's voice: once per diarization run (the centroid only moves then)
+        watch_runs = -1
+        voice_hit: Optional[WatchlistMatch] = None
+        # Emit status every tick: 500ms nominally, stretched by the scheduler under load
         try:
             while True:
-                await asyncio.sleep(0.5)
+                tick_dt = await ticker.wait()
+                tick_interval = ticker.interval
+                # Under load, decode and score less often on proportionally larger windows
+                asr.min_chunk_seconds = settings.asr_stream_min_chunk_s * ticker.scale
+                hop_s = settings.spoof_hop_s if tier == TIER_FULL else settings.cascade_spoof_hop_s
+                spoof_sched.hop_samples = int(16000 * hop_s * ticker.scale)
+                tick_start = time.perf_counter()
+                status = {
+                    "rx_level": float(last_rx_level),
+                    "buffer_size": int(buffer.size()),
+                    "frames_received": int(frames_received),
+                    "models_ready": READINESS.ready,
+                }
                 # Heartbeat/status to ensure client sees periodic messages even if downstream fails
+                # (v2 folds it into the delta update instead)
+                if delta is None:
+                    try:
+                        await ws.send_json({"session_id": session_id, "tick": True, **status})
+                    except Exception:
+                        pass
+                if not READINESS.ready:
+                    # Audio keeps accumulating in the ring; it is processed once models are up
+                    if delta is not None:
+                        try:
+                            await send_update(delta.encode(status))
+                        except Exception:
+                            pass
+                    continue
+                if intent_scanner is None:
+                    start_pipeline()
                 try:
-                    await ws.send_json({
-                        "session_id": session_id,
-                        "tick": True,
-                        "rx_level": float(last_rx_level),
-                        "buffer_size": int(buffer.size()),
-                        "frames_received": int(frames_received),
-                    })
-                except Exception:
-                    pass
-                try:
-                    recent = buffer.get_recent(16000 * 1)  # last 1s
+                    recent = buffer.get_recent_view(16000 * 1)  # last 1s
                     # For demo reliability, treat any non-empty audio as active if VAD says False but we have samples
                     is_active = vad.is_speech(recent) or (recent.size > 0 and np.max(np.abs(recent)) > 1e-4)
                     heuristics = 0.1 if is_active else 0.0
 
-                    # ASR on last 3s window for more reliable decoding in demo conditions
-                    recent_asr = buffer.get_recent(16000 * 3)
+                    # Diarize the last 3s (or everything not yet fed to ASR, if we fell behind)
+                    # Snapshot the absolute position together with the window (no await in between)
+                    # Audio that already left the ring is skipped; a backlog (e.g. buffered while models
+                    # loaded) is caught up at most CATCHUP_MAX_S per nominal tick, i.e. faster than real time
+                    processed_until = max(processed_until, buffer.total_samples - buffer.size())
+                    catchup = min(int(16000 * settings.catchup_max_s * ticker.scale), buffer.capacity // 2)
+                    window_end = min(buffer.total_samples, processed_until + catchup)
+                    new_samples = window_end - processed_until
+                    span = max(16000 * 3, new_samples)
+                    # One copy per tick: the window is handed to worker pools (unbounded queue wait) and
+                    # used across several awaits while frames keep arriving, so a ring view is not safe
+                    recent_asr = buffer.get_range(window_end - span, window_end, copy=True)
+                    # Frame-level VAD over exactly the new audio (hangover carried across ticks)
+                    new_vad = vad.push(recent_asr[-new_samples:] if new_samples > 0 else recent_asr[:0])
                     # Use diarization if available to focus on caller speech
-                    if DIARIZER and DIARIZER.available:
-                        dia_audio, _ = DIARIZER.select_caller(recent_asr, sample_rate=16000)
+                    caller = None
+                    if diarizer is not None:
+                        dia_audio, caller = await EXECUTOR.run("diarization", diarizer.select_caller, recent_asr, window_end)
                     else:
                         dia_audio = recent_asr
-                    # Always run ASR (we smooth results downstream)
-                    text, lang = asr.transcribe_chunk(dia_audio, sample_rate=16000)
+                    new_audio = dia_audio[-new_samples:] if new_samples > 0 else dia_audio[:0]
+                    processed_until = window_end
+                    if WATCHLIST is not None and diarizer is not None and diarizer.runs != watch_runs:
+                        watch_runs = diarizer.runs
+                        caller_emb = diarizer.caller_embedding()
+                        if caller_emb is not None and caller_emb.shape[-1] == WATCHLIST.dim:
+                            matches = await EXECUTOR.run(
+                                "watchlist",
+                                WATCHLIST.search,
+                                caller_emb,
+                                settings.watchlist_top_k,
+                                settings.watchlist_nprobe,
+                            )
+                            best = matches[0] if matches else None
+                            voice_hit = best if best and best.score >= settings.watchlist_threshold else None
+                    voice_match = 0.0
+                    if voice_hit is not None:
+                        voice_match = match_signal(voice_hit.score, settings.watchlist_threshold)
+                    if lid is not None:
+                        # One detection on the caller's first seconds of speech instead of one per decode
+                        lid.push(new_audio, caller)
+                        if lid.due():
+                            lid.update(*await EXECUTOR.run("lid", asr.detect_language, lid.window(), LID_LANGUAGES))
+                        if lid.language is not None and lid.language != asr.language:
+                            asr.pin_language(lid.language)
+                            # Only the spoken language's keywords can match; rescan the transcript with them
+                            intent_scanner = IntentScanner(keyword_automaton(lid.language))
+                    if settings.asr_streaming:
+                        # Only hand over audio the streamer has not seen; it decodes the uncommitted tail
+                        asr.push_audio(new_audio, voiced=new_vad.active)
+                        if ASR_BATCHER is not None:
+                            text, lang = await ASR_BATCHER.process_stream(asr)
+                        else:
+                            text, lang = await EXECUTOR.run("asr", asr.process_stream)
+                    else:
+                        # Always run ASR (we smooth results downstream)
+                        text, lang = await EXECUTOR.run("asr", asr.transcribe_chunk, dia_audio, 16000)
                     if not asr.available:
                         logger.info("ASR unavailable; using empty transcript (fallback)")
                     elif asr.fallback_used:
@@ -147,45 +532,48 @@ async def ws_audio(ws: WebSocket):
 
                     # Intent (optionally refined by LLM) over full call context, not just recent fragment
                     full_text = asr.partial_transcript or text
-                    # Re-evaluate intent only when transcript grows materially
-                    if full_text and len(full_text) >= (last_intent_eval_len or 0) + 40:
-                        intent_res = score_intent(full_text, api_key=settings.openai_api_key)
-                        last_intent_eval_len = len(full_text)
-                        last_intent_score = float(intent_res.score)
-                        last_intent_tags = list(intent_res.tags)
+                    # Keywords: incremental scan of the newly appended text only
+                    with METRICS.timer("intent_keywords"):
+                        kw_res = intent_scanner.update(full_text)
+                    # LLM refinement: non-blocking, debounced, only when the transcript grows materially
+                    if refiner is not None and tier == TIER_FULL:
+                        refiner.submit(full_text)
+                    intent_res = merge_refinement(kw_res, refiner.result if refiner is not None else None)
+                    # Spoof runs on accumulated (caller) speech only, once per hop of new voiced audio;
+                    # in between, the cached score is reused. Still gated by activity to avoid drift during silence
+                    spoof_sched.push(new_audio)
+                    if SPOOF_SCORER and SPOOF_SCORER.available:
+                        if spoof_sched.due():
+                            spoof_sched.update(await SPOOF_BATCHER.score(spoof_sched.window()))
+                        raw_spoof = spoof_sched.score or 0.0
                     else:
-                        from types import SimpleNamespace
-                        intent_res = SimpleNamespace(score=(last_intent_score or 0.0), tags=(last_intent_tags or []), rationale="cached")  # type: ignore
-                    # Use a 3s window for spoof; gate by speech activity to avoid drift during silence
-                    recent_spoof = buffer.get_recent(16000 * 3)
-                    spoof_in = dia_audio if (DIARIZER and DIARIZER.available) else recent_spoof
-                    raw_spoof = SPOOF_SCORER.score(spoof_in) if SPOOF_SCORER and SPOOF_SCORER.available else 0.05
+                        raw_spoof = 0.05
                     spoof = raw_spoof if is_active else 0.0
 
                     tags = []
                     if is_active:
                         tags.append("VAD_ACTIVE")
                     tags.extend(intent_res.tags)
+                    if voice_hit is not None:
+                        tags.append("VOICE_WATCHLIST")
 
                     # Update smoothers and sticky evidence accumulators
-                    ema_intent = ALPHA_INTENT * float(intent_res.score) + (1.0 - ALPHA_INTENT) * (ema_intent or 0.0)
-                    ema_spoof = ALPHA_SPOOF * float(spoof) + (1.0 - ALPHA_SPOOF) * (ema_spoof or 0.0)
-                    sticky_intent = max(ema_intent, (sticky_intent or 0.0) * DECAY_PER_TICK)
-                    sticky_spoof = max(ema_spoof, (sticky_spoof or 0.0) * DECAY_PER_TICK)
-
-                    # Fuse using sticky values to accumulate risk across the conversation
-                    fusion = fuse_scores(spoof=sticky_spoof, intent=sticky_intent, heuristics=heuristics, tags=tags)
-                    # Smooth the displayed risk to avoid flicker
-                    ema_risk = ALPHA_RISK * float(fusion.risk) + (1.0 - ALPHA_RISK) * (ema_risk or 0.0)
-
-                    # Derive label from smoothed risk using same thresholds
-                    if ema_risk < 0.35:
-                        label = "SAFE"
-                    elif ema_risk < 0.65:
-                        label = "SUSPICIOUS"
-                        
-                    else:
-                        label = "SCAM"
+                    fusion = acc.update(
+                        intent=intent_res.score,
+                        spoof=spoof,
+                        heuristics=heuristics,
+                        tags=tags,
+                        dt=tick_dt,
+                        voice_match=voice_match,
+                    )
+                    ema_risk, label = fusion.risk, fusion.label
+                    sticky_intent, sticky_spoof = acc.sticky_intent, acc.sticky_spoof
+                    if tier == TIER_SCREEN:
+                        reason = CASCADE.escalation_reason(
+                            ema_risk, spoof_sched.score if is_active else None, intent_res.tags
+                        )
+                        if reason is not None:
+                            escalate(reason)
 
                     payload = {
                         "risk": float(ema_risk),
@@ -193,26 +581,40 @@ async def ws_audio(ws: WebSocket):
                         "intent": float(sticky_intent),
                         "heuristics": float(heuristics),
                         "label": label,
-                        "rationale": f"intent={sticky_intent:.2f}, spoof={sticky_spoof:.2f}, heuristics={heuristics:.2f}",
+                        "rationale": f"intent={sticky_intent:.2f}, spoof={sticky_spoof:.2f}, heuristics={heuristics:.2f}"
+                        + (f", voice_match={acc.sticky_voice:.2f}" if acc.sticky_voice > 0 else ""),
                         "tags": fusion.tags,
-                        "partial_transcript": asr.partial_transcript[-400:],
+                        "voice_match": float(acc.sticky_voice),
+                        "watchlist_match": None
+                        if voice_hit is None
+                        else {**voice_hit.meta, "score": round(voice_hit.score, 3)},
                         "lang": lang,
+                        "tier": tier,
                         "asr_available": asr.available,
                         "asr_fallback_used": asr.fallback_used,
                         "diar_available": bool(DIARIZER and DIARIZER.available),
-                        "session_id": session_id,
-                        "rx_level": float(last_rx_level),
-                        "buffer_size": int(buffer.size()),
-                        "frames_received": int(frames_received),
+                        **status,
+                        "tick_ms": (time.perf_counter() - tick_start) * 1000.0,
+                        "tick_interval_s": tick_interval,
                     }
-                    await ws.send_json(payload)
+                    with METRICS.timer("ws_send"):
+                        if delta is None:
+                            payload["partial_transcript"] = (asr.partial_transcript + " " + asr.tentative_text).strip()[-400:]
+                            payload["session_id"] = session_id
+                            await ws.send_json(payload)
+                        else:
+                            await send_update(delta.encode(payload, asr.partial_transcript, asr.tentative_text))
+                    tick_cost = time.perf_counter() - tick_start
+                    ticker.done(tick_cost, risk=ema_risk)
+                    if METRICS.observe_tick(tick_cost, tick_interval):
+                        session["tick_overruns"] += 1
 
                     # Update session
                     session["last_label"] = label
                     if lang:
                         session["lang"] = lang
                     session["transcript"] = asr.partial_transcript
-                    session["events"].append({
+                    REPORTS.append_event(session_id, {
                         "t": time.time(),
                         "risk": float(ema_risk),
                         "label": label,
@@ -220,39 +622,90 @@ async def ws_audio(ws: WebSocket):
                         "intent": float(sticky_intent),
                         "spoof": float(sticky_spoof),
                     })
-                except Exception as e:
+                except Exception:
                     logger.exception("emit_loop error")
+                    if delta is not None:
+                        try:
+                            await send_update(delta.encode(status))
+                        except Exception:
+                            pass
         except WebSocketDisconnect:
             return
 
+    ticker = SCHEDULER.register(session_id)
     emit_task = asyncio.create_task(emit_loop())
+    METRICS.active_sessions.inc()
+    CASCADE_STATS.enter(tier)
     try:
         while True:
-            # Expect 16kHz mono PCM16 frames from the browser
+            # Expect 16kHz mono frames (PCM16 or mu-law, per ?audio=) from the browser
             frame = await ws.receive_bytes()
-            samples = pcm16le_bytes_to_float32(frame)
+            # Decoded straight into the ring buffer
+            n = buffer.push_encoded(frame, audio_codec)
             # Track receive level for diagnostics
-            if samples.size > 0:
-                last_rx_level = float(np.sqrt(float(np.mean(np.square(samples)))) + 1e-9)
+            if n > 0:
+                latest = buffer.get_recent_view(n)
+                last_rx_level = float(np.sqrt(float(np.dot(latest, latest)) / latest.size) + 1e-9)
                 if not first_frame_logged and last_rx_level > 0:
                     logger.info("received first audio frame (rms=%.6f)", last_rx_level)
                     first_frame_logged = True
                 frames_received += 1
-            buffer.push(samples)
     except WebSocketDisconnect:
         emit_task.cancel()
+        if refiner is not None:
+            refiner.close()
         try:
             await emit_task
-        except Exception:
+        except (asyncio.CancelledError, Exception):
             pass
+        # Keep the words still waiting for a second agreeing decode
+        asr.finalize()
+        session["transcript"] = asr.partial_transcript
         session["end"] = time.time()
-        REPORTS[session_id] = session
+        REPORTS.close_session(
+            session_id,
+            end=session["end"],
+            transcript=session["transcript"],
+            lang=session["lang"],
+            last_label=session["last_label"],
+            tick_overruns=session["tick_overruns"],
+        )
         return
+    finally:
+        SCHEDULER.unregister(session_id)
+        METRICS.active_sessions.dec()
+        CASCADE_STATS.leave(tier)
 
 
 @app.get("/report/{session_id}")
-def get_report(session_id: str):
+def get_report(
+    session_id: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    stream: bool = False,
+    max_points: Optional[int] = None,
+):
+    """Session report; events can be paged (offset/limit), filtered by time (since/until, epoch seconds),
+    downsampled to at most max_points (keeping label changes and risk peaks) or streamed as NDJSON
+    (first line is the session, then one event per line)."""
     report = REPORTS.get(session_id)
     if not report:
         return JSONResponse(status_code=404, content={"error": "not found"})
-    return report
\ No newline at end of file
+    if stream:
+        def lines():
+            yield json.dumps(report) + "\n"
+            for ev in REPORTS.iter_events(session_id, since=since, until=until):
+                yield json.dumps(ev) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    if max_points is not None:
+        report["events"] = REPORTS.downsampled_events(session_id, max_points, since=since, until=until)
+        return report
+    report["events"] = REPORTS.events(session_id, offset=offset, limit=limit, since=since, until=until)
+    if limit is not None:
+        total = REPORTS.count_events(session_id, since=since, until=until)
+        report["events_total"] = total
+        report["next_offset"] = offset + len(report["events"]) if offset + len(report["events"]) < total else None
+    return report
@@ -0,0 +1,369 @@
+"""
+Offline batch scoring of recorded calls.
+
+Walks WAV (16 kHz mono PCM16) and raw .pcm/.raw (16 kHz mono s16le) files,
+memory-maps each one and replays it through the same VAD -> diarization ->
+ASR -> intent -> AASIST -> fusion pipeline as `/ws/audio`, in 0.5 s ticks but
+without real-time pacing. Calls are spread over a process pool; every worker
+loads its own model set once. Each call becomes one report with the same
+shape as `GET /report/{session_id}` (plus `source`), appended to a JSONL file
+as soon as it finishes, so an interrupted run resumes where it stopped.
+
+Usage (from backend/):
+  python batch_score.py /data/calls --out reports.jsonl --workers 4
+  python batch_score.py /data/calls --out reports.jsonl --parquet reports.parquet
+  MODEL_BACKEND=stub python batch_score.py /data/calls --out /tmp/r.jsonl
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set
+import argparse
+import json
+import logging
+import os
+import struct
+import time
+import uuid
+
+import numpy as np
+
+from config import settings
+from pipeline.antispoof import AASISTScorer, SpoofScheduler
+from pipeline.asr_stream import WhisperModelPool, WhisperStreamer
+from pipeline.diarization import OnlineDiarizer, StreamingDiarizer
+from pipeline.fuse import RiskAccumulator
+from pipeline.intent import IntentScanner, keyword_automaton, load_keyword_packs
+from pipeline.lid import LanguageIdentifier
+from pipeline.stubs import StubSpoofScorer, StubWhisperModel
+from pipeline.watchlist import VoiceWatchlist, match_signal
+from utils.report_store import SQLiteReportStore
+from utils.timeline import EventTimeline
+from utils.vad import EnergyVAD
+
+SR = 16000
+AUDIO_SUFFIXES = (".wav", ".pcm", ".raw")
+logger = logging.getLogger("vss.batch")
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    """Memory-map the int16 samples of a 16 kHz mono PCM16 WAV or raw s16le file."""
+    if path.suffix.lower() != ".wav":
+        return np.memmap(path, dtype="<i2", mode="r")
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError(f"{path}: not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+            if cid == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif cid == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None or fmt[0] != 1 or fmt[1] != 1 or fmt[2] != SR or fmt[5] != 16:
+        raise ValueError(f"{path}: expected 16 kHz mono PCM16")
+    n = min(size, path.stat().st_size - offset) // 2
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(n,))
+
+
+def iter_calls(inputs: Iterable[str]) -> Iterator[Path]:
+    for spec in inputs:
+        p = Path(spec)
+        if p.is_dir():
+            yield from sorted(f for f in p.rglob("*") if f.suffix.lower() in AUDIO_SUFFIXES)
+        elif p.exists():
+            yield p
+
+
+def report_id(path: Path) -> str:
+    """Stable id per source file, so re-runs produce the same report ids."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, str(path.resolve())))
+
+
+def completed_sources(out_path: Path) -> Set[str]:
+    """Sources already present in an existing JSONL output (a torn last line is ignored)."""
+    done: Set[str] = set()
+    if not out_path.exists():
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["source"])
+            except Exception:
+                continue
+    return done
+
+
+class _Models:
+    """Model set owned by one worker process."""
+
+    def __init__(self, stub: bool, threads: int) -> None:
+        if threads > 0:
+            try:
+                import torch  # type: ignore
+
+                torch.set_num_threads(threads)
+            except Exception:
+                pass
+        self.asr_pool = WhisperModelPool(
+            max_concurrent=1,
+            cpu_threads=threads,
+            model_factory=(lambda *a, **kw: StubWhisperModel(*a, rtf=settings.stub_asr_rtf, **kw)) if stub else None,
+        )
+        self.diarizer = OnlineDiarizer(hf_token=None if stub else settings.pyannote_token, window_seconds=5.0)
+        if stub:
+            self.spoof = StubSpoofScorer(latency_ms=settings.stub_spoof_ms)
+        else:
+            self.spoof = AASISTScorer(
+                checkpoint_path=settings.aasist_checkpoint_path,
+                device="cpu",
+                backend=settings.aasist_backend,
+                threads=settings.aasist_threads or threads,
+            )
+        load_keyword_packs(settings.intent_keyword_packs_dir)
+        # Memory-mapped, so every worker shares the same pages
+        self.watchlist = VoiceWatchlist(settings.watchlist_path) if settings.watchlist_path else None
+
+
+_MODELS: Optional[_Models] = None
+
+
+def _init_worker(stub: bool, threads: int) -> None:
+    global _MODELS
+    logging.basicConfig(level=logging.WARNING)
+    _MODELS = _Models(stub, threads)
+
+
+def score_call(path: str, tick_s: float = 0.5) -> dict:
+    """Replay one recorded call through the streaming pipeline and return its report."""
+    models = _MODELS if _MODELS is not None else _Models(settings.model_backend == "stub", 0)
+    src = Path(path)
+    pcm = open_pcm(src)
+    t_wall = time.perf_counter()
+    start = src.stat().st_mtime - pcm.shape[0] / SR  # best guess at the call start
+    session = {
+        "id": report_id(src),
+        "source": str(src.resolve()),
+        "start": start,
+        "end": start + pcm.shape[0] / SR,
+        "transcript": "",
+        "lang": None,
+        "last_label": "SAFE",
+    }
+
+    vad = EnergyVAD(sample_rate=SR, frame_ms=20.0, threshold_db=-55.0, hangover_ms=300.0)
+    asr = WhisperStreamer(
+        model_size=settings.asr_model_size,
+        device="cpu",
+        compute_type=settings.asr_compute_type,
+        pool=models.asr_pool,
+        min_chunk_seconds=settings.asr_stream_min_chunk_s,
+        context_seconds=settings.asr_stream_context_s,
+        # With language ID on, no per-window guess is locked in before it decides
+        follow_detection=not settings.lid_enabled,
+    )
+    diarizer = None
+    if models.diarizer.available:
+        diarizer = StreamingDiarizer(
+            models.diarizer,
+            chunk_seconds=settings.diar_chunk_s,
+            similarity_threshold=settings.diar_similarity_threshold,
+            vad=vad,
+        )
+    spoof_sched = SpoofScheduler(
+        vad,
+        window_samples=models.spoof.target_samples,
+        hop_seconds=settings.spoof_hop_s,
+        min_speech_seconds=settings.spoof_min_speech_s,
+    )
+    lid = (
+        LanguageIdentifier(
+            vad,
+            min_speech_seconds=settings.lid_min_speech_s,
+            recheck_seconds=settings.lid_recheck_s,
+            max_speech_seconds=settings.lid_max_speech_s,
+            min_confidence=settings.lid_min_confidence,
+        )
+        if settings.lid_enabled
+        else None
+    )
+    lid_languages = [lang.strip() for lang in settings.lid_languages.split(",") if lang.strip()] or None
+    watch_runs = -1
+    voice_hit = None
+    scanner = IntentScanner()
+    acc = RiskAccumulator()
+    timeline = EventTimeline(capacity=pcm.shape[0] // max(1, int(tick_s * SR)) + 1)
+
+    tick = max(1, int(tick_s * SR))
+    processed_until = 0
+    lang = None
+    for end in range(tick, pcm.shape[0] + tick, tick):
+        end = min(end, pcm.shape[0])
+        new_samples = end - processed_until
+        if new_samples <= 0:
+            break
+        span = max(SR * 3, new_samples)
+        # Only the current window is converted; the file itself stays memory-mapped
+        window = pcm[max(0, end - span) : end].astype(np.float32) / 32768.0
+        recent = window[-SR:]
+        is_active = vad.is_speech(recent) or (recent.size > 0 and float(np.max(np.abs(recent))) > 1e-4)
+        heuristics = 0.1 if is_active else 0.0
+        new_vad = vad.push(window[-new_samples:])
+        caller = None
+        if diarizer is not None:
+            dia_audio, caller = diarizer.select_caller(window, end)
+        else:
+            dia_audio = window
+        new_audio = dia_audio[-new_samples:]
+        processed_until = end
+        if models.watchlist is not None and diarizer is not None and diarizer.runs != watch_runs:
+            watch_runs = diarizer.runs
+            caller_emb = diarizer.caller_embedding()
+            if caller_emb is not None and caller_emb.shape[-1] == models.watchlist.dim:
+                matches = models.watchlist.search(caller_emb, settings.watchlist_top_k, settings.watchlist_nprobe)
+                best = matches[0] if matches else None
+                voice_hit = best if best and best.score >= settings.watchlist_threshold else None
+        voice_match = 0.0
+        if voice_hit is not None:
+            voice_match = match_signal(voice_hit.score, settings.watchlist_threshold)
+        if lid is not None:
+            lid.push(new_audio, caller)
+            if lid.due():
+                lid.update(*asr.detect_language(lid.window(), lid_languages))
+            if lid.language is not None and lid.language != asr.language:
+                asr.pin_language(lid.language)
+                scanner = IntentScanner(keyword_automaton(lid.language))
+
+        asr.push_audio(new_audio, voiced=new_vad.active)
+        text, lang = asr.process_stream()
+        intent_res = scanner.update(asr.partial_transcript or text)
+
+        spoof_sched.push(new_audio)
+        if models.spoof.available:
+            if spoof_sched.due():
+                spoof_sched.update(models.spoof.score_batch([spoof_sched.window()])[0])
+            raw_spoof = spoof_sched.score or 0.0
+        else:
+            raw_spoof = 0.05
+        spoof = raw_spoof if is_active else 0.0
+
+        tags = ["VAD_ACTIVE"] if is_active else []
+        tags.extend(intent_res.tags)
+        if voice_hit is not None:
+            tags.append("VOICE_WATCHLIST")
+        fusion = acc.update(
+            intent=intent_res.score, spoof=spoof, heuristics=heuristics, tags=tags, voice_match=voice_match
+        )
+        session["last_label"] = fusion.label
+        timeline.append(start + end / SR, fusion.risk, fusion.label, fusion.tags, acc.sticky_intent, acc.sticky_spoof)
+
+    # End of call: keep the hypothesis that never got a second agreeing decode
+    asr.finalize()
+    session["transcript"] = asr.partial_transcript
+    session["lang"] = lang
+    if voice_hit is not None:
+        session["watchlist_match"] = {**voice_hit.meta, "score": round(voice_hit.score, 3)}
+    session["events"] = timeline.to_events()
+    session["processing_s"] = time.perf_counter() - t_wall
+    return session
+
+
+def write_parquet(jsonl_path: Path, parquet_path: Path) -> None:
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except Exception as e:
+        raise SystemExit(f"--parquet requires pyarrow: {e}")
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    pq.write_table(pa.Table.from_pylist(rows), str(parquet_path))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score recorded calls offline")
+    parser.add_argument("inputs", nargs="+", help="WAV/PCM files or directories (searched recursively)")
+    parser.add_argument("--out", required=True, help="JSONL report file (appended; completed calls are skipped)")
+    parser.add_argument("--parquet", default="", help="Also write all reports to this Parquet file at the end")
+    parser.add_argument(
+        "--db", default="", help="Also insert reports into this SQLite report store (served by /report/{id})"
+    )
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=0,
+        help="Torch/CTranslate2 threads per worker (0 = cpu_count / workers)",
+    )
+    parser.add_argument(
+        "--tick", type=float, default=0.5, help="Pipeline tick in seconds (matches /ws/audio by default)"
+    )
+    parser.add_argument("--stub", action="store_true", help="Use stub model backends (same as MODEL_BACKEND=stub)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    out_path = Path(args.out)
+    done = completed_sources(out_path)
+    todo = [p for p in iter_calls(args.inputs) if str(p.resolve()) not in done]
+    logger.info("%d calls to score (%d already in %s)", len(todo), len(done), out_path)
+    stub = args.stub or settings.model_backend == "stub"
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    store = (
+        SQLiteReportStore(args.db, ttl_s=settings.report_ttl_hours * 3600.0, max_sessions=settings.report_max_sessions)
+        if args.db
+        else None
+    )
+    t0 = time.perf_counter()
+    audio_s = 0.0
+    failed = 0
+    with open(out_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(stub, threads)
+    ) as pool:
+        futures = {pool.submit(score_call, str(p), args.tick): p for p in todo}
+        for i, fut in enumerate(as_completed(futures), 1):
+            path = futures[fut]
+            try:
+                report = fut.result()
+            except Exception as e:
+                failed += 1
+                logger.warning("%s: %s", path, e)
+                continue
+            # One line per finished call, flushed immediately: this is the resume checkpoint
+            out.write(json.dumps(report) + "\n")
+            out.flush()
+            if store is not None:
+                store.open_session(report)
+                for ev in report["events"]:
+                    store.append_event(report["id"], ev)
+            audio_s += report["end"] - report["start"]
+            elapsed = time.perf_counter() - t0
+            logger.info(
+                "[%d/%d] %s %s (%.1fx real time overall)",
+                i,
+                len(todo),
+                report["last_label"],
+                path.name,
+                audio_s / max(elapsed, 1e-9),
+            )
+
+    if store is not None:
+        store.close()
+    if args.parquet:
+        write_parquet(out_path, Path(args.parquet))
+    logger.info("done: %d scored, %d failed in %.1fs", len(todo) - failed, failed, time.perf_counter() - t0)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
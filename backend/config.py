@@ -2,10 +2,93 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     openai_api_key: str | None = None
+    # "real" or "stub" (cheap stand-ins for load benchmarks; see pipeline/stubs.py)
+    model_backend: str = "real"
+    stub_asr_rtf: float = 0.05  # stub decode time per second of audio
+    stub_spoof_ms: float = 5.0  # stub AASIST time per window
+    # LLM intent refinement (any OpenAI-compatible server; see scripts/llm_stub_server.py)
+    llm_base_url: str | None = None
+    llm_model: str = "gpt-4o-mini"
+    llm_timeout_s: float = 4.0
+    llm_debounce_s: float = 2.0  # min spacing between requests of one session
+    llm_context_chars: int = 1500  # recent transcript sent verbatim; older text via rolling summary
+    llm_cache_size: int = 512
     elevenlabs_api_key: str | None = None
     pyannote_token: str | None = None
+    diar_chunk_s: float = 2.0  # new audio per incremental diarization run
+    diar_similarity_threshold: float = 0.55  # min cosine similarity to join an existing speaker
+    intent_keyword_packs_dir: str | None = None  # extra JSON keyword packs: {"lang": ..., "keywords": {TAG: [...]}}
     asr_model_size: str = "small"  # e.g., "tiny", "small", "medium"
+    asr_compute_type: str = "int8"
+    asr_decode_slots: int = 2  # max concurrent Whisper decodes across all sessions
+    asr_streaming: bool = True  # incremental decoding with local-agreement commits
+    asr_stream_min_chunk_s: float = 1.0  # new audio required before the next streaming decode
+    asr_stream_context_s: float = 0.5  # committed audio kept as left context for the decoder
+    asr_batch_max_size: int = 1  # streaming decodes per batched Whisper pass across sessions; 1 = no batching
+    asr_batch_max_wait_ms: float = 30.0  # how long a due decode waits for other sessions to join its batch
+    # Language ID once per speaker: pins the decode language and the intent keyword pack
+    lid_enabled: bool = True
+    lid_min_speech_s: float = 3.0  # voiced speech before the first detection
+    lid_recheck_s: float = 3.0  # more speech before re-checking a low-confidence result
+    lid_max_speech_s: float = 12.0  # the best guess becomes final at this much speech
+    lid_min_confidence: float = 0.7
+    lid_languages: str = ""  # comma-separated candidates, e.g. "en,es,fr"; empty = any Whisper language
+    # Known fraudster voices (pipeline/watchlist.py; build with scripts/import_watchlist.py)
+    watchlist_path: str | None = None
+    watchlist_threshold: float = 0.6  # caller-to-entry cosine similarity that counts as a match
+    watchlist_top_k: int = 3
+    watchlist_nprobe: int = 8  # IVF clusters searched per query (exact scan without an index)
+    # Session reports: "sqlite" (persistent, shared by workers) or "memory"
+    report_store: str = "sqlite"
+    report_db_path: str = "data/reports.sqlite3"  # relative to the backend working directory
+    report_ttl_hours: float = 72.0
+    report_max_sessions: int = 10000
+    report_flush_ms: float = 200.0  # write-behind batching interval
+    # Startup: sessions opened before models are ready buffer up to this much audio,
+    # then catch up at most catchup_max_s of it per 0.5 s tick
+    ready_backlog_s: float = 30.0
+    catchup_max_s: float = 4.0
+    ws_keyframe_every: int = 20  # protocol v2: full snapshot every N updates (10 s at 0.5 s ticks)
+    # Tick scheduling: per-session interval stretches from tick_interval_s up to tick_max_interval_s
+    # when the summed tick cost exceeds tick_cpu_budget (tick-seconds per second; 0 = CPU count).
+    # New sessions wait up to admission_queue_s for capacity when saturated, then are refused.
+    tick_interval_s: float = 0.5
+    tick_max_interval_s: float = 2.0
+    tick_cpu_budget: float = 0.0
+    max_sessions: int = 0  # 0 = no fixed cap (budget-based admission only)
+    admission_queue_s: float = 10.0
+    metrics_enabled: bool = True  # Prometheus-style /metrics; near-zero overhead when off
+    # Tiered cascade: sessions start on a screening tier (cascade_asr_model_size, keyword intent only,
+    # no diarization, AASIST every cascade_spoof_hop_s of speech) and escalate to the full pipeline
+    # when risk, spoof score or an intent tag crosses the thresholds below
+    cascade_enabled: bool = False
+    cascade_asr_model_size: str = "tiny"
+    cascade_spoof_hop_s: float = 3.0
+    cascade_escalate_risk: float = 0.25
+    cascade_escalate_spoof: float = 0.5
+    cascade_escalate_tags: str = ""  # comma-separated intent tags; "" = any intent tag
+    cascade_retain_s: float = 10.0  # recent audio re-decoded by the full ASR model on escalation
+    # Out-of-process models (backend/inference_server.py): when set, this process keeps only
+    # per-session state and sends audio to the server through a shared-memory arena
+    inference_socket: str = ""  # unix socket path, e.g. "/tmp/vss-inference.sock"; "" = in-process models
+    inference_shm_mb: int = 64  # per-worker arena for audio in flight
+    inference_timeout_s: float = 30.0
+    inference_connect_timeout_s: float = 120.0  # how long warm-up waits for the server
+    # Inference worker pools (per stage); see utils/executor.py
+    executor_asr_workers: int = 2
+    executor_diarization_workers: int = 1
+    executor_spoof_workers: int = 1
+    executor_lid_workers: int = 1  # language-ID detections (still share ASR_DECODE_SLOTS with decodes)
+    executor_watchlist_workers: int = 1
+    executor_max_queue: int = 64  # max pending calls per stage
+    executor_process_stages: list[str] = []  # only for stages whose callables and arguments are picklable
     aasist_checkpoint_path: str | None = None  # e.g., "backend/models/aasist_scripted.pt"
+    aasist_backend: str = "torchscript"  # "torchscript" (.pt, float or int8) or "onnx" (.onnx via onnxruntime)
+    aasist_threads: int = 0  # intra-op threads for AASIST; 0 = runtime default
+    spoof_hop_s: float = 1.0  # new voiced audio required before re-running AASIST
+    spoof_min_speech_s: float = 2.0  # voiced audio required for the first AASIST score
+    spoof_batch_max_size: int = 8  # windows per batched AASIST forward pass
+    spoof_batch_max_wait_ms: float = 5.0  # how long to wait for more sessions to join a batch
 
     model_config = SettingsConfigDict(env_file="../.env", env_file_encoding="utf-8")
 
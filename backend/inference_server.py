@@ -0,0 +1,254 @@
+"""
+Local inference server: one copy of each model for all I/O workers on a node.
+
+The FastAPI workers (`uvicorn app:app --workers N` with INFERENCE_SOCKET set)
+keep only per-session state. Every model call is forwarded here over a unix
+socket: audio windows are written into the calling worker's shared-memory
+arena and read in place by this process, so only small JSON messages cross
+the socket. AASIST windows from all workers go through one
+`BatchingSpoofScorer`, so batches fill up across processes; ASR and
+diarization run on the same per-stage worker pools as in-process serving
+(ASR batches formed by a worker's `BatchingAsrDecoder` arrive as one request).
+
+Models load before the socket is opened; workers wait for it (up to
+INFERENCE_CONNECT_TIMEOUT_S) during their own warm-up.
+
+Usage (from backend/):
+  python inference_server.py --socket /tmp/vss-inference.sock
+  INFERENCE_SOCKET=/tmp/vss-inference.sock uvicorn app:app --workers 4
+  MODEL_BACKEND=stub python inference_server.py   # benchmarks
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import logging
+import os
+
+import numpy as np
+
+from config import settings
+from pipeline.antispoof import AASISTScorer, BatchingSpoofScorer
+from pipeline.asr_batch import transcribe_batch
+from pipeline.asr_stream import WhisperModelPool
+from pipeline.diarization import OnlineDiarizer
+from pipeline.lid import language_probs
+from pipeline.stubs import StubSpoofScorer, StubWhisperModel
+from utils.executor import build_executor
+from utils.ipc import attach_segment, read_msg, segment_view, write_msg
+
+DEFAULT_SOCKET = "/tmp/vss-inference.sock"
+logger = logging.getLogger("vss.inference")
+
+
+class InferenceServer:
+    """Owns the shared models and answers requests from `pipeline.remote.InferenceClient`."""
+
+    def __init__(self, stub: bool) -> None:
+        self.diarizer = OnlineDiarizer(
+            hf_token=None if stub else settings.pyannote_token, window_seconds=5.0, load=False
+        )
+        if stub:
+            self.spoof = StubSpoofScorer(latency_ms=settings.stub_spoof_ms)
+        else:
+            self.spoof = AASISTScorer(
+                checkpoint_path=settings.aasist_checkpoint_path,
+                device="cpu",
+                load=False,
+                backend=settings.aasist_backend,
+                threads=settings.aasist_threads,
+            )
+        self.asr_pool = WhisperModelPool(
+            max_concurrent=settings.asr_decode_slots,
+            model_factory=(lambda *a, **kw: StubWhisperModel(*a, rtf=settings.stub_asr_rtf, **kw)) if stub else None,
+        )
+        self.executor = build_executor(
+            asr=settings.executor_asr_workers,
+            diarization=settings.executor_diarization_workers,
+            spoof=settings.executor_spoof_workers,
+            intent=1,
+            max_queue=settings.executor_max_queue,
+        )
+        self.batcher = BatchingSpoofScorer(
+            self.spoof,
+            max_batch_size=settings.spoof_batch_max_size,
+            max_wait_ms=settings.spoof_batch_max_wait_ms,
+            run_batch=lambda windows: self.executor.run("spoof", self.spoof.score_batch, windows),
+        )
+        self.models: Dict[str, bool] = {}
+        # Worker arenas mapped by name, with the number of open connections using each
+        self._segments: Dict[str, Any] = {}
+        self._segment_refs: Dict[str, int] = {}
+
+    def load(self) -> None:
+        self.models["diarization"] = self.diarizer.load()
+        if getattr(self.spoof, "load", None) is not None:
+            self.spoof.load()
+        if self.spoof.available and getattr(self.spoof, "warmup", None) is not None:
+            self.spoof.warmup()
+        self.models["spoof"] = bool(self.spoof.available)
+        model, _ = self.asr_pool.get(settings.asr_model_size, "cpu", settings.asr_compute_type)
+        self.models["asr"] = model is not None
+        logger.info("models: %s", self.models)
+
+    def _segment(self, name: str, conn_segments: set) -> Any:
+        shm = self._segments.get(name)
+        if shm is None:
+            shm = self._segments[name] = attach_segment(name)
+        if name not in conn_segments:
+            conn_segments.add(name)
+            self._segment_refs[name] = self._segment_refs.get(name, 0) + 1
+        return shm
+
+    def _release_segments(self, conn_segments: set) -> None:
+        for name in conn_segments:
+            self._segment_refs[name] -= 1
+            if self._segment_refs[name] <= 0:
+                del self._segment_refs[name]
+                shm = self._segments.pop(name, None)
+                try:
+                    shm.close()
+                except Exception:  # a view may still be referenced; the mapping goes with the process
+                    pass
+
+    @staticmethod
+    def _pack(segments: Any, info: Any) -> dict:
+        out = [
+            {
+                "text": seg.text,
+                "words": None if seg.words is None else [[float(w.start), float(w.end), w.word] for w in seg.words],
+            }
+            for seg in segments
+        ]
+        return {
+            "segments": out,
+            "language": getattr(info, "language", None),
+            "language_probability": float(getattr(info, "language_probability", 0.0) or 0.0),
+        }
+
+    def _asr_model(self, model_size: str, compute_type: str) -> Any:
+        model, _ = self.asr_pool.get(model_size, "cpu", compute_type)
+        if model is None:
+            raise RuntimeError("ASR model unavailable")
+        return model
+
+    def _transcribe(self, audio: np.ndarray, model_size: str, compute_type: str, options: Dict[str, Any]) -> dict:
+        model = self._asr_model(model_size, compute_type)
+        with self.asr_pool.slot():
+            segments, info = model.transcribe(audio, **options)
+            return self._pack(segments, info)
+
+    def _transcribe_batch(
+        self, audios: List[np.ndarray], model_size: str, compute_type: str, options: List[Dict[str, Any]]
+    ) -> List[dict]:
+        model = self._asr_model(model_size, compute_type)
+        with self.asr_pool.slot():
+            return [self._pack(segments, info) for segments, info in transcribe_batch(model, audios, options)]
+
+    def _language_probs(self, audio: np.ndarray, model_size: str, compute_type: str) -> List[list]:
+        model = self._asr_model(model_size, compute_type)
+        with self.asr_pool.slot():
+            return [[lang, p] for lang, p in language_probs(model, audio)]
+
+    def _select_caller(self, audio: np.ndarray, sample_rate: int):
+        out, speaker = self.diarizer.select_caller(np.array(audio, dtype=np.float32), sample_rate)
+        audio[:] = out  # written back into the worker's arena
+        return speaker
+
+    def _enroll(self, audio: np.ndarray, sample_rate: int):
+        if not self.diarizer.enroll_user(np.array(audio, dtype=np.float32), sample_rate):
+            return None
+        return self.diarizer.user_embedding.tolist()
+
+    async def dispatch(self, msg: Dict[str, Any], conn_segments: set) -> Any:
+        op = msg.get("op")
+        views: List[np.ndarray] = []
+        if msg.get("audio"):
+            shm = self._segment(msg["shm"], conn_segments)
+            views = [segment_view(shm, off, n) for off, n in msg["audio"]]
+        sr = int(msg.get("sample_rate", 16000))
+        run = self.executor.run
+        if op == "status":
+            ue = self.diarizer.user_embedding
+            return {
+                "models": self.models,
+                "spoof_target_samples": int(self.spoof.target_samples),
+                "diar_embedder": self.diarizer.has_embedder,
+                "user_embedding": None if ue is None else ue.tolist(),
+                "spoof_batching": self.batcher.stats.snapshot(),
+            }
+        if op == "spoof":
+            return list(await asyncio.gather(*(self.batcher.score(v) for v in views)))
+        if op == "asr":
+            return await run(
+                "asr", self._transcribe, views[0], msg["model_size"], msg["compute_type"], msg.get("options") or {}
+            )
+        if op == "asr_batch":
+            return await run(
+                "asr", self._transcribe_batch, views, msg["model_size"], msg["compute_type"], msg["options"]
+            )
+        if op == "asr_lid":
+            return await run("asr", self._language_probs, views[0], msg["model_size"], msg["compute_type"])
+        if op == "diar_segments":
+            return await run("diarization", self.diarizer.segments, views[0], sr)
+        if op == "diar_embed":
+            return (await run("diarization", self.diarizer.embed, views[0])).tolist()
+        if op == "diar_select_caller":
+            return await run("diarization", self._select_caller, views[0], sr)
+        if op == "diar_enroll":
+            return await run("diarization", self._enroll, views[0], sr)
+        if op == "diar_user":
+            ue = self.diarizer.user_embedding
+            return None if ue is None else ue.tolist()
+        raise ValueError(f"unknown op: {op}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn_segments: set = set()
+        try:
+            while True:
+                try:
+                    msg = await read_msg(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                try:
+                    resp = {"result": await self.dispatch(msg, conn_segments)}
+                except Exception as e:
+                    logger.warning("request %s failed: %r", msg.get("op"), e)
+                    resp = {"error": repr(e)}
+                await write_msg(writer, resp)
+        finally:
+            self._release_segments(conn_segments)
+            writer.close()
+
+    async def serve(self, socket_path: str) -> None:
+        await asyncio.to_thread(self.load)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        os.chmod(socket_path, 0o600)
+        logger.info("inference server listening on %s", socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self.executor.shutdown(wait=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.inference_socket or DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--stub", action="store_true", help="Use stub models (same as MODEL_BACKEND=stub)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = InferenceServer(stub=args.stub or settings.model_backend == "stub")
+    try:
+        asyncio.run(server.serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,107 @@
 from __future__ import annotations
 
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, List, Optional
+import asyncio
 import os
 from pathlib import Path
 import logging
+import time
 import numpy as np
 
-try:
-    import torch
-    import torchaudio
-except Exception:  # optional runtime deps
-    torch = None  # type: ignore
-    torchaudio = None  # type: ignore
+# torch / onnxruntime are imported on the first AASISTScorer.load(), so importing this module stays cheap
+torch = None  # type: ignore
+ort = None  # type: ignore
+
+# AASIST_BACKEND values: TorchScript (float or int8-quantized .pt) or ONNX Runtime (.onnx)
+BACKENDS = ("torchscript", "onnx")
+
+
+def _import_torch():
+    global torch
+    if torch is None:
+        try:
+            import torch as _torch  # optional runtime dep
+        except Exception:
+            return None
+        torch = _torch
+    return torch
+
+
+def _import_ort():
+    global ort
+    if ort is None:
+        try:
+            import onnxruntime as _ort  # optional runtime dep
+        except Exception:
+            return None
+        ort = _ort
+    return ort
+
+
+def logits_to_probs(logits) -> np.ndarray:
+    """Spoof probability per row from AASIST output (torch or numpy, optionally a tuple)."""
+    # Scripted/exported AASIST returns (embedding, logits); pick the 2-class head when present
+    if isinstance(logits, (tuple, list)):
+        heads = [o for o in logits if getattr(o, "ndim", 0) == 2 and o.shape[-1] == 2]
+        logits = heads[-1] if heads else logits[0]
+    if hasattr(logits, "detach"):
+        logits = logits.detach().cpu().numpy()
+    x = np.asarray(logits, dtype=np.float32)
+    if x.ndim == 2 and x.shape[1] == 2:
+        # Assume 2-class logits [bonafide, spoof]: softmax(x)[:, 1] == sigmoid(x1 - x0)
+        probs = 1.0 / (1.0 + np.exp(x[:, 0] - x[:, 1]))
+    elif x.ndim == 2:
+        probs = (1.0 / (1.0 + np.exp(-x))).mean(axis=1)
+    else:
+        probs = 1.0 / (1.0 + np.exp(-x.reshape(-1)))
+    probs = np.nan_to_num(probs.astype(np.float32), nan=0.0)
+    return np.clip(probs, 0.0, 1.0)
 
 
 class AASISTScorer:
     """Load and run AASIST anti-spoofing model if available.
 
     Expects 16 kHz mono float32 in [-1, 1]. Returns probability of synthetic voice [0, 1].
+    `backend` selects how the checkpoint is run: "torchscript" (`torch.jit.load`,
+    float or int8-quantized exports) or "onnx" (ONNX Runtime on CPU). `threads`
+    > 0 caps intra-op threads (for TorchScript this is process-wide).
     """
 
-    def __init__(self, checkpoint_path: Optional[str] = None, device: str = "cpu", target_samples: int = 64600) -> None:
+    def __init__(
+        self,
+        checkpoint_path: Optional[str] = None,
+        device: str = "cpu",
+        target_samples: int = 64600,
+        load: bool = True,
+        backend: str = "torchscript",
+        threads: int = 0,
+    ) -> None:
         self.available = False
         self.device = device
         self.model = None
         self._checkpoint = checkpoint_path
+        self.backend = backend if backend in BACKENDS else "torchscript"
+        self.threads = int(threads)
+        self._input_name: Optional[str] = None
         self.target_samples = int(target_samples)
+        self.load_seconds: Optional[float] = None
         self._logger = logging.getLogger("vss")
-        if torch is None:
-            self._logger.info("AASIST unavailable: torch not installed")
-            return
+        if load:
+            self.load()
+
+    def load(self) -> bool:
+        """Import the backend runtime and load the checkpoint; returns availability."""
+        if self.available:
+            return True
+        runtime = _import_ort() if self.backend == "onnx" else _import_torch()
+        if runtime is None:
+            self._logger.info("AASIST unavailable: %s not installed", "onnxruntime" if self.backend == "onnx" else "torch")
+            return False
         try:
-            if checkpoint_path:
-                ckpt = checkpoint_path
+            if self._checkpoint:
+                ckpt = self._checkpoint
                 if not os.path.isabs(ckpt):
                     base = Path(__file__).resolve().parents[2]  # .../hacknation
                     abs_path = base / ckpt
@@ -40,9 +109,21 @@ class AASISTScorer:
                     abs_path = Path(ckpt)
                 if not abs_path.exists():
                     self._logger.warning("AASIST checkpoint missing at %s; spoofing disabled", abs_path)
-                    return
-                self.model = torch.jit.load(str(abs_path), map_location=self.device)
-                self.model.eval()
+                    return False
+                t0 = time.perf_counter()
+                if self.backend == "onnx":
+                    opts = ort.SessionOptions()
+                    if self.threads > 0:
+                        opts.intra_op_num_threads = self.threads
+                    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    self.model = ort.InferenceSession(str(abs_path), opts, providers=["CPUExecutionProvider"])
+                    self._input_name = self.model.get_inputs()[0].name
+                else:
+                    if self.threads > 0:
+                        torch.set_num_threads(self.threads)
+                    self.model = torch.jit.load(str(abs_path), map_location=self.device)
+                    self.model.eval()
+                self.load_seconds = time.perf_counter() - t0
                 self.available = True
             else:
                 self._logger.info("AASIST checkpoint not set; spoofing disabled")
@@ -50,42 +131,233 @@ class AASISTScorer:
             self.model = None
             self.available = False
             self._logger.error("AASIST load failed: %s", e)
+        return self.available
+
+    def warmup(self) -> None:
+        """One dummy forward pass so the first real window does not pay for graph optimisation."""
+        if self.available:
+            self.score_batch([np.zeros(self.target_samples, dtype=np.float32)])
+
+    def _prepare(self, samples: np.ndarray) -> np.ndarray:
+        x = np.asarray(samples, dtype=np.float32)
+        # Ensure length exactly target_samples: pad or take last segment
+        ts = self.target_samples
+        if x.shape[0] < ts:
+            pad = np.zeros(ts - x.shape[0], dtype=np.float32)
+            x = np.concatenate([x, pad], axis=0)
+        elif x.shape[0] > ts:
+            x = x[-ts:]
+        return x
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Spoof probabilities for a (batch, target_samples) float32 array."""
+        if self.backend == "onnx":
+            return logits_to_probs(self.model.run(None, {self._input_name: x}))
+        t = torch.from_numpy(x).to(self.device)
+        with torch.no_grad():
+            return logits_to_probs(self.model(t))
+
+    def score_batch(self, batch: List[np.ndarray]) -> List[float]:
+        """Score several windows with one forward pass; empty windows score 0.0."""
+        results = [0.0] * len(batch)
+        if self.model is None:
+            return results
+        idx = [i for i, x in enumerate(batch) if x is not None and getattr(x, "size", 0) > 0]
+        if not idx:
+            return results
+        try:
+            probs = self.forward(np.stack([self._prepare(batch[i]) for i in idx], axis=0))
+            if probs.shape[0] != len(idx):
+                # Model collapsed the batch dimension; fall back to per-item scoring
+                return [self.score(x) for x in batch]
+            for j, i in enumerate(idx):
+                results[i] = float(probs[j])
+        except Exception as e:
+            self._logger.warning("AASIST batch score error: %s", e)
+        return results
 
-    @torch.no_grad() if torch is not None else (lambda f: f)  # type: ignore
     def score(self, samples: np.ndarray, sample_rate: int = 16000) -> float:
         # Guard rails: return safe 0.0 when unavailable
         if samples is None or getattr(samples, "size", 0) == 0:
             return 0.0
-        if self.model is None or torch is None:
+        if self.model is None:
             return 0.0
         try:
-            x = np.asarray(samples, dtype=np.float32)
-            # Ensure length exactly target_samples: pad or take last segment
-            ts = self.target_samples
-            if x.shape[0] < ts:
-                pad = np.zeros(ts - x.shape[0], dtype=np.float32)
-                x = np.concatenate([x, pad], axis=0)
-            elif x.shape[0] > ts:
-                x = x[-ts:]
-
-            t = torch.from_numpy(x).to(self.device)
-            if t.ndim == 1:
-                t = t.unsqueeze(0)
-            logits = self.model(t)
-            # Some scripted models return (logits, extras)
-            if isinstance(logits, (tuple, list)):
-                logits = logits[0]
-            # Assume 2-class logits [bonafide, spoof]
-            if hasattr(torch, "softmax") and hasattr(logits, "ndim") and logits.ndim == 2 and logits.shape[1] == 2:
-                probs = torch.softmax(logits, dim=1)
-                prob = float(probs[0, 1].item())
-            else:
-                prob = float(torch.sigmoid(logits.squeeze()).mean().item())
-            if not (prob == prob):  # NaN
-                return 0.0
+            prob = float(self.forward(self._prepare(samples)[None, :])[0])
             return float(max(0.0, min(1.0, prob)))
         except Exception as e:
             self._logger.warning("AASIST score error: %s", e)
             return 0.0
 
 
+@dataclass
+class BatchStats:
+    """Rolling throughput/latency counters for `BatchingSpoofScorer`."""
+
+    batches: int = 0
+    items: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    batch_sizes: Deque[int] = field(default_factory=lambda: deque(maxlen=1000))
+    forward_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def snapshot(self) -> dict:
+        lat = np.asarray(self.latencies_ms, dtype=np.float64)
+        fwd = np.asarray(self.forward_ms, dtype=np.float64)
+        elapsed = max(1e-6, time.monotonic() - self.started_at)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "items_per_s": self.items / elapsed,
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "latency_ms_p50": float(np.percentile(lat, 50)) if lat.size else 0.0,
+            "latency_ms_p95": float(np.percentile(lat, 95)) if lat.size else 0.0,
+            "forward_ms_mean": float(fwd.mean()) if fwd.size else 0.0,
+        }
+
+
+class BatchingSpoofScorer:
+    """Asyncio front-end that batches AASIST windows across sessions.
+
+    `score()` enqueues a window and awaits its result. A single collector task
+    waits for the first pending window, then gathers more for up to
+    `max_wait_ms` (or until `max_batch_size`), runs one batched forward pass
+    via `run_batch` (e.g. on the spoof worker pool) and resolves every
+    caller's future.
+    """
+
+    def __init__(
+        self,
+        scorer: AASISTScorer,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        run_batch: Optional[Callable[[List[np.ndarray]], Awaitable[List[float]]]] = None,
+    ) -> None:
+        self.scorer = scorer
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._run_batch = run_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = BatchStats()
+        self._logger = logging.getLogger("vss")
+
+    @property
+    def available(self) -> bool:
+        return self.scorer.available
+
+    async def score(self, samples: np.ndarray) -> float:
+        if samples is None or getattr(samples, "size", 0) == 0 or not self.scorer.available:
+            return 0.0
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._collect())
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        assert self._queue is not None
+        await self._queue.put((samples, fut, time.perf_counter()))
+        return await fut
+
+    async def _collect(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Callers that were cancelled while queued are simply dropped
+            batch = [b for b in batch if not b[1].done()]
+            if not batch:
+                continue
+            windows = [b[0] for b in batch]
+            t0 = time.perf_counter()
+            try:
+                if self._run_batch is not None:
+                    scores = await self._run_batch(windows)
+                else:
+                    scores = await loop.run_in_executor(None, self.scorer.score_batch, windows)
+            except Exception as e:
+                self._logger.warning("AASIST batch failed: %s", e)
+                scores = [0.0] * len(batch)
+            done = time.perf_counter()
+            self.stats.batches += 1
+            self.stats.items += len(batch)
+            self.stats.batch_sizes.append(len(batch))
+            self.stats.forward_ms.append((done - t0) * 1000.0)
+            for (_, fut, enq), sc in zip(batch, scores):
+                self.stats.latencies_ms.append((done - enq) * 1000.0)
+                if not fut.done():
+                    fut.set_result(float(sc))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+class SpoofScheduler:
+    """Per-session speech accumulator that decides when AASIST must run.
+
+    Only voiced frames (per `vad.frame_mask`) are appended to a window of
+    `window_samples`, so the model sees real speech instead of zero padding.
+    A new score is due once `hop_seconds` of new speech arrived (and at least
+    `min_speech_seconds` are buffered); otherwise the cached score is reused,
+    making spoof cost proportional to speech rather than wall-clock time.
+    """
+
+    def __init__(
+        self,
+        vad,
+        window_samples: int = 64600,
+        hop_seconds: float = 1.0,
+        min_speech_seconds: float = 2.0,
+        sample_rate: int = 16000,
+    ) -> None:
+        self.vad = vad
+        self.window_samples = int(window_samples)
+        self.hop_samples = int(hop_seconds * sample_rate)
+        self.min_speech_samples = min(self.window_samples, int(min_speech_seconds * sample_rate))
+        self._speech = np.zeros(self.window_samples, dtype=np.float32)
+        self._filled = 0
+        self._new = 0
+        self.score: Optional[float] = None  # cached result of the last AASIST run
+        self.runs = 0
+
+    def push(self, samples: np.ndarray) -> int:
+        """Append the voiced frames of `samples`; returns how many samples were kept."""
+        if samples is None or samples.size == 0:
+            return 0
+        mask = self.vad.frame_mask(samples)
+        voiced = samples[np.repeat(mask, self.vad.frame_len)[: samples.shape[0]]]
+        k = min(voiced.shape[0], self.window_samples)
+        if k == 0:
+            return 0
+        # Shift in place so the window stays one contiguous array
+        self._speech[:-k] = self._speech[k:]
+        self._speech[-k:] = voiced[-k:]
+        self._filled = min(self.window_samples, self._filled + k)
+        self._new += voiced.shape[0]
+        return int(voiced.shape[0])
+
+    def due(self) -> bool:
+        return self._filled >= self.min_speech_samples and self._new >= self.hop_samples
+
+    def window(self) -> np.ndarray:
+        """Copy of the buffered speech (at most `window_samples`)."""
+        return self._speech[-self._filled :].copy()
+
+    def update(self, score: float) -> None:
+        self.score = float(score)
+        self._new = 0
+        self.runs += 1
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from pipeline.antispoof import BatchStats
+from pipeline.asr_stream import DecodeRequest, WhisperModelPool
+
+# Whisper decodes at most 30 s of audio per pass; longer requests go through transcribe()
+MAX_BATCH_SECONDS = 30.0
+# faster-whisper's defaults for dropping hallucinated text on silence
+NO_SPEECH_THRESHOLD = 0.6
+LOG_PROB_THRESHOLD = -1.0
+
+_logger = logging.getLogger("vss")
+
+
+# (segments, info) as returned by WhisperModel.transcribe, with segments materialised
+Transcription = Tuple[List[Any], Any]
+
+
+def _result(segments: List[Any], language: Optional[str], probability: float = 1.0) -> Transcription:
+    return segments, SimpleNamespace(language=language, language_probability=probability)
+
+
+def _word_timings(model: Any, tokenizer: Any, text_tokens: List[int], alignment: Any) -> List[Any]:
+    """Word start/end times from a CTranslate2 alignment, as in faster-whisper's `find_alignment`."""
+    words, word_tokens = tokenizer.split_to_word_tokens(text_tokens + [tokenizer.eot])
+    if len(word_tokens) <= 1 or not alignment.alignments:
+        return []
+    fe = model.feature_extractor
+    tokens_per_second = fe.sampling_rate / fe.hop_length / 2  # encoder stride of 2 frames
+    text_idx, time_idx = np.asarray(alignment.alignments, dtype=np.int64).T
+    jumps = np.pad(np.diff(text_idx), (1, 0), constant_values=1).astype(bool)
+    jump_times = time_idx[jumps] / tokens_per_second
+    boundaries = np.pad(np.cumsum([len(t) for t in word_tokens[:-1]]), (1, 0))
+    starts = jump_times[boundaries[:-1]]
+    ends = jump_times[boundaries[1:]]
+    return [
+        SimpleNamespace(start=float(s), end=float(e), word=w) for w, s, e in zip(words[:-1], starts, ends) if w.strip()
+    ]
+
+
+def _ct2_transcribe_batch(
+    model: Any, audios: Sequence[np.ndarray], options: Sequence[Dict[str, Any]]
+) -> List[Transcription]:
+    """One batched encode + greedy decode of several ≤30 s windows on a faster-whisper model.
+
+    Each item keeps its own language (detected from the shared encoder pass
+    when None) and its own `initial_prompt`; word timings come from one
+    batched cross-attention alignment per language. Decoding is greedy,
+    without timestamps and without temperature fallback, which is what the
+    streaming decoder asks for anyway.
+    """
+    import ctranslate2  # type: ignore
+    from faster_whisper.audio import pad_or_trim  # type: ignore
+    from faster_whisper.tokenizer import Tokenizer  # type: ignore
+
+    fe = model.feature_extractor
+    ct2 = model.model
+    features = np.stack([pad_or_trim(fe(a)[..., : fe.nb_max_frames]) for a in audios])
+    num_frames = [min(fe.nb_max_frames, a.shape[0] // fe.hop_length) for a in audios]
+    encoder_output = model.encode(features)
+
+    languages: List[str] = [o.get("language") or "" for o in options]
+    probabilities = [1.0] * len(audios)
+    if not all(languages):
+        if ct2.is_multilingual:
+            detected = ct2.detect_language(encoder_output)
+            for i, ranked in enumerate(detected):
+                if not languages[i]:
+                    token, probabilities[i] = ranked[0]
+                    languages[i] = token[2:-2]  # "<|en|>" -> "en"
+        else:
+            languages = [lang or "en" for lang in languages]
+
+    max_length = int(getattr(model, "max_length", 448))
+    tokenizers: Dict[str, Any] = {}
+    prompts: List[List[int]] = []
+    for lang, opts in zip(languages, options):
+        tok = tokenizers.get(lang)
+        if tok is None:
+            tok = Tokenizer(model.hf_tokenizer, ct2.is_multilingual, task="transcribe", language=lang)
+            tokenizers[lang] = tok
+        prompt: List[int] = []
+        if opts.get("initial_prompt"):
+            context = tok.encode(" " + opts["initial_prompt"].strip())
+            prompt = [tok.sot_prev] + context[-(max_length // 2 - 1) :]
+        prompts.append(prompt + list(tok.sot_sequence) + [tok.no_timestamps])
+
+    results = ct2.generate(
+        encoder_output,
+        prompts,
+        beam_size=1,
+        max_length=max_length,
+        return_scores=True,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+    )
+    text_tokens: List[List[int]] = []
+    for lang, res in zip(languages, results):
+        eot = tokenizers[lang].eot
+        tokens = [t for t in res.sequences_ids[0] if t < eot]
+        if res.no_speech_prob > NO_SPEECH_THRESHOLD and res.scores[0] < LOG_PROB_THRESHOLD:
+            tokens = []
+        text_tokens.append(tokens)
+
+    words: List[Optional[List[Any]]] = [None] * len(audios)
+    want_words = [bool(o.get("word_timestamps")) and bool(t) for o, t in zip(options, text_tokens)]
+    if any(want_words):
+        dense = None
+        for lang, tok in tokenizers.items():
+            idx = [i for i, code in enumerate(languages) if code == lang and want_words[i]]
+            if not idx:
+                continue
+            if len(idx) == len(audios):
+                enc = encoder_output
+            else:
+                # Alignment takes one start sequence per call: align each language on its rows
+                if dense is None:
+                    dense = np.asarray(encoder_output)
+                enc = ctranslate2.StorageView.from_array(np.ascontiguousarray(dense[idx]))
+            aligned = ct2.align(enc, tok.sot_sequence, [text_tokens[i] for i in idx], [num_frames[i] for i in idx])
+            for i, alignment in zip(idx, aligned):
+                words[i] = _word_timings(model, tok, text_tokens[i], alignment)
+
+    out = []
+    for i, lang in enumerate(languages):
+        text = tokenizers[lang].decode(text_tokens[i]) if text_tokens[i] else ""
+        segments = [SimpleNamespace(text=text, words=words[i])] if text.strip() else []
+        out.append(_result(segments, lang, float(probabilities[i])))
+    return out
+
+
+def transcribe_batch(
+    model: Any, audios: Sequence[np.ndarray], options: Sequence[Dict[str, Any]]
+) -> List[Transcription]:
+    """Transcribe several independent windows with one model; returns (segments, info) per window.
+
+    Uses the model's own `transcribe_batch` when it has one (stub, inference
+    server proxy), a batched CTranslate2 pass for faster-whisper models, and
+    per-item `transcribe` for anything else or when the batched pass fails.
+    """
+    if not audios:
+        return []
+    native = getattr(model, "transcribe_batch", None)
+    if native is not None:
+        return native(audios, options)
+    batchable = [i for i, a in enumerate(audios) if a.shape[0] <= MAX_BATCH_SECONDS * 16000]
+    out: List[Optional[Transcription]] = [None] * len(audios)
+    if len(batchable) > 1 and getattr(model, "model", None) is not None:
+        try:
+            results = _ct2_transcribe_batch(model, [audios[i] for i in batchable], [options[i] for i in batchable])
+            for i, res in zip(batchable, results):
+                out[i] = res
+        except Exception as e:
+            _logger.warning("batched Whisper decode failed, decoding one by one: %r", e)
+    for i, res in enumerate(out):
+        if res is None:
+            segments, info = model.transcribe(audios[i], **options[i])
+            out[i] = (list(segments), info)
+    return out  # type: ignore[return-value]
+
+
+class BatchingAsrDecoder:
+    """Asyncio front-end that batches streaming Whisper decodes across sessions.
+
+    Sessions call `process_stream(streamer)` instead of running
+    `WhisperStreamer.process_stream` on the ASR pool. Due decodes are queued;
+    a single collector task waits for the first one, gathers more for up to
+    `max_wait_ms` (or until `max_batch_size`), runs each model's share as one
+    `transcribe_batch` call via `run(fn, *args)` (e.g. on the ASR worker pool,
+    holding one pool decode slot) and hands every result back to its
+    session's `apply_stream`. Up to the pool's
+    `max_concurrent` batches run at once; while all of them are busy, due
+    decodes keep queueing and go into the next, larger batch.
+    """
+
+    def __init__(
+        self,
+        pool: WhisperModelPool,
+        max_batch_size: int = 4,
+        max_wait_ms: float = 30.0,
+        run: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> None:
+        self.pool = pool
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._run_fn = run
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: set = set()
+        self.stats = BatchStats()
+        self.audio_seconds = 0.0  # decoded audio, for real-time-factor estimates
+
+    def _decode(self, model: Any, requests: List[DecodeRequest]) -> List[Transcription]:
+        with self.pool.slot():
+            return transcribe_batch(model, [r.audio for r in requests], [r.options for r in requests])
+
+    async def process_stream(self, streamer: Any) -> Tuple[str, Optional[str]]:
+        """Batched equivalent of `streamer.process_stream()`."""
+        if streamer.model is None:
+            # The session's first decode may still load the model: keep that off the event loop
+            return await self._run(streamer.process_stream)
+        req = streamer.prepare_stream()
+        if req is None:
+            return "", streamer.last_language
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.pool.max_concurrent)
+            self._task = asyncio.create_task(self._collect())
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        assert self._queue is not None
+        await self._queue.put((streamer.model, req, fut, time.perf_counter()))
+        try:
+            segments, info = await fut
+        except Exception:
+            return "", streamer.last_language
+        return streamer.apply_stream(req, segments, info)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._run_fn is not None:
+            return await self._run_fn(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _run_group(self, model: Any, group: List[tuple]) -> None:
+        requests = [g[1] for g in group]
+        t0 = time.perf_counter()
+        try:
+            results = await self._run(self._decode, model, requests)
+        except Exception as e:
+            _logger.warning("Whisper batch failed: %s", e)
+            for g in group:
+                if not g[2].done():
+                    g[2].set_exception(e)
+            return
+        done = time.perf_counter()
+        self.stats.batches += 1
+        self.stats.items += len(group)
+        self.stats.batch_sizes.append(len(group))
+        self.stats.forward_ms.append((done - t0) * 1000.0)
+        self.audio_seconds += sum(r.audio.shape[0] for r in requests) / 16000.0
+        for (_, _, fut, enq), res in zip(group, results):
+            self.stats.latencies_ms.append((done - enq) * 1000.0)
+            if not fut.done():
+                fut.set_result(res)
+
+    async def _run_slot(self, model: Any, group: List[tuple]) -> None:
+        assert self._slots is not None
+        try:
+            await self._run_group(model, group)
+        finally:
+            self._slots.release()
+
+    async def _collect(self) -> None:
+        assert self._queue is not None and self._slots is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Callers that were cancelled while queued are simply dropped
+            batch = [b for b in batch if not b[2].done()]
+            # Sessions on different model sizes (cascade tiers) cannot share a pass
+            groups: Dict[int, List[tuple]] = {}
+            for b in batch:
+                groups.setdefault(id(b[0]), []).append(b)
+            if not groups:
+                self._slots.release()
+            for n, group in enumerate(groups.values()):
+                if n:
+                    await self._slots.acquire()
+                task = asyncio.create_task(self._run_slot(group[0][0], group))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    def snapshot(self) -> dict:
+        return {**self.stats.snapshot(), "audio_seconds": self.audio_seconds}
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
@@ -1,33 +1,245 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
 import numpy as np
 
+from pipeline.lid import detect_language
+
+
+class WhisperModelPool:
+    """Process-wide registry of faster-whisper models shared by all sessions.
+
+    Models are keyed by (model_size, device, compute_type) and loaded at most
+    once; failed loads are remembered so sessions do not retry every tick.
+    Decoding is bounded by `max_concurrent` slots so CPU and memory stay flat
+    as the number of sessions grows.
+    """
+
+    def __init__(self, max_concurrent: int = 2, model_factory: Optional[Any] = None, cpu_threads: int = 0) -> None:
+        # e.g. pipeline.stubs.StubWhisperModel for benchmarks; faster-whisper is imported on first load
+        self._WhisperModel = model_factory
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.cpu_threads = int(cpu_threads)  # 0 = CTranslate2 default (all cores)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._models: Dict[Tuple[str, str, str], Tuple[Any, Optional[str]]] = {}
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger("vss")
+        self.load_seconds: Dict[str, float] = {}  # "size/device/compute_type" -> load wall time
+
+    def get(self, model_size: str, device: str = "cpu", compute_type: str = "int8") -> Tuple[Any, Optional[str]]:
+        """Return (model, fallback_compute_type), loading the model on first use.
+
+        The model is None when faster-whisper is missing or every compute type failed.
+        """
+        key = (model_size, device, compute_type)
+        cached = self._models.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Per-key lock: concurrent sessions wait for a single load instead of loading twice
+        with key_lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                return cached
+            entry = self._load(model_size, device, compute_type)
+            self._models[key] = entry
+            return entry
+
+    def _load(self, model_size: str, device: str, compute_type: str) -> Tuple[Any, Optional[str]]:
+        if self._WhisperModel is None:
+            try:
+                from faster_whisper import WhisperModel  # type: ignore
+            except Exception:
+                self._logger.info("faster-whisper not installed; ASR disabled")
+                return None, None
+            self._WhisperModel = WhisperModel
+        t0 = time.perf_counter()
+        # Try preferred compute type first, then fall back
+        try_types = [compute_type, "int8_float16", "float16", "int8", "float32"]
+        for ct in try_types:
+            try:
+                # num_workers lets CTranslate2 run decodes from several threads in parallel
+                model = self._WhisperModel(
+                    model_size,
+                    device=device,
+                    compute_type=ct,
+                    num_workers=self.max_concurrent,
+                    cpu_threads=self.cpu_threads,
+                )
+            except Exception:  # keep trying
+                continue
+            elapsed = time.perf_counter() - t0
+            self.load_seconds[f"{model_size}/{device}/{compute_type}"] = elapsed
+            self._logger.info("Whisper %s loaded (%s, %s) in %.1fs", model_size, device, ct, elapsed)
+            return model, (ct if ct != compute_type else None)
+        self._logger.warning("Whisper %s could not be loaded on %s; ASR disabled", model_size, device)
+        return None, None
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the bounded decode slots for the duration of a transcribe call."""
+        self._slots.acquire()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def loaded(self) -> Dict[str, bool]:
+        return {"/".join(k): v[0] is not None for k, v in self._models.items()}
+
+
+_DEFAULT_POOL: Optional[WhisperModelPool] = None
+
+
+def default_pool() -> WhisperModelPool:
+    global _DEFAULT_POOL
+    if _DEFAULT_POOL is None:
+        _DEFAULT_POOL = WhisperModelPool()
+    return _DEFAULT_POOL
+
+
+# (start_s, end_s, text) with absolute times since the start of the stream
+Word = Tuple[float, float, str]
+
+
+@dataclass
+class DecodeRequest:
+    """One streaming decode: the audio to transcribe and the `transcribe()` options for it."""
+
+    audio: np.ndarray
+    offset_s: float  # absolute stream time of audio[0]
+    options: Dict[str, Any]
+
+
+def _norm_word(w: str) -> str:
+    return w.strip().lower().strip(".,!?;:¿¡\"'")
 
 
 class WhisperStreamer:
     """Thin wrapper around faster-whisper for short streaming chunks.
 
     Designed for 16 kHz mono Float32 audio arrays. Maintains a running
-    partial transcript and last detected language.
+    partial transcript and last detected language. The model itself lives in
+    a shared `WhisperModelPool`; a streamer only holds per-session state.
+
+    Two modes are supported:
+    - `transcribe_chunk(audio)`: decode a whole window and merge it into the
+      transcript by suffix matching (legacy).
+    - `push_audio(new_samples)` + `process_stream()`: incremental streaming.
+      Only the uncommitted tail (plus `context_seconds` of already committed
+      audio) is decoded; words are committed once two consecutive decodes
+      agree on them (local agreement), and committed text never changes.
     """
 
-    def __init__(self, model_size: str = "tiny", device: str = "cpu", compute_type: str = "int8") -> None:
-        # Lazy import with graceful fallback if faster-whisper is unavailable
-        try:
-            from faster_whisper import WhisperModel  # type: ignore
-        except Exception:
-            WhisperModel = None  # type: ignore
-        self._WhisperModel = WhisperModel
+    def __init__(
+        self,
+        model_size: str = "tiny",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        pool: Optional[WhisperModelPool] = None,
+        sample_rate: int = 16000,
+        min_chunk_seconds: float = 1.0,
+        context_seconds: float = 0.5,
+        max_buffer_seconds: float = 15.0,
+        follow_detection: bool = True,
+    ) -> None:
+        self._pool = pool if pool is not None else default_pool()
         self._model_size = model_size
         self._device = device
         self._compute_type = compute_type
         self.model = None
         self.partial_transcript: str = ""
         self.last_language: Optional[str] = None
+        self.language: Optional[str] = None  # pinned decode language (see `pin_language`), overrides detection
+        # Keep decoding in the language Whisper detected on earlier windows. False while an
+        # external language ID decides: until it pins a language every window is auto-detected.
+        self.follow_detection = bool(follow_detection)
         self.available: bool = False
         self.fallback_used: Optional[str] = None  # compute_type actually used, if fallback occurred
         self._last_chunk_text: str = ""
+        # Streaming state
+        self.sample_rate = int(sample_rate)
+        self.min_chunk_seconds = float(min_chunk_seconds)
+        self.context_seconds = float(context_seconds)
+        self.max_buffer_seconds = float(max_buffer_seconds)
+        self._stream_audio = np.zeros(0, dtype=np.float32)
+        self._stream_offset = 0  # absolute sample index of _stream_audio[0]
+        self._undecoded = 0  # samples pushed since the last streaming decode
+        self._undecoded_voiced = False  # any speech among them (per caller-side VAD)
+        self._committed_until = 0.0  # absolute seconds
+        self._committed_words: List[Word] = []
+        # (start seconds, offset in partial_transcript) of recently committed words, for `rewind`
+        self._commit_marks: List[Tuple[float, int]] = []
+        self._prev_hyp: List[Word] = []
+
+    def _ensure_model(self) -> bool:
+        # Borrow the shared model (loaded once per process)
+        if self.model is None:
+            self.model, self.fallback_used = self._pool.get(self._model_size, self._device, self._compute_type)
+        self.available = self.model is not None
+        return self.available
+
+    def use_model(self, model_size: str) -> None:
+        """Switch to another shared model size (e.g. cascade escalation); applies from the next decode."""
+        if model_size != self._model_size:
+            self._model_size = model_size
+            self.model = None
+
+    def _decode_language(self) -> Optional[str]:
+        if self.language:
+            return self.language
+        return self.last_language if self.follow_detection else None
+
+    def _note_detected(self, info: Any) -> None:
+        if info is not None and getattr(info, "language", None) and not self.language and self.follow_detection:
+            self.last_language = info.language
+
+    def pin_language(self, language: Optional[str]) -> None:
+        """Decode in `language` from now on (None: back to per-window detection, see `follow_detection`)."""
+        self.language = language
+        if language:
+            self.last_language = language
+
+    def detect_language(self, audio: np.ndarray, allowed: Optional[Iterable[str]] = None) -> Tuple[Optional[str], float]:
+        """(language, probability) of `audio` from the shared model's language-ID head."""
+        if not self._ensure_model():
+            return None, 0.0
+        try:
+            with self._pool.slot():
+                return detect_language(self.model, audio, allowed)
+        except Exception:
+            return None, 0.0
+
+    def rewind(self, samples: int) -> int:
+        """Forget the last `samples` of pushed audio so it can be pushed and decoded again.
+
+        Committed words that start inside the rewound span are cut from the
+        transcript at the character offset where the first of them was
+        appended. Returns the number of samples actually rewound.
+        """
+        sr = self.sample_rate
+        end = self._stream_offset + self._stream_audio.shape[0]
+        start = max(0, end - int(samples))
+        t = start / sr
+        cut = next((off for w_start, off in self._commit_marks if w_start >= t), None)
+        if cut is not None:
+            self.partial_transcript = self.partial_transcript[:cut].rstrip()
+            self._commit_marks = [m for m in self._commit_marks if m[0] < t]
+        self._committed_words = [w for w in self._committed_words if w[0] < t]
+        self._committed_until = t
+        self._stream_audio = np.zeros(0, dtype=np.float32)
+        self._stream_offset = start
+        self._prev_hyp = []
+        self._undecoded = 0
+        self._undecoded_voiced = False
+        return end - start
 
     def _append_unique(self, new_text: str) -> None:
         if not new_text:
@@ -54,31 +266,9 @@ class WhisperStreamer:
         if audio.dtype != np.float32:
             audio = audio.astype(np.float32, copy=False)
 
-        # Initialize model on first use if available
-        if self.model is None and self._WhisperModel is not None:
-            try:
-                # Try preferred compute type first, then fall back
-                try_types = [self._compute_type, "int8_float16", "float16", "int8", "float32"]
-                last_err = None
-                for ct in try_types:
-                    try:
-                        self.model = self._WhisperModel(self._model_size, device=self._device, compute_type=ct)
-                        self.fallback_used = ct if ct != self._compute_type else None
-                        break
-                    except Exception as e:  # keep trying
-                        last_err = e
-                        self.model = None
-                if self.model is None and last_err:
-                    raise last_err
-            except Exception:
-                self.model = None
-
-        if self.model is None:
+        if not self._ensure_model():
             # Fallback: no ASR available
-            self.available = False
             return "", self.last_language
-        else:
-            self.available = True
 
         # faster-whisper expects float32 PCM in [-1, 1]
         # Ensure at least minimal duration before calling to avoid 'unavailable' and heavy VAD removal noise
@@ -88,27 +278,190 @@ class WhisperStreamer:
             beam_size=1,
             # Keep internal VAD disabled to avoid double-trimming; rely on our EnergyVAD
             vad_filter=False,
-            language=self.last_language,
+            language=self._decode_language(),
             temperature=0.0,
             initial_prompt=None,
         )
         # Some versions support condition_on_previous_text. Try, then fallback.
         try:
-            try:
-                segments, info = self.model.transcribe(audio, condition_on_previous_text=True, **kwargs)  # type: ignore
-            except TypeError:
-                segments, info = self.model.transcribe(audio, **kwargs)
+            with self._pool.slot():
+                try:
+                    segments, info = self.model.transcribe(audio, condition_on_previous_text=True, **kwargs)  # type: ignore
+                except TypeError:
+                    segments, info = self.model.transcribe(audio, **kwargs)
+                # Segments are a lazy generator; decoding happens while iterating
+                text_parts = [seg.text for seg in segments]
         except Exception:
             # Any unexpected error: return empty safely
             return "", self.last_language
-        text_parts = [seg.text for seg in segments]
         text = (" ".join(tp.strip() for tp in text_parts)).strip()
-        if info is not None and getattr(info, "language", None):
-            self.last_language = info.language
+        self._note_detected(info)
 
         if text:
             self._append_unique(text)
 
         return text, self.last_language
 
+    # ---- Streaming mode ----
+
+    @property
+    def tentative_text(self) -> str:
+        """Uncommitted hypothesis from the last streaming decode (may still change)."""
+        return "".join(w for _, _, w in self._prev_hyp).strip()
+
+    def push_audio(self, samples: np.ndarray, voiced: bool = True) -> None:
+        """Append newly received audio to the streaming buffer.
+
+        `voiced=False` marks it as silence: if nothing voiced or tentative is
+        pending, the next `process_stream` skips decoding altogether.
+        """
+        if samples is None or samples.size == 0:
+            return
+        self._undecoded_voiced = self._undecoded_voiced or bool(voiced)
+        if samples.dtype != np.float32:
+            samples = samples.astype(np.float32, copy=False)
+        self._stream_audio = np.concatenate([self._stream_audio, samples])
+        self._undecoded += samples.shape[0]
+
+    def process_stream(self) -> Tuple[str, Optional[str]]:
+        """Decode the uncommitted tail and return (newly committed text, language).
+
+        Does nothing until at least `min_chunk_seconds` of new audio arrived
+        since the previous decode.
+        """
+        req = self.prepare_stream()
+        if req is None:
+            return "", self.last_language
+        try:
+            with self._pool.slot():
+                segments, info = self.model.transcribe(req.audio, **req.options)  # type: ignore
+                segments = list(segments)  # faster-whisper decodes lazily
+        except Exception:
+            return "", self.last_language
+        return self.apply_stream(req, segments, info)
+
+    def prepare_stream(self) -> Optional[DecodeRequest]:
+        """First half of `process_stream`: the decode due now, or None.
+
+        Lets a caller run the model elsewhere (e.g. `BatchingAsrDecoder`
+        batching several sessions) and hand the output to `apply_stream`.
+        """
+        sr = self.sample_rate
+        if not self._ensure_model():
+            return None
+        if self._undecoded < int(self.min_chunk_seconds * sr):
+            return None
+        if not self._undecoded_voiced and not self._prev_hyp:
+            # Only silence since the last decode: commit it without running the model
+            self._undecoded = 0
+            self._committed_until = (self._stream_offset + self._stream_audio.shape[0]) / sr
+            self._trim_stream()
+            return None
+        self._undecoded = 0
+        self._undecoded_voiced = False
+        # Committed text conditions the decoder instead of re-decoding it
+        prompt = self.partial_transcript[-200:] or None
+        return DecodeRequest(
+            audio=self._stream_audio,
+            offset_s=self._stream_offset / sr,
+            options=dict(
+                beam_size=1,
+                vad_filter=False,
+                language=self._decode_language(),
+                temperature=0.0,
+                initial_prompt=prompt,
+                condition_on_previous_text=False,
+                word_timestamps=True,
+            ),
+        )
+
+    def apply_stream(self, req: DecodeRequest, segments: Any, info: Any) -> Tuple[str, Optional[str]]:
+        """Second half of `process_stream`: merge the decode of `req` and return (committed text, language)."""
+        sr = self.sample_rate
+        audio = req.audio
+        offset_s = req.offset_s
+        hyp: List[Word] = [
+            (offset_s + float(w.start), offset_s + float(w.end), w.word) for seg in segments for w in (seg.words or [])
+        ]
+        self._note_detected(info)
+
+        # Drop words that belong to the already committed context
+        hyp = [w for w in hyp if w[0] > self._committed_until - 0.1]
+        hyp = self._drop_committed_ngram(hyp)
+
+        # Local agreement: commit the longest prefix shared with the previous hypothesis
+        n = 0
+        while n < min(len(hyp), len(self._prev_hyp)) and _norm_word(hyp[n][2]) == _norm_word(self._prev_hyp[n][2]):
+            n += 1
+        committed = hyp[:n]
+        self._prev_hyp = hyp[n:]
+
+        buffer_end_s = offset_s + audio.shape[0] / sr
+        if not hyp:
+            # Nothing but silence/noise: no need to decode this audio again
+            self._committed_until = max(self._committed_until, buffer_end_s - self.min_chunk_seconds)
+        # Bound the buffer: if nothing stabilises for too long, force-commit older words
+        elif buffer_end_s - max(self._committed_until, offset_s) > self.max_buffer_seconds:
+            forced = [w for w in self._prev_hyp if w[1] < buffer_end_s - self.min_chunk_seconds]
+            committed += forced
+            self._prev_hyp = self._prev_hyp[len(forced) :]
+            if not forced:
+                self._committed_until = buffer_end_s - self.min_chunk_seconds
+
+        text = self._commit(committed)
+        self._trim_stream()
+        return text, self.last_language
+
+    def _commit(self, words: List[Word]) -> str:
+        if not words:
+            return ""
+        self._committed_words.extend(words)
+        self._committed_until = words[-1][1]
+        joined = "".join(w for _, _, w in words)
+        text = joined.strip()
+        if not text:
+            return ""
+        # Offset of each word in the transcript (words carry their own leading space)
+        base = len(self.partial_transcript) + (1 if self.partial_transcript else 0)
+        pos = -(len(joined) - len(joined.lstrip()))
+        for w_start, _, w in words:
+            self._commit_marks.append((w_start, base + max(0, pos)))
+            pos += len(w)
+        if len(self._commit_marks) > 512:
+            self._commit_marks = self._commit_marks[-256:]
+        self.partial_transcript = (self.partial_transcript + " " + text).strip()
+        return text
+
+    def finalize(self) -> str:
+        """End of stream: commit the pending hypothesis that never got a second agreeing decode.
+
+        Returns the text added to `partial_transcript`.
+        """
+        words, self._prev_hyp = self._prev_hyp, []
+        return self._commit(words)
+
+    def _drop_committed_ngram(self, hyp: List[Word]) -> List[Word]:
+        # Words straddling the commit boundary can reappear; drop a repeated 1..5-gram
+        if not hyp or not self._committed_words:
+            return hyp
+        if abs(hyp[0][0] - self._committed_until) >= 1.0:
+            return hyp
+        tail = [_norm_word(w[2]) for w in self._committed_words[-5:]]
+        head = [_norm_word(w[2]) for w in hyp[:5]]
+        for k in range(min(len(tail), len(head)), 0, -1):
+            if tail[-k:] == head[:k]:
+                return hyp[k:]
+        return hyp
 
+    def _trim_stream(self) -> None:
+        # Keep only context_seconds of committed audio before the uncommitted tail
+        sr = self.sample_rate
+        keep_from = int((self._committed_until - self.context_seconds) * sr)
+        cut = keep_from - self._stream_offset
+        if cut > 0:
+            cut = min(cut, self._stream_audio.shape[0])
+            self._stream_audio = self._stream_audio[cut:].copy()
+            self._stream_offset += cut
+        # Words older than the prompt window are no longer needed
+        if len(self._committed_words) > 64:
+            self._committed_words = self._committed_words[-16:]
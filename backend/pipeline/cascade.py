@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, FrozenSet, Iterable, Optional
+import threading
+
+import numpy as np
+
+# Session tiers in cascade mode: every call starts on the cheap screening tier
+# (small ASR model, keyword intent only, no diarization, reduced-rate AASIST)
+# and is escalated, once and for the rest of the call, to the full pipeline.
+TIER_SCREEN = "screen"
+TIER_FULL = "full"
+
+
+@dataclass
+class CascadePolicy:
+    """Escalation thresholds for screening-tier sessions.
+
+    `tags` restricts which intent tags escalate; None means any intent tag.
+    """
+
+    risk: float = 0.25
+    spoof: float = 0.5
+    tags: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_settings(cls, risk: float, spoof: float, tags: str) -> "CascadePolicy":
+        names = frozenset(t.strip() for t in tags.split(",") if t.strip())
+        return cls(risk=float(risk), spoof=float(spoof), tags=names or None)
+
+    def escalation_reason(self, risk: float, spoof: Optional[float], tags: Iterable[str]) -> Optional[str]:
+        """Why a screening session must escalate ("risk", "spoof", "tag"), or None."""
+        if risk >= self.risk:
+            return "risk"
+        if spoof is not None and spoof >= self.spoof:
+            return "spoof"
+        hits = [t for t in tags if t != "VAD_ACTIVE"]
+        if self.tags is not None:
+            hits = [t for t in hits if t in self.tags]
+        return "tag" if hits else None
+
+
+@dataclass
+class CascadeStats:
+    """Per-tier session counts and escalation counters for `/stats` and `/metrics`."""
+
+    sessions: Dict[str, int] = field(default_factory=lambda: {TIER_SCREEN: 0, TIER_FULL: 0})
+    escalations: Dict[str, int] = field(default_factory=dict)
+    escalated_after_s: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enter(self, tier: str) -> None:
+        with self._lock:
+            self.sessions[tier] = self.sessions.get(tier, 0) + 1
+
+    def leave(self, tier: str) -> None:
+        with self._lock:
+            self.sessions[tier] = max(0, self.sessions.get(tier, 0) - 1)
+
+    def escalate(self, reason: str, after_s: float) -> None:
+        with self._lock:
+            self.sessions[TIER_SCREEN] = max(0, self.sessions.get(TIER_SCREEN, 0) - 1)
+            self.sessions[TIER_FULL] = self.sessions.get(TIER_FULL, 0) + 1
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+            self.escalated_after_s.append(float(after_s))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            after = np.asarray(self.escalated_after_s, dtype=np.float64)
+            return {
+                "sessions": dict(self.sessions),
+                "escalations": dict(self.escalations),
+                "escalated_after_s_p50": float(np.percentile(after, 50)) if after.size else 0.0,
+                "escalated_after_s_p95": float(np.percentile(after, 95)) if after.size else 0.0,
+            }
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import logging
+import time
 import numpy as np
-import torch
 
-try:
-    from pyannote.audio import Pipeline  # type: ignore
-except Exception:
-    Pipeline = None  # type: ignore
+# torch and pyannote are imported by OnlineDiarizer.load(), so importing this module stays cheap
+torch = None  # type: ignore
 
 
 def _l2_normalize(v: np.ndarray) -> np.ndarray:
@@ -23,32 +23,71 @@ class OnlineDiarizer:
     only that speaker's samples for downstream processing (ASR/spoof).
     """
 
-    def __init__(self, hf_token: Optional[str], window_seconds: float = 5.0) -> None:
+    def __init__(self, hf_token: Optional[str], window_seconds: float = 5.0, load: bool = True) -> None:
         self.available = False
         self.window_seconds = float(window_seconds)
+        self._hf_token = hf_token
         self._pipeline = None
         self._embedder = None
         self._user_embedding: Optional[np.ndarray] = None
-        if hf_token and Pipeline is not None:
+        self.load_seconds: Optional[float] = None
+        if load:
+            self.load()
+
+    def load(self) -> bool:
+        """Import pyannote and load the pipeline (plus embedder); returns availability."""
+        global torch
+        if self.available or not self._hf_token:
+            return self.available
+        t0 = time.perf_counter()
+        try:
+            import torch as _torch
+            from pyannote.audio import Pipeline  # type: ignore
+        except Exception:
+            return False
+        torch = _torch
+        try:
+            # Recent versions use task-specific pipelines; fall back if needed
+            # "pyannote/speaker-diarization" may require access.
+            self._pipeline = Pipeline.from_pretrained(
+                "pyannote/speaker-diarization", use_auth_token=self._hf_token
+            )
+            # Try to load a speaker embedding model for enrollment
             try:
-                # Recent versions use task-specific pipelines; fall back if needed
-                # "pyannote/speaker-diarization" may require access.
-                self._pipeline = Pipeline.from_pretrained(
-                    "pyannote/speaker-diarization", use_auth_token=hf_token
+                from pyannote.audio.pipelines.speaker_verification import PretrainedSpeakerEmbedding  # type: ignore
+
+                self._embedder = PretrainedSpeakerEmbedding(
+                    "speechbrain/spkrec-ecapa-voxceleb", device="cpu"
                 )
-                # Try to load a speaker embedding model for enrollment
-                try:
-                    from pyannote.audio.pipelines.speaker_verification import PretrainedSpeakerEmbedding  # type: ignore
-
-                    self._embedder = PretrainedSpeakerEmbedding(
-                        "speechbrain/spkrec-ecapa-voxceleb", device="cpu"
-                    )
-                except Exception:
-                    self._embedder = None
-                self.available = True
             except Exception:
-                self._pipeline = None
-                self.available = False
+                self._embedder = None
+            self.available = True
+            self.load_seconds = time.perf_counter() - t0
+        except Exception as e:
+            logging.getLogger("vss").warning("pyannote load failed: %s", e)
+            self._pipeline = None
+            self.available = False
+        return self.available
+
+    @property
+    def has_embedder(self) -> bool:
+        return self._embedder is not None
+
+    @property
+    def user_embedding(self) -> Optional[np.ndarray]:
+        return self._user_embedding
+
+    def segments(self, audio: np.ndarray, sample_rate: int) -> List[Tuple[float, float, str]]:
+        """Run the diarization pipeline once: (start_s, end_s, local speaker label) per turn."""
+        diarization = self._pipeline({"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": sample_rate})
+        return [(float(seg.start), float(seg.end), str(spk)) for seg, _, spk in diarization.itertracks(yield_label=True)]
+
+    def embed(self, audio: np.ndarray) -> np.ndarray:
+        """Raw (unnormalised) speaker embedding of `audio`."""
+        out = self._embedder(torch.from_numpy(audio).float().unsqueeze(0))  # type: ignore[misc]
+        if hasattr(out, "detach"):
+            out = out.detach().cpu().numpy()
+        return np.asarray(out, dtype=np.float32).squeeze()
 
     def select_dominant_speaker(
         self, audio: np.ndarray, sample_rate: int
@@ -59,30 +98,33 @@ class OnlineDiarizer:
             waveform = torch.from_numpy(audio).unsqueeze(0)  # 1 x T
             audio_file = {"waveform": waveform, "sample_rate": sample_rate}
             diarization = self._pipeline(audio_file)
-            # Accumulate duration per speaker
-            durations: dict[str, float] = {}
-            for seg, _, speaker in diarization.itertracks(yield_label=True):
-                durations[speaker] = durations.get(speaker, 0.0) + float(seg.duration)
-            if not durations:
-                return audio, None
-            dominant = max(durations, key=durations.get)
-            # Build mask for dominant speaker
-            total_len = audio.shape[0]
-            mask = np.zeros(total_len, dtype=np.float32)
-            for seg, _, speaker in diarization.itertracks(yield_label=True):
-                if speaker != dominant:
-                    continue
-                start = int(max(0, round(seg.start * sample_rate)))
-                end = int(min(total_len, round(seg.end * sample_rate)))
-                if end > start:
-                    mask[start:end] = 1.0
-            # Avoid empty mask
-            if mask.sum() < sample_rate * 0.2:
-                return audio, dominant
-            return audio * mask, dominant
+            return self._dominant_from(diarization, audio, sample_rate)
         except Exception:
             return audio, None
 
+    def _dominant_from(self, diarization, audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, Optional[str]]:
+        # Accumulate duration per speaker
+        durations: dict[str, float] = {}
+        for seg, _, speaker in diarization.itertracks(yield_label=True):
+            durations[speaker] = durations.get(speaker, 0.0) + float(seg.duration)
+        if not durations:
+            return audio, None
+        dominant = max(durations, key=durations.get)
+        # Build mask for dominant speaker
+        total_len = audio.shape[0]
+        mask = np.zeros(total_len, dtype=np.float32)
+        for seg, _, speaker in diarization.itertracks(yield_label=True):
+            if speaker != dominant:
+                continue
+            start = int(max(0, round(seg.start * sample_rate)))
+            end = int(min(total_len, round(seg.end * sample_rate)))
+            if end > start:
+                mask[start:end] = 1.0
+        # Avoid empty mask
+        if mask.sum() < sample_rate * 0.2:
+            return audio, dominant
+        return audio * mask, dominant
+
     def enroll_user(self, audio: np.ndarray, sample_rate: int) -> bool:
         """Create an enrollment embedding for the local user.
 
@@ -114,7 +156,8 @@ class OnlineDiarizer:
             diarization = self._pipeline({"waveform": waveform, "sample_rate": sample_rate})
             # Compute embedding per speaker if user embedding is present
             if self._embedder is None or self._user_embedding is None:
-                return self.select_dominant_speaker(audio, sample_rate)
+                # Reuse this diarization rather than running the pipeline a second time
+                return self._dominant_from(diarization, audio, sample_rate)
 
             speakers = {}
             for seg, _, spk in diarization.itertracks(yield_label=True):
@@ -159,3 +202,198 @@ class OnlineDiarizer:
             return audio, None
 
 
+class StreamingDiarizer:
+    """Per-session incremental diarization on top of a shared `OnlineDiarizer`.
+
+    Instead of re-running the pipeline on the last few seconds every tick,
+    audio is diarized once, in chunks of `chunk_seconds` (plus
+    `context_seconds` of already processed audio for continuity). Segment
+    embeddings are cached by absolute position, and local pyannote labels are
+    mapped onto call-level speakers by cosine similarity to running centroids,
+    so labels stay stable for the whole call.
+
+    The caller is the speaker least similar to the enrolled user, or the
+    speaker with the most accumulated speech when nobody is enrolled. Audio
+    newer than the last diarized chunk inherits the label of the last segment
+    if that segment reached the end of the chunk.
+    """
+
+    def __init__(
+        self,
+        shared: OnlineDiarizer,
+        sample_rate: int = 16000,
+        chunk_seconds: float = 2.0,
+        context_seconds: float = 0.5,
+        similarity_threshold: float = 0.55,
+        retain_seconds: float = 30.0,
+        min_embed_seconds: float = 0.3,
+        cache_size: int = 256,
+        vad=None,
+    ) -> None:
+        self.shared = shared
+        self.vad = vad  # optional EnergyVAD: chunks without any voiced frame skip the pipeline
+        self.sample_rate = int(sample_rate)
+        self.chunk_samples = int(chunk_seconds * sample_rate)
+        self.context_samples = int(context_seconds * sample_rate)
+        self.similarity_threshold = float(similarity_threshold)
+        self.retain_samples = int(retain_seconds * sample_rate)
+        self.min_embed_samples = int(min_embed_seconds * sample_rate)
+        self.cache_size = int(cache_size)
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._audio_offset = 0  # absolute sample index of _audio[0]
+        self._received_until = 0
+        self._processed_until = 0
+        # (start, end, speaker) in absolute samples, oldest first
+        self._segments: list[Tuple[int, int, int]] = []
+        self._centroid_sums: list[np.ndarray] = []
+        self._durations: list[float] = []
+        self._emb_cache: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self.runs = 0
+
+    @property
+    def available(self) -> bool:
+        return self.shared.available
+
+    def _push(self, audio: np.ndarray, end_sample: int) -> None:
+        start_sample = end_sample - audio.shape[0]
+        if start_sample > self._received_until:
+            # Gap (ticks skipped or audio dropped from the ring): restart the buffer at the new
+            # window so buffered samples keep their true absolute positions
+            self._audio = np.zeros(0, dtype=np.float32)
+            self._audio_offset = start_sample
+            self._received_until = start_sample
+            self._processed_until = max(self._processed_until, start_sample)
+            self._emb_cache.clear()
+        new = min(end_sample - self._received_until, audio.shape[0])
+        if new <= 0:
+            return
+        self._audio = np.concatenate([self._audio, audio[-new:].astype(np.float32, copy=False)])
+        self._audio_offset = end_sample - self._audio.shape[0]
+        self._received_until = end_sample
+
+    def _embed(self, start: int, end: int) -> Optional[np.ndarray]:
+        # Positions are absolute, so a segment seen again through the context overlap hits the cache
+        key = (start // 160, end // 160)
+        emb = self._emb_cache.get(key)
+        if emb is not None:
+            self._emb_cache.move_to_end(key)
+            return emb
+        chunk = self._audio[start - self._audio_offset : end - self._audio_offset]
+        if chunk.shape[0] < self.min_embed_samples:
+            return None
+        emb = _l2_normalize(self.shared.embed(chunk))
+        if not np.all(np.isfinite(emb)):
+            return None
+        self._emb_cache[key] = emb
+        if len(self._emb_cache) > self.cache_size:
+            self._emb_cache.popitem(last=False)
+        return emb
+
+    def _assign(self, emb: np.ndarray, weight: float) -> int:
+        best, best_sim = -1, -1.0
+        for i, s in enumerate(self._centroid_sums):
+            sim = float(np.dot(_l2_normalize(s), emb))
+            if sim > best_sim:
+                best, best_sim = i, sim
+        if best < 0 or best_sim < self.similarity_threshold:
+            self._centroid_sums.append(emb * weight)
+            self._durations.append(0.0)
+            return len(self._centroid_sums) - 1
+        self._centroid_sums[best] = self._centroid_sums[best] + emb * weight
+        return best
+
+    def process(self) -> bool:
+        """Diarize pending audio if a full chunk is available; returns True if it ran."""
+        if not self.available or not self.shared.has_embedder:
+            return False
+        if self._received_until - self._processed_until < self.chunk_samples:
+            return False
+        sr = self.sample_rate
+        start_abs = max(self._audio_offset, self._processed_until - self.context_samples)
+        audio = self._audio[start_abs - self._audio_offset :]
+        end_abs = start_abs + audio.shape[0]
+        if self.vad is not None and not self.vad.frame_mask(audio[self._processed_until - start_abs :]).any():
+            # Silent chunk: nothing to label, just move the boundary
+            self._advance(end_abs)
+            return True
+        turns = self.shared.segments(audio, sr)
+        self.runs += 1
+
+        # Group this chunk's segments by local label; embed each (cached) segment once
+        local: dict[str, list[Tuple[int, int]]] = {}
+        for seg_start, seg_end, spk in turns:
+            s = start_abs + int(max(0, round(seg_start * sr)))
+            e = start_abs + int(min(audio.shape[0], round(seg_end * sr)))
+            if e > s:
+                local.setdefault(spk, []).append((s, e))
+        for spk, segs in local.items():
+            embs = [(self._embed(s, e), e - s) for s, e in segs]
+            embs = [(emb, w) for emb, w in embs if emb is not None]
+            if not embs:
+                continue
+            weight = float(sum(w for _, w in embs)) / sr
+            mean = _l2_normalize(np.sum([emb * w for emb, w in embs], axis=0))
+            gid = self._assign(mean, weight)
+            for s, e in segs:
+                # Only the part after the previous boundary is new; context was labelled last time
+                s = max(s, self._processed_until)
+                if e > s:
+                    self._segments.append((s, e, gid))
+                    self._durations[gid] += (e - s) / sr
+        self._segments.sort(key=lambda x: x[0])
+        self._advance(end_abs)
+        return True
+
+    def _advance(self, end_abs: int) -> None:
+        self._processed_until = end_abs
+        # Keep only what the next chunk's context and recent masks need
+        keep_from = self._processed_until - self.context_samples
+        if keep_from > self._audio_offset:
+            self._audio = self._audio[keep_from - self._audio_offset :].copy()
+            self._audio_offset = keep_from
+        horizon = self._processed_until - self.retain_samples
+        self._segments = [seg for seg in self._segments if seg[1] > horizon]
+
+    def caller_id(self) -> Optional[int]:
+        if not self._centroid_sums:
+            return None
+        ue = self.shared.user_embedding
+        if ue is not None:
+            sims = [float(np.dot(_l2_normalize(c), ue)) for c in self._centroid_sums]
+            return int(np.argmin(sims))
+        return int(np.argmax(self._durations))
+
+    def caller_embedding(self) -> Optional[np.ndarray]:
+        """L2-normalised running centroid of the current caller, if any."""
+        cid = self.caller_id()
+        return None if cid is None else _l2_normalize(self._centroid_sums[cid])
+
+    def select_caller(self, audio: np.ndarray, end_sample: int) -> Tuple[np.ndarray, Optional[str]]:
+        """Mask `audio` (the window ending at absolute `end_sample`) to the caller's speech."""
+        if not self.available or audio.size == 0:
+            return audio, None
+        try:
+            self._push(audio, end_sample)
+            if not self.shared.has_embedder:
+                # No embeddings: cannot track speakers across chunks, use the stateless path
+                return self.shared.select_caller(np.array(audio, dtype=np.float32), self.sample_rate)
+            self.process()
+            caller = self.caller_id()
+            if caller is None:
+                return audio, None
+            start = end_sample - audio.shape[0]
+            mask = np.zeros(audio.shape[0], dtype=np.float32)
+            for s, e, spk in self._segments:
+                if spk == caller and e > start and s < end_sample:
+                    mask[max(s, start) - start : min(e, end_sample) - start] = 1.0
+            # Not yet diarized tail continues the last known speaker
+            tail = max(self._processed_until, start)
+            last = self._segments[-1] if self._segments else None
+            recent = last is not None and last[1] >= self._processed_until - self.context_samples
+            if recent and last[2] == caller and tail < end_sample:
+                mask[tail - start :] = 1.0
+            if mask.sum() < self.sample_rate * 0.2:
+                return audio, f"SPK_{caller}"
+            return audio * mask, f"SPK_{caller}"
+        except Exception:
+            return audio, None
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -12,16 +12,21 @@ class FusionResult:
     tags: List[str]
 
 
-def fuse_scores(spoof: float, intent: float, heuristics: float, tags: List[str]) -> FusionResult:
+# A caller matching a watchlisted voice (voice_match >= 0.5, see watchlist.match_signal)
+# is at least SUSPICIOUS on that evidence alone
+VOICE_MATCH_WEIGHT = 0.7
+
+
+def fuse_scores(
+    spoof: float, intent: float, heuristics: float, tags: List[str], voice_match: float = 0.0
+) -> FusionResult:
     # Heavier weight on intent for demo priorities
     risk = 0.3 * spoof + 0.6 * intent + 0.1 * heuristics
-    if risk < 0.35:
-        label = "SAFE"
-    elif risk < 0.65:
-        label = "SUSPICIOUS"
-    else:
-        label = "SCAM"
+    risk = min(1.0, risk + VOICE_MATCH_WEIGHT * voice_match)
+    label = risk_label(risk)
     rationale_parts: List[str] = []
+    if voice_match > 0.0:
+        rationale_parts.append(f"voice_match={voice_match:.2f}")
     if intent > 0.0:
         rationale_parts.append(f"intent={intent:.2f}")
     if spoof > 0.0:
@@ -32,3 +37,78 @@ def fuse_scores(spoof: float, intent: float, heuristics: float, tags: List[str])
     return FusionResult(risk=float(risk), label=label, rationale=rationale, tags=tags)
 
 
+def risk_label(risk: float) -> str:
+    if risk < 0.35:
+        return "SAFE"
+    if risk < 0.65:
+        return "SUSPICIOUS"
+    return "SCAM"
+
+
+class RiskAccumulator:
+    """Per-call smoothing of stage scores into a displayed risk.
+
+    Intent and spoof are EMA-smoothed and held by a slowly decaying "sticky"
+    maximum so evidence persists across the call; the fused risk is smoothed
+    once more to avoid flicker. Shared by the live socket and batch scoring so
+    both produce the same timeline for the same audio.
+    """
+
+    # Update every 0.5s, use gentle decay so evidence persists across the call
+    TICK_S = 0.5
+    DECAY_PER_TICK = 0.98  # ~17s half-life at 0.5s tick
+    ALPHA_INTENT = 0.4
+    ALPHA_SPOOF = 0.3
+    ALPHA_RISK = 0.3
+
+    def __init__(self) -> None:
+        self.ema_intent = 0.0
+        self.ema_spoof = 0.0
+        self.ema_risk = 0.0
+        self.sticky_intent = 0.0
+        self.sticky_spoof = 0.0
+        self.sticky_voice = 0.0
+
+    @staticmethod
+    def _per_dt(alpha: float, ticks: float) -> float:
+        # EMA weight for `ticks` nominal ticks folded into one update
+        return alpha if ticks == 1.0 else 1.0 - (1.0 - alpha) ** ticks
+
+    def update(
+        self,
+        intent: float,
+        spoof: float,
+        heuristics: float,
+        tags: List[str],
+        dt: Optional[float] = None,
+        voice_match: float = 0.0,
+    ) -> FusionResult:
+        """Fold one tick of scores in; returns the fusion with the smoothed risk and its label.
+
+        `dt` is the time since the previous update; longer (load-shed) ticks
+        get proportionally more weight and decay so smoothing stays in seconds.
+        """
+        ticks = 1.0 if dt is None else max(dt, 1e-3) / self.TICK_S
+        a_intent = self._per_dt(self.ALPHA_INTENT, ticks)
+        a_spoof = self._per_dt(self.ALPHA_SPOOF, ticks)
+        decay = self.DECAY_PER_TICK ** ticks
+        self.ema_intent = a_intent * float(intent) + (1.0 - a_intent) * self.ema_intent
+        self.ema_spoof = a_spoof * float(spoof) + (1.0 - a_spoof) * self.ema_spoof
+        self.sticky_intent = max(self.ema_intent, self.sticky_intent * decay)
+        self.sticky_spoof = max(self.ema_spoof, self.sticky_spoof * decay)
+        # A watchlist match is already a call-level decision; it is only held, not averaged
+        self.sticky_voice = max(float(voice_match), self.sticky_voice * decay)
+        # Fuse using sticky values to accumulate risk across the conversation
+        fusion = fuse_scores(
+            spoof=self.sticky_spoof,
+            intent=self.sticky_intent,
+            heuristics=heuristics,
+            tags=tags,
+            voice_match=self.sticky_voice,
+        )
+        a_risk = self._per_dt(self.ALPHA_RISK, ticks)
+        self.ema_risk = a_risk * float(fusion.risk) + (1.0 - a_risk) * self.ema_risk
+        # Label follows the smoothed risk, same thresholds as fuse_scores
+        return FusionResult(
+            risk=float(self.ema_risk), label=risk_label(self.ema_risk), rationale=fusion.rationale, tags=fusion.tags
+        )
@@ -1,114 +1,160 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
-
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # optional dependency
-    OpenAI = None  # type: ignore
-
-
-INTENT_KEYWORDS = {
-    "CREDENTIAL_REQUEST": [
-        # EN
-        "password", "login", "account details", "verify your identity",
-        # ES
-        "contraseña", "iniciar sesión", "verificar su identidad",
-        # FR
-        "mot de passe", "identifiant", "vérifier votre identité",
-    ],
-    "OTP_REQUEST": [
-        # EN
-        "one-time code", "verification code", "OTP",
-        # ES
-        "código", "codigo", "verificación",
-        # FR
-        "code", "vérification",
-    ],
-    "PAYMENT": [
-        # EN
-        "gift card", "wire transfer", "bitcoin", "credit card", "payment",
-        # ES
-        "tarjeta regalo", "transferencia", "bitcoin", "pago",
-        # FR
-        "carte cadeau", "virement", "bitcoin", "paiement",
-    ],
-    "LINK": [
-        # EN
-        "click the link", "follow this link", "open this link",
-        # ES
-        "haga clic en el enlace", "siga este enlace",
-        # FR
-        "cliquez sur le lien", "suivez ce lien",
-    ],
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional
+
+from pipeline.keywords import KeywordAutomaton, KeywordScanner, load_keyword_pack, merge_packs
+
+
+# Built-in keyword packs per language. Matching is accent- and case-insensitive
+# (see keywords.normalize_text), so accented and plain spellings need not both be listed.
+INTENT_KEYWORDS_BY_LANG: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "CREDENTIAL_REQUEST": ["password", "login", "account details", "verify your identity"],
+        "OTP_REQUEST": ["one-time code", "verification code", "OTP"],
+        "PAYMENT": ["gift card", "wire transfer", "bitcoin", "credit card", "payment"],
+        "LINK": ["click the link", "follow this link", "open this link"],
+    },
+    "es": {
+        "CREDENTIAL_REQUEST": ["contraseña", "iniciar sesión", "verificar su identidad"],
+        "OTP_REQUEST": ["código", "verificación"],
+        "PAYMENT": ["tarjeta regalo", "transferencia", "bitcoin", "pago"],
+        "LINK": ["haga clic en el enlace", "siga este enlace"],
+    },
+    "fr": {
+        "CREDENTIAL_REQUEST": ["mot de passe", "identifiant", "vérifier votre identité"],
+        "OTP_REQUEST": ["code", "vérification"],
+        "PAYMENT": ["carte cadeau", "virement", "bitcoin", "paiement"],
+        "LINK": ["cliquez sur le lien", "suivez ce lien"],
+    },
 }
 
+# All languages merged: {tag: [keywords]}
+INTENT_KEYWORDS = merge_packs(INTENT_KEYWORDS_BY_LANG)
+
+# Heuristic per-tag contribution
+TAG_WEIGHTS = {
+    "CREDENTIAL_REQUEST": 0.5,
+    "OTP_REQUEST": 0.5,
+    "PAYMENT": 0.3,
+    "LINK": 0.3,
+}
+
+# Compiled matchers keyed by language (None = all languages merged)
+_AUTOMATA: Dict[Optional[str], KeywordAutomaton] = {}
+
+
+def load_keyword_packs(directory: Optional[str]) -> None:
+    """Add every `*.json` pack in `directory` to INTENT_KEYWORDS_BY_LANG and rebuild the matcher."""
+    global INTENT_KEYWORDS
+    if not directory:
+        return
+    for path in sorted(Path(directory).glob("*.json")):
+        lang, keywords = load_keyword_pack(path)
+        pack = INTENT_KEYWORDS_BY_LANG.setdefault(lang, {})
+        for tag, keys in keywords.items():
+            pack[tag] = list(dict.fromkeys([*pack.get(tag, []), *keys]))
+    INTENT_KEYWORDS = merge_packs(INTENT_KEYWORDS_BY_LANG)
+    _AUTOMATA.clear()
+
+
+def keyword_automaton(lang: Optional[str] = None) -> KeywordAutomaton:
+    """Matcher compiled once per language from its pack; all languages for None or a language without a pack."""
+    if lang not in INTENT_KEYWORDS_BY_LANG:
+        lang = None
+    automaton = _AUTOMATA.get(lang)
+    if automaton is None:
+        keywords = INTENT_KEYWORDS if lang is None else merge_packs(INTENT_KEYWORDS_BY_LANG, [lang])
+        automaton = _AUTOMATA[lang] = KeywordAutomaton(keywords)
+    return automaton
+
 
 @dataclass
 class IntentResult:
     score: float
     tags: List[str]
     rationale: str
+    hit_counts: Dict[str, int] = field(default_factory=dict)
 
 
-def _llm_refine_intent(text: str, api_key: Optional[str]) -> Optional[IntentResult]:
-    if not api_key or not text or OpenAI is None:
-        return None
-    try:
-        client = OpenAI(api_key=api_key)
-        prompt = (
-            "Classify potential scam intent from the following transcript in EN/ES/FR.\n"
-            "Return JSON with fields: score (0..1), tags (array from {CREDENTIAL_REQUEST,OTP_REQUEST,PAYMENT,LINK}), rationale (short).\n"
-            f"Transcript: {text}\n"
-        )
-        # Using Responses API to keep payload small and deterministic
-        resp = client.responses.create(
-            model="gpt-4o-mini",
-            input=prompt,
-        )
-        content = resp.output_text  # type: ignore[attr-defined]
-        import json  # local import to avoid top-level dep
-
-        data = json.loads(content)
-        score = float(max(0.0, min(1.0, data.get("score", 0.0))))
-        tags = [t for t in data.get("tags", []) if isinstance(t, str)]
-        rationale = str(data.get("rationale", ""))
-        return IntentResult(score=score, tags=tags, rationale=rationale or "llm")
-    except Exception:
-        return None
-
-
-def score_intent(transcript_fragment: str, api_key: Optional[str] = None) -> IntentResult:
-    if not transcript_fragment:
-        return IntentResult(0.0, [], "no speech")
-
-    text = transcript_fragment.lower()
-    hits: List[str] = []
-    score = 0.0
-
-    for tag, keys in INTENT_KEYWORDS.items():
-        matched = any(k in text for k in keys)
-        if matched:
-            hits.append(tag)
-            # Heuristic per-tag contribution
-            if tag in ("CREDENTIAL_REQUEST", "OTP_REQUEST"):
-                score += 0.5
-            elif tag in ("PAYMENT", "LINK"):
-                score += 0.3
+LLM_TAGS = ("CREDENTIAL_REQUEST", "OTP_REQUEST", "PAYMENT", "LINK")
 
-    score = max(0.0, min(1.0, score))
-    rationale = ", ".join(hits) if hits else "no risky keywords"
 
-    # Optionally refine with LLM if available
-    refined = _llm_refine_intent(transcript_fragment, api_key)
-    if refined is not None:
-        # Merge heuristics with LLM refinement: max score and union tags
-        merged_score = max(score, refined.score)
-        merged_tags = sorted(list({*hits, *refined.tags}))
-        merged_rationale = refined.rationale or rationale
-        return IntentResult(score=merged_score, tags=merged_tags, rationale=merged_rationale)
+def build_llm_prompt(text: str, summary: Optional[str] = None) -> str:
+    """Build the classification prompt.
+
+    With `summary` set (even empty), the model is also asked for a rolling
+    summary, and `text` is treated as the recent part of a longer call.
+    """
+    prompt = (
+        "Classify potential scam intent from the following transcript in EN/ES/FR.\n"
+        "Return JSON with fields: score (0..1), tags (array from {CREDENTIAL_REQUEST,OTP_REQUEST,PAYMENT,LINK}), rationale (short)"
+    )
+    if summary is None:
+        return prompt + ".\n" + f"Transcript: {text}\n"
+    prompt += ", summary (<= 60 words, covering the whole conversation so far).\n"
+    if summary:
+        prompt += f"Summary of earlier conversation: {summary}\n"
+    return prompt + f"Recent transcript: {text}\n"
+
 
-    return IntentResult(score=score, tags=hits, rationale=rationale)
+def parse_llm_intent(content: str) -> Tuple[IntentResult, str]:
+    """Parse the model's JSON reply into (IntentResult, summary); raises ValueError if unusable."""
+    import json  # local import to avoid top-level dep
 
+    start, end = content.find("{"), content.rfind("}")
+    if start < 0 or end <= start:
+        raise ValueError("no JSON object in LLM reply")
+    data = json.loads(content[start : end + 1])
+    score = float(max(0.0, min(1.0, float(data.get("score", 0.0)))))
+    tags = [t for t in data.get("tags", []) if isinstance(t, str) and t in LLM_TAGS]
+    rationale = str(data.get("rationale", ""))
+    summary = str(data.get("summary", "") or "")
+    return IntentResult(score=score, tags=tags, rationale=rationale or "llm"), summary
 
+
+def _keyword_result(counts: Dict[str, int], tags_order: List[str]) -> IntentResult:
+    hits = [tag for tag in tags_order if counts.get(tag)]
+    score = sum(TAG_WEIGHTS.get(tag, 0.0) for tag in hits)
+    score = max(0.0, min(1.0, score))
+    rationale = ", ".join(hits) if hits else "no risky keywords"
+    return IntentResult(score=score, tags=hits, rationale=rationale, hit_counts=dict(counts))
+
+
+def merge_refinement(base: IntentResult, refined: Optional[IntentResult]) -> IntentResult:
+    """Merge keyword heuristics with an LLM refinement: max score and union tags."""
+    if refined is None:
+        return base
+    return IntentResult(
+        score=max(base.score, refined.score),
+        tags=sorted(list({*base.tags, *refined.tags})),
+        rationale=refined.rationale or base.rationale,
+        hit_counts=base.hit_counts,
+    )
+
+
+class IntentScanner:
+    """Per-session keyword scoring over a growing (append-only) transcript.
+
+    Each `update` scans only the text appended since the previous call, with
+    automaton state carried over, so cost is O(new text) rather than
+    O(call length x keyword count).
+    """
+
+    def __init__(self, automaton: Optional[KeywordAutomaton] = None) -> None:
+        self.automaton = automaton or keyword_automaton()
+        self._scanner = KeywordScanner(self.automaton)
+        self._consumed = 0
+
+    @property
+    def positions(self) -> Dict[str, List[int]]:
+        return self._scanner.positions
+
+    def update(self, transcript: str) -> IntentResult:
+        if not transcript:
+            return IntentResult(0.0, [], "no speech")
+        if len(transcript) > self._consumed:
+            self._scanner.feed(transcript[self._consumed :])
+            self._consumed = len(transcript)
+        return _keyword_result(self._scanner.counts, self.automaton.tags)
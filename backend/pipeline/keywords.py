@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import json
+import unicodedata
+from pathlib import Path
+
+# Keywords of at most this many (normalized) characters match whole words only, so "OTP"
+# does not fire inside "footpath"; longer ones stay substring matches (plurals, inflections).
+WHOLE_WORD_MAX_LEN = 4
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+def normalize_text(text: str) -> str:
+    """Casefold and strip accents so "Código" and "codigo" match the same pattern."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over tagged keywords.
+
+    Built once from {tag: [keywords]}; keywords are normalized with
+    `normalize_text`. Matching is substring-based (same semantics as the
+    previous `k in text` checks), except that keywords of at most
+    `whole_word_max_len` characters must not touch a letter or digit on
+    either side. Runs in O(len(text) + matches).
+    """
+
+    def __init__(self, patterns: Mapping[str, Iterable[str]], whole_word_max_len: int = WHOLE_WORD_MAX_LEN) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (tag, normalized keyword) pairs ending here, including via fail links
+        self._out: List[List[Tuple[str, str]]] = [[]]
+        self.tags: List[str] = list(patterns)
+        self.whole_word: Set[str] = set()  # normalized keywords that need word boundaries
+        self.max_len = 0
+        for tag, keys in patterns.items():
+            for key in keys:
+                norm = normalize_text(key)
+                if norm:
+                    self._add(tag, norm)
+                    self.max_len = max(self.max_len, len(norm))
+                    if len(norm) <= whole_word_max_len:
+                        self.whole_word.add(norm)
+        self._build()
+
+    def _add(self, tag: str, key: str) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        if (tag, key) not in self._out[state]:
+            self._out[state].append((tag, key))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def step(self, state: int, ch: str) -> int:
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def scanner(self) -> "KeywordScanner":
+        return KeywordScanner(self)
+
+    def find_all(self, text: str) -> List[Tuple[str, str, int]]:
+        """One-shot scan of `text` (its end counts as a word boundary); see `KeywordScanner.feed`."""
+        scanner = self.scanner()
+        return scanner.feed(text) + scanner.flush()
+
+
+class KeywordScanner:
+    """Incremental scanner that carries automaton state between `feed` calls.
+
+    Feed only the newly appended transcript suffix; matches spanning the
+    boundary between two feeds are still found. Positions are end offsets in
+    the normalized text stream.
+
+    A whole-word match ending at the last character fed so far is pending
+    until the next character shows whether the word goes on. `counts` and
+    `positions` include pending matches (the transcript grows by whole
+    words, so its current end is a word end); `feed` returns them only once
+    confirmed, or `flush` at the end of the text.
+    """
+
+    def __init__(self, automaton: KeywordAutomaton, max_positions: int = 32) -> None:
+        self.automaton = automaton
+        self.max_positions = int(max_positions)
+        self.state = 0
+        self.offset = 0
+        self._counts: Dict[str, int] = {}
+        self._positions: Dict[str, List[int]] = {}
+        self._pending: List[Tuple[str, str, int]] = []
+        self._recent: Deque[str] = deque(maxlen=automaton.max_len + 1)  # for the left boundary
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        counts = dict(self._counts)
+        for tag, _, _ in self._pending:
+            counts[tag] = counts.get(tag, 0) + 1
+        return counts
+
+    @property
+    def positions(self) -> Dict[str, List[int]]:
+        positions = {tag: list(pos) for tag, pos in self._positions.items()}
+        for tag, _, end in self._pending:
+            pos = positions.setdefault(tag, [])
+            if len(pos) < self.max_positions:
+                pos.append(end)
+        return positions
+
+    def _record(self, match: Tuple[str, str, int]) -> None:
+        tag = match[0]
+        self._counts[tag] = self._counts.get(tag, 0) + 1
+        pos = self._positions.setdefault(tag, [])
+        if len(pos) < self.max_positions:
+            pos.append(match[2])
+
+    def feed(self, text: str) -> List[Tuple[str, str, int]]:
+        """Scan `text`; returns new (tag, keyword, end_position) matches."""
+        matches: List[Tuple[str, str, int]] = []
+        ac = self.automaton
+        state = self.state
+        recent = self._recent
+        for ch in normalize_text(text):
+            if self._pending:
+                if not _is_word_char(ch):
+                    matches.extend(self._pending)
+                    for m in self._pending:
+                        self._record(m)
+                self._pending = []  # else: the keyword was the start of a longer word
+            state = ac.step(state, ch)
+            self.offset += 1
+            recent.append(ch)
+            for tag, key in ac._out[state]:
+                match = (tag, key, self.offset)
+                if key in ac.whole_word:
+                    if _is_word_char(key[0]) and len(recent) > len(key) and _is_word_char(recent[-len(key) - 1]):
+                        continue
+                    if _is_word_char(key[-1]):
+                        self._pending.append(match)
+                        continue
+                matches.append(match)
+                self._record(match)
+        self.state = state
+        return matches
+
+    def flush(self) -> List[Tuple[str, str, int]]:
+        """End of text: confirm pending whole-word matches and return them."""
+        matches, self._pending = self._pending, []
+        for m in matches:
+            self._record(m)
+        return matches
+
+
+def load_keyword_pack(path: str | Path) -> Tuple[str, Dict[str, List[str]]]:
+    """Load a JSON keyword pack: {"lang": "de", "keywords": {"PAYMENT": [...], ...}}."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    lang = str(data.get("lang") or Path(path).stem)
+    raw = data.get("keywords", {})
+    keywords = {str(tag): [str(k) for k in keys] for tag, keys in raw.items() if isinstance(keys, list)}
+    return lang, keywords
+
+
+def merge_packs(
+    packs: Mapping[str, Mapping[str, Iterable[str]]], langs: Optional[Iterable[str]] = None
+) -> Dict[str, List[str]]:
+    """Merge {lang: {tag: keywords}} into {tag: keywords}, optionally restricted to `langs`."""
+    wanted = set(langs) if langs is not None else None
+    merged: Dict[str, List[str]] = {}
+    for lang, tags in packs.items():
+        if wanted is not None and lang not in wanted:
+            continue
+        for tag, keys in tags.items():
+            bucket = merged.setdefault(tag, [])
+            for k in keys:
+                if k not in bucket:
+                    bucket.append(k)
+    return merged
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Speaker key used when there is no diarization (all audio is "the caller")
+DEFAULT_SPEAKER = "caller"
+
+
+def language_probs(model: Any, audio: np.ndarray) -> List[Tuple[str, float]]:
+    """(language, probability) pairs from a Whisper model's language-ID head, most likely first.
+
+    Uses `model.detect_language` (faster-whisper >= 1.1, stub and inference
+    server proxies); older faster-whisper versions detect the language when
+    `transcribe` is called, before any segment is decoded, so the lazy
+    segment generator is simply not consumed.
+    """
+    detect = getattr(model, "detect_language", None)
+    if detect is not None:
+        language, probability, all_probs = detect(audio)
+        ranked = [(str(lang), float(p)) for lang, p in (all_probs or [])]
+        return ranked or [(str(language), float(probability))]
+    _, info = model.transcribe(audio, beam_size=1, vad_filter=False, language=None)
+    ranked = [(str(lang), float(p)) for lang, p in (getattr(info, "all_language_probs", None) or [])]
+    return ranked or [(str(info.language), float(info.language_probability))]
+
+
+def detect_language(
+    model: Any, audio: np.ndarray, allowed: Optional[Iterable[str]] = None
+) -> Tuple[Optional[str], float]:
+    """Most likely language of `audio` (restricted to `allowed` if given) and its probability."""
+    ranked = language_probs(model, audio)
+    if allowed:
+        wanted = set(allowed)
+        ranked = [(lang, p) for lang, p in ranked if lang in wanted]
+    if not ranked:
+        return None, 0.0
+    return max(ranked, key=lambda lp: lp[1])
+
+
+@dataclass
+class LanguageDecision:
+    """Language-ID state of one speaker."""
+
+    language: Optional[str] = None  # most confident guess so far
+    confidence: float = 0.0
+    final: bool = False
+    attempts: int = 0
+
+
+class _SpeakerSpeech:
+    def __init__(self, capacity: int, first_at: int) -> None:
+        self.speech = np.zeros(capacity, dtype=np.float32)
+        self.filled = 0
+        self.next_at = first_at  # voiced samples needed before the next detection
+        self.decision = LanguageDecision()
+
+
+class LanguageIdentifier:
+    """Per-session language decision, made once per speaker on voiced speech.
+
+    Voiced frames (per `vad.frame_mask`) of the current speaker are collected
+    until `min_speech_seconds` are available; one detection then runs on them
+    (`due()` / `window()` / `update()`). A result with probability of at least
+    `min_confidence` is final for that speaker. A less confident one is
+    re-checked on the longer window each time another `recheck_seconds` of
+    speech arrived, and once `max_speech_seconds` are buffered the most
+    confident guess so far becomes final. Decisions are cached per speaker
+    label, so a returning speaker is not identified again.
+    """
+
+    def __init__(
+        self,
+        vad,
+        min_speech_seconds: float = 3.0,
+        recheck_seconds: float = 3.0,
+        max_speech_seconds: float = 12.0,
+        min_confidence: float = 0.7,
+        sample_rate: int = 16000,
+    ) -> None:
+        self.vad = vad
+        self.min_speech_samples = int(min_speech_seconds * sample_rate)
+        self.recheck_samples = max(1, int(recheck_seconds * sample_rate))
+        self.max_speech_samples = max(self.min_speech_samples, int(max_speech_seconds * sample_rate))
+        self.min_confidence = float(min_confidence)
+        self.speaker = DEFAULT_SPEAKER
+        self._speakers: Dict[str, _SpeakerSpeech] = {}
+
+    def _current(self) -> _SpeakerSpeech:
+        track = self._speakers.get(self.speaker)
+        if track is None:
+            track = self._speakers[self.speaker] = _SpeakerSpeech(self.max_speech_samples, self.min_speech_samples)
+        return track
+
+    @property
+    def decision(self) -> LanguageDecision:
+        return self._current().decision
+
+    @property
+    def language(self) -> Optional[str]:
+        """Final language of the current speaker, or None while still undecided."""
+        decision = self.decision
+        return decision.language if decision.final else None
+
+    def decisions(self) -> Dict[str, LanguageDecision]:
+        return {spk: track.decision for spk, track in self._speakers.items()}
+
+    def push(self, samples: np.ndarray, speaker: Optional[str] = None) -> int:
+        """Switch to `speaker` (if given) and keep its voiced frames of `samples` until it is decided."""
+        if speaker is not None:
+            self.speaker = speaker
+        track = self._current()
+        if track.decision.final or samples is None or samples.size == 0:
+            return 0
+        mask = self.vad.frame_mask(samples)
+        voiced = samples[np.repeat(mask, self.vad.frame_len)[: samples.shape[0]]]
+        k = min(voiced.shape[0], self.max_speech_samples - track.filled)
+        if k <= 0:
+            return 0
+        track.speech[track.filled : track.filled + k] = voiced[:k]
+        track.filled += k
+        return int(k)
+
+    def due(self) -> bool:
+        track = self._current()
+        return not track.decision.final and track.filled >= min(track.next_at, self.max_speech_samples)
+
+    def window(self) -> np.ndarray:
+        """Copy of the current speaker's buffered speech (at most `max_speech_seconds`)."""
+        track = self._current()
+        return track.speech[: track.filled].copy()
+
+    def update(self, language: Optional[str], confidence: float) -> Optional[str]:
+        """Record a detection for the current speaker; returns the language once it is final."""
+        track = self._current()
+        decision = track.decision
+        decision.attempts += 1
+        if language and (decision.language is None or confidence >= decision.confidence):
+            decision.language = language
+            decision.confidence = float(confidence)
+        confident = bool(decision.language) and decision.confidence >= self.min_confidence
+        # With a full window the best guess is final (None if detection never answered)
+        if confident or track.filled >= self.max_speech_samples:
+            decision.final = True
+            track.speech = np.zeros(0, dtype=np.float32)  # no longer needed
+        else:
+            track.next_at = track.filled + self.recheck_samples
+        return self.language
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Optional, Protocol, Tuple
+import asyncio
+import hashlib
+import logging
+import time
+
+from pipeline.intent import IntentResult, build_llm_prompt, parse_llm_intent
+
+
+class LLMBackend(Protocol):
+    async def complete(self, prompt: str) -> str: ...
+
+    async def close(self) -> None: ...
+
+
+class OpenAICompatibleBackend:
+    """Chat-completions backend with one persistent HTTP connection pool.
+
+    `base_url` may point at any OpenAI-compatible server, e.g. the local stub
+    in `scripts/llm_stub_server.py` for tests and offline deployments.
+    """
+
+    def __init__(self, api_key: Optional[str], model: str = "gpt-4o-mini", base_url: Optional[str] = None) -> None:
+        try:
+            from openai import AsyncOpenAI  # type: ignore  # optional dependency, imported only when configured
+        except Exception:
+            raise RuntimeError("openai package not installed")
+        self.model = model
+        # Local stubs accept any key; the client refuses to start without one
+        self._client = AsyncOpenAI(api_key=api_key or "local", base_url=base_url, max_retries=0)
+
+    async def complete(self, prompt: str) -> str:
+        resp = await self._client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+        )
+        return resp.choices[0].message.content or ""
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+@dataclass
+class RefinerStats:
+    requests: int = 0
+    cache_hits: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    coalesced: int = 0
+
+
+class IntentRefiner:
+    """Shared asynchronous LLM refinement service.
+
+    - One backend (and HTTP pool) for all sessions.
+    - LRU cache of replies keyed by a hash of the incoming summary and the
+      transcript window, so a hit never hands one session another's summary.
+    - Per-call timeout; on timeout or error the session keeps its previous
+      refinement, so fusion falls back to the keyword score.
+    Sessions interact through `session()`, which handles debounce/coalescing.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        timeout_s: float = 4.0,
+        cache_size: int = 512,
+        debounce_s: float = 2.0,
+        context_chars: int = 1500,
+        min_growth_chars: int = 40,
+        metrics=None,
+    ) -> None:
+        self.backend = backend
+        self.metrics = metrics  # optional utils.metrics.Metrics
+        self.timeout_s = float(timeout_s)
+        self.cache_size = int(cache_size)
+        self.debounce_s = float(debounce_s)
+        self.context_chars = int(context_chars)
+        self.min_growth_chars = int(min_growth_chars)
+        self._cache: "OrderedDict[str, Tuple[IntentResult, str]]" = OrderedDict()
+        self.stats = RefinerStats()
+        self._logger = logging.getLogger("vss")
+
+    def session(self) -> "RefinerSession":
+        return RefinerSession(self)
+
+    async def refine(self, text: str, summary: Optional[str] = "") -> Optional[Tuple[IntentResult, str]]:
+        """Return (result, new_summary) for `text`, or None on timeout/error."""
+        # The reply (and its new summary) depends on the incoming summary as well as the window, so
+        # both are hashed; otherwise sessions sharing a window would adopt each other's summary
+        h = hashlib.sha1(b"n:" if summary is None else b"s:" + summary.encode("utf-8") + b"\0")
+        h.update(text.encode("utf-8"))
+        key = h.hexdigest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats.cache_hits += 1
+            return cached
+        prompt = build_llm_prompt(text, summary)
+        self.stats.requests += 1
+        timer = self.metrics.timer("llm") if self.metrics is not None else nullcontext()
+        try:
+            with timer:
+                content = await asyncio.wait_for(self.backend.complete(prompt), timeout=self.timeout_s)
+            out = parse_llm_intent(content)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            return None
+        except Exception as e:
+            self.stats.errors += 1
+            self._logger.warning("LLM refinement failed: %s", e)
+            return None
+        self._cache[key] = out
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return out
+
+    async def close(self) -> None:
+        try:
+            await self.backend.close()
+        except Exception:
+            pass
+
+
+class RefinerSession:
+    """Per-session request coalescing on top of `IntentRefiner`.
+
+    `submit()` never blocks: at most one request per session is in flight;
+    transcripts submitted meanwhile are coalesced into a single follow-up
+    request (with the newest text) sent no sooner than `debounce_s` after
+    the previous one. Once the transcript outgrows `context_chars`, only the
+    recent tail is sent together with the rolling summary from the last reply.
+    """
+
+    def __init__(self, refiner: IntentRefiner) -> None:
+        self.refiner = refiner
+        self.result: Optional[IntentResult] = None
+        self.summary = ""
+        self._sent_len = 0
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_sent_at = 0.0
+
+    def submit(self, transcript: str) -> None:
+        if not transcript or len(transcript) < self._sent_len + self.refiner.min_growth_chars:
+            return
+        if self._task is not None and not self._task.done():
+            if self._pending is not None:
+                self.refiner.stats.coalesced += 1
+            self._pending = transcript
+            return
+        self._pending = None
+        self._sent_len = len(transcript)
+        self._task = asyncio.create_task(self._run(transcript))
+
+    async def _run(self, transcript: str) -> None:
+        while transcript is not None:
+            wait = self._last_sent_at + self.refiner.debounce_s - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_sent_at = time.monotonic()
+            ctx = self.refiner.context_chars
+            text = transcript[-ctx:] if len(transcript) > ctx else transcript
+            # The summary only stands in for text that no longer fits in the window
+            out = await self.refiner.refine(text, self.summary if len(transcript) > ctx else "")
+            if out is not None:
+                self.result, new_summary = out
+                if new_summary:
+                    self.summary = new_summary
+            # Pick up whatever arrived while this request was in flight (newest only)
+            transcript, self._pending = self._pending, None
+            if transcript is not None:
+                self._sent_len = len(transcript)
+
+    def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+def build_refiner(
+    api_key: Optional[str],
+    base_url: Optional[str] = None,
+    model: str = "gpt-4o-mini",
+    **kwargs,
+) -> Optional[IntentRefiner]:
+    """Create the shared refiner, or None when no LLM backend is configured/installed."""
+    if not api_key and not base_url:
+        return None
+    try:
+        backend = OpenAICompatibleBackend(api_key=api_key, model=model, base_url=base_url)
+    except Exception as e:
+        logging.getLogger("vss").info("LLM refinement unavailable: %s", e)
+        return None
+    return IntentRefiner(backend, **kwargs)
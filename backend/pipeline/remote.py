@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import atexit
+import logging
+import socket
+import threading
+import time
+
+import numpy as np
+
+from utils.ipc import ShmArena, recv_msg, send_msg
+
+
+class InferenceClient:
+    """Blocking client for `inference_server.py`, used from inference worker threads.
+
+    Each calling thread keeps its own connection to the server's unix socket,
+    so concurrent stage calls do not serialise on one stream. Audio arguments
+    are written into this process's `ShmArena` and passed by reference; the
+    server reads them in place. The arena is created on first use, i.e. after
+    uvicorn forked its workers.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        shm_bytes: int = 64 * 1024 * 1024,
+        timeout_s: float = 30.0,
+        connect_timeout_s: float = 120.0,
+    ) -> None:
+        self.socket_path = socket_path
+        self.shm_bytes = int(shm_bytes)
+        self.timeout_s = float(timeout_s)
+        self.connect_timeout_s = float(connect_timeout_s)
+        self._arena: Optional[ShmArena] = None
+        self._arena_lock = threading.Lock()
+        self._local = threading.local()
+        self._status: Optional[Dict[str, Any]] = None
+        self._logger = logging.getLogger("vss")
+
+    @property
+    def arena(self) -> ShmArena:
+        if self._arena is None:
+            with self._arena_lock:
+                if self._arena is None:
+                    self._arena = ShmArena(self.shm_bytes)
+                    atexit.register(self._arena.close)
+        return self._arena
+
+    def _sock(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_s)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_sock(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def call(
+        self, op: str, arrays: Sequence[np.ndarray] = (), writeback: bool = False, **params: Any
+    ) -> Tuple[Any, List[np.ndarray]]:
+        """Run `op` on the server; returns (result, copies of `arrays` as rewritten by the server if `writeback`)."""
+        lease = None
+        msg: Dict[str, Any] = {"op": op, **params}
+        if arrays:
+            lease = self.arena.write([np.asarray(a, dtype=np.float32) for a in arrays], timeout=self.timeout_s)
+            msg["shm"] = self.arena.name
+            msg["audio"] = lease.refs()
+        try:
+            for attempt in range(2):
+                try:
+                    sock = self._sock()
+                    send_msg(sock, msg)
+                    resp = recv_msg(sock)
+                    break
+                except (ConnectionError, OSError):
+                    # Stale connection (e.g. server restarted): reconnect once
+                    self._drop_sock()
+                    if attempt:
+                        raise
+            if "error" in resp:
+                raise RuntimeError(f"inference server {op} failed: {resp['error']}")
+            out = [self.arena.view(off, n).copy() for off, n in lease.slices] if (writeback and lease) else []
+            return resp.get("result"), out
+        finally:
+            if lease is not None:
+                self.arena.release(lease)
+
+    def status(self, wait: bool = True) -> Dict[str, Any]:
+        """Server model availability; with `wait`, retries until the server answers or connect_timeout_s passes."""
+        deadline = time.monotonic() + (self.connect_timeout_s if wait else 0.0)
+        while True:
+            try:
+                self._status, _ = self.call("status")
+                return self._status
+            except (ConnectionError, OSError) as e:
+                if time.monotonic() >= deadline:
+                    self._logger.warning("inference server at %s unreachable: %s", self.socket_path, e)
+                    return {"models": {}}
+                time.sleep(0.5)
+
+    def model_available(self, name: str) -> bool:
+        status = self._status if self._status is not None else self.status()
+        return bool(status.get("models", {}).get(name))
+
+    def close(self) -> None:
+        self._drop_sock()
+        if self._arena is not None:
+            self._arena.close()
+            self._arena = None
+
+
+class RemoteSpoofScorer:
+    """`AASISTScorer` stand-in whose windows are scored (and batched across workers) by the inference server."""
+
+    def __init__(self, client: InferenceClient, target_samples: int = 64600) -> None:
+        self.client = client
+        self.available = False
+        self.target_samples = int(target_samples)
+
+    def load(self) -> bool:
+        status = self.client.status()
+        self.available = bool(status.get("models", {}).get("spoof"))
+        self.target_samples = int(status.get("spoof_target_samples", self.target_samples))
+        return self.available
+
+    def score_batch(self, batch: List[np.ndarray]) -> List[float]:
+        results = [0.0] * len(batch)
+        idx = [i for i, x in enumerate(batch) if x is not None and getattr(x, "size", 0) > 0]
+        if not idx or not self.available:
+            return results
+        scores, _ = self.client.call("spoof", [batch[i] for i in idx])
+        for i, sc in zip(idx, scores):
+            results[i] = float(sc)
+        return results
+
+    def score(self, samples: np.ndarray, sample_rate: int = 16000) -> float:
+        return self.score_batch([samples])[0]
+
+
+class RemoteDiarizer:
+    """`OnlineDiarizer` stand-in backed by the inference server (same model-level API).
+
+    The enrolled user embedding is owned by the server: `/enroll` on any
+    worker sets it there, and every worker re-reads it at most every
+    `user_refresh_s` along with its diarization calls (on the diarization
+    thread, never on the event loop), so user exclusion agrees across workers.
+    """
+
+    def __init__(self, client: InferenceClient, user_refresh_s: float = 1.0) -> None:
+        self.client = client
+        self.available = False
+        self.has_embedder = False
+        self.user_embedding: Optional[np.ndarray] = None
+        self.user_refresh_s = float(user_refresh_s)
+        self._user_checked = 0.0
+
+    def load(self) -> bool:
+        status = self.client.status()
+        self.available = bool(status.get("models", {}).get("diarization"))
+        self.has_embedder = bool(status.get("diar_embedder"))
+        self._set_user(status.get("user_embedding"))
+        return self.available
+
+    def _set_user(self, emb: Optional[List[float]]) -> None:
+        self.user_embedding = None if emb is None else np.asarray(emb, dtype=np.float32)
+        self._user_checked = time.monotonic()
+
+    def refresh_user_embedding(self) -> None:
+        """Pick up an enrollment made through another worker (rate-limited to `user_refresh_s`)."""
+        if time.monotonic() - self._user_checked < self.user_refresh_s:
+            return
+        try:
+            emb, _ = self.client.call("diar_user")
+        except Exception:
+            return
+        self._set_user(emb)
+
+    def segments(self, audio: np.ndarray, sample_rate: int) -> List[Tuple[float, float, str]]:
+        turns, _ = self.client.call("diar_segments", [audio], sample_rate=sample_rate)
+        self.refresh_user_embedding()
+        return [(float(s), float(e), str(spk)) for s, e, spk in turns]
+
+    def embed(self, audio: np.ndarray) -> np.ndarray:
+        emb, _ = self.client.call("diar_embed", [audio])
+        return np.asarray(emb, dtype=np.float32)
+
+    def select_caller(self, audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, Optional[str]]:
+        if not self.available:
+            return audio, None
+        try:
+            # The server masks the window in place in shared memory
+            speaker, (masked,) = self.client.call(
+                "diar_select_caller", [audio], writeback=True, sample_rate=sample_rate
+            )
+            return masked, speaker
+        except Exception:
+            return audio, None
+
+    def enroll_user(self, audio: np.ndarray, sample_rate: int) -> bool:
+        if not self.available:
+            return False
+        emb, _ = self.client.call("diar_enroll", [audio], sample_rate=sample_rate)
+        if emb is None:
+            return False
+        self._set_user(emb)
+        return True
+
+
+class RemoteWhisperModel:
+    """`faster_whisper.WhisperModel` stand-in: `transcribe` runs on the inference server.
+
+    Segments come back materialised (text plus word timings), wrapped so the
+    streamer can consume them exactly like faster-whisper's lazy generator.
+    """
+
+    def __init__(
+        self, client: InferenceClient, model_size: str, device: str = "cpu", compute_type: str = "int8"
+    ) -> None:
+        self.client = client
+        self.model_size = model_size
+        self.compute_type = compute_type
+
+    @staticmethod
+    def _unpack(res: Dict[str, Any]) -> Tuple[List[Any], Any]:
+        segments = [
+            SimpleNamespace(
+                text=seg["text"],
+                words=(
+                    None
+                    if seg["words"] is None
+                    else [SimpleNamespace(start=s, end=e, word=w) for s, e, w in seg["words"]]
+                ),
+            )
+            for seg in res["segments"]
+        ]
+        return segments, SimpleNamespace(language=res["language"], language_probability=res["language_probability"])
+
+    def transcribe(self, audio: np.ndarray, **kwargs: Any):
+        res, _ = self.client.call(
+            "asr", [audio], model_size=self.model_size, compute_type=self.compute_type, options=kwargs
+        )
+        segments, info = self._unpack(res)
+        return iter(segments), info
+
+    def transcribe_batch(self, audios: List[np.ndarray], options: List[Dict[str, Any]]) -> List[Tuple[List[Any], Any]]:
+        """One round trip for a whole `BatchingAsrDecoder` batch; the server decodes it as one batch too."""
+        results, _ = self.client.call(
+            "asr_batch", list(audios), model_size=self.model_size, compute_type=self.compute_type, options=list(options)
+        )
+        return [self._unpack(res) for res in results]
+
+    def detect_language(self, audio: np.ndarray):
+        res, _ = self.client.call("asr_lid", [audio], model_size=self.model_size, compute_type=self.compute_type)
+        probs = [(lang, float(p)) for lang, p in res]
+        return probs[0][0], probs[0][1], probs
+
+
+def remote_whisper_factory(client: InferenceClient):
+    """`WhisperModelPool(model_factory=...)` hook; raises when the server has no ASR so the pool records it as unavailable."""
+
+    def factory(model_size: str, device: str = "cpu", compute_type: str = "int8", **_: Any) -> RemoteWhisperModel:
+        if not client.model_available("asr"):
+            raise RuntimeError("inference server has no ASR model")
+        return RemoteWhisperModel(client, model_size, device, compute_type)
+
+    return factory
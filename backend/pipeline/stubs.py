@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import List, Optional
+import time
+
+import numpy as np
+
+
+class StubWhisperModel:
+    """Stand-in for `faster_whisper.WhisperModel` used by load benchmarks.
+
+    Burns `rtf` seconds of wall time per second of audio (sleeping, so it
+    behaves like a GIL-releasing decoder) and emits one placeholder word per
+    voiced 0.5 s so the streaming/commit logic still gets exercised.
+    """
+
+    WORDS = ["hello", "this", "is", "your", "bank", "please", "verify", "the", "code"]
+
+    def __init__(
+        self, model_size: str = "stub", device: str = "cpu", compute_type: str = "int8", rtf: float = 0.05, **_
+    ) -> None:
+        self.rtf = float(rtf)
+
+    def transcribe(self, audio: np.ndarray, word_timestamps: bool = False, language: Optional[str] = None, **_):
+        if self.rtf > 0:
+            time.sleep(audio.shape[0] / 16000.0 * self.rtf)
+        return self._decode(audio, word_timestamps, language)
+
+    def transcribe_batch(self, audios: List[np.ndarray], options: List[dict]):
+        if self.rtf > 0:
+            # Padded to the longest window; extra items cost a fraction, roughly like a batched decode
+            longest = max(a.shape[0] for a in audios) / 16000.0
+            time.sleep(longest * self.rtf * (1.0 + 0.25 * (len(audios) - 1)))
+        out = []
+        for audio, opts in zip(audios, options):
+            segments, info = self._decode(audio, bool(opts.get("word_timestamps")), opts.get("language"))
+            out.append((list(segments), info))
+        return out
+
+    def detect_language(self, audio: np.ndarray):
+        if self.rtf > 0:
+            # Encoder pass only
+            time.sleep(min(audio.shape[0] / 16000.0, 30.0) * self.rtf * 0.25)
+        probs = [("en", 0.9), ("es", 0.06), ("fr", 0.04)]
+        return probs[0][0], probs[0][1], probs
+
+    def _decode(self, audio: np.ndarray, word_timestamps: bool, language: Optional[str]):
+        words = []
+        step = 8000
+        for i in range(0, audio.shape[0] - step + 1, step):
+            if float(np.max(np.abs(audio[i : i + step]))) > 1e-3:
+                # Position-derived word keeps consecutive hypotheses consistent
+                w = self.WORDS[(i // step) % len(self.WORDS)]
+                words.append(SimpleNamespace(start=i / 16000.0, end=(i + step * 0.8) / 16000.0, word=" " + w))
+        seg = SimpleNamespace(text="".join(w.word for w in words), words=words if word_timestamps else None)
+        return iter([seg]), SimpleNamespace(language=language or "en", language_probability=1.0)
+
+
+class StubSpoofScorer:
+    """Stand-in for `AASISTScorer` with a fixed per-window cost (`latency_ms`)."""
+
+    def __init__(self, latency_ms: float = 5.0, target_samples: int = 64600) -> None:
+        self.available = True
+        self.latency_ms = float(latency_ms)
+        self.target_samples = int(target_samples)
+
+    def score_batch(self, batch: List[np.ndarray]) -> List[float]:
+        if self.latency_ms > 0:
+            # Batches amortise part of the cost, roughly like a real forward pass
+            time.sleep(self.latency_ms * (1.0 + 0.25 * (len(batch) - 1)) / 1000.0)
+        return [float(min(1.0, np.mean(np.abs(x)) * 2.0)) if x is not None and x.size else 0.0 for x in batch]
+
+    def score(self, samples: np.ndarray, sample_rate: int = 16000) -> float:
+        return self.score_batch([samples])[0]
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+
+import numpy as np
+
+# A watchlist is a directory of memory-mapped arrays:
+#   manifest.json      {"version", "dim", "count", "dtype", "ivf_clusters"}, written last
+#   embeddings.npy     [count, dim] L2-normalised rows, float32 or int8 (symmetric, one scale per row)
+#   scales.npy         [count] float32 dequantisation scales (int8 only)
+#   meta.jsonl         one JSON object per entry (id, label, source, ...), in import order
+#   meta_spans.npy     [count, 2] int64 (byte offset, length) of each row's line in meta.jsonl
+#   ivf_centroids.npy  [clusters, dim] float32 and ivf_offsets.npy [clusters + 1] int64 if an
+#                      IVF index was built; rows are then stored grouped by cluster, so every
+#                      probed list is one contiguous slice of the matrix.
+WATCHLIST_VERSION = 1
+DTYPES = ("float32", "int8")
+CHUNK_ROWS = 32768  # rows scored per matrix product; bounds temporary memory at any size
+
+_logger = logging.getLogger("vss")
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-9)
+
+
+def quantize_int8(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantisation: returns (int8 rows, float32 scales)."""
+    amax = np.max(np.abs(rows), axis=1)
+    scales = np.where(amax > 0, amax / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.rint(rows / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales
+
+
+def _dequantize(rows: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    if scales is None:
+        return np.asarray(rows, dtype=np.float32)
+    return rows.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def match_signal(score: float, threshold: float) -> float:
+    """Map a cosine match score to the 0..1 `voice_match` fusion signal.
+
+    0 below `threshold`, 0.5 at it, rising linearly to 1.0 for an identical voice.
+    """
+    if score < threshold:
+        return 0.0
+    return float(min(1.0, 0.5 + 0.5 * (score - threshold) / max(1e-6, 1.0 - threshold)))
+
+
+@dataclass
+class WatchlistMatch:
+    score: float  # cosine similarity to the query embedding
+    index: int  # row in the (possibly cluster-ordered) matrix
+    meta: Dict[str, Any]
+
+
+def _merge_topk(
+    best_s: np.ndarray, best_i: np.ndarray, scores: np.ndarray, offset: int, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fold a [rows, queries] score block into the running per-query top-k."""
+    kk = min(k, scores.shape[0])
+    part = np.argpartition(-scores, kk - 1, axis=0)[:kk]
+    cand_s = np.take_along_axis(scores, part, axis=0).T
+    all_s = np.concatenate([best_s, cand_s], axis=1)
+    all_i = np.concatenate([best_i, (part + offset).T], axis=1)
+    keep = np.argpartition(-all_s, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(all_s, keep, axis=1), np.take_along_axis(all_i, keep, axis=1)
+
+
+class VoiceWatchlist:
+    """Read-only, memory-mapped index of known fraudster voice embeddings.
+
+    Search is exact cosine top-k over the whole matrix in `CHUNK_ROWS`
+    blocks, or, with an IVF index, over the `nprobe` clusters whose
+    centroids are closest to the query. Pages are shared by every process
+    that maps the same files (e.g. all uvicorn workers), and only the blocks
+    a query touches are read from disk.
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        manifest = json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("version") != WATCHLIST_VERSION:
+            raise ValueError(f"unsupported watchlist version {manifest.get('version')!r} in {self.path}")
+        self.dim = int(manifest["dim"])
+        self.count = int(manifest["count"])
+        self.dtype = str(manifest["dtype"])
+        self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        self.scales = np.load(self.path / "scales.npy", mmap_mode="r") if self.dtype == "int8" else None
+        self._spans = np.load(self.path / "meta_spans.npy", mmap_mode="r")
+        meta_path = self.path / "meta.jsonl"
+        self._meta = np.memmap(meta_path, dtype=np.uint8, mode="r") if meta_path.stat().st_size else None
+        self.centroids: Optional[np.ndarray] = None
+        self.ivf_offsets: Optional[np.ndarray] = None
+        if int(manifest.get("ivf_clusters") or 0) > 0:
+            self.centroids = np.load(self.path / "ivf_centroids.npy")
+            self.ivf_offsets = np.load(self.path / "ivf_offsets.npy")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def ivf_clusters(self) -> int:
+        return 0 if self.centroids is None else int(self.centroids.shape[0])
+
+    def rows(self, start: int, end: int) -> np.ndarray:
+        """Float32 copy of rows [start, end)."""
+        return _dequantize(self.embeddings[start:end], None if self.scales is None else self.scales[start:end])
+
+    def _meta_line(self, index: int) -> bytes:
+        off, n = (int(v) for v in self._spans[index])
+        if self._meta is None or n <= 0:
+            return b"{}"
+        return bytes(self._meta[off : off + n])
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        return json.loads(self._meta_line(index))
+
+    def _scores(self, start: int, end: int, queries: np.ndarray) -> np.ndarray:
+        # [rows, queries] cosine scores; int8 rows are scaled after the product (one multiply per score)
+        block = self.embeddings[start:end]
+        if self.scales is None:
+            return np.asarray(block, dtype=np.float32) @ queries.T
+        return (block.astype(np.float32) @ queries.T) * np.asarray(self.scales[start:end], dtype=np.float32)[:, None]
+
+    def _ranges(self, query: Optional[np.ndarray], nprobe: int) -> Iterator[Tuple[int, int]]:
+        if query is not None and self.centroids is not None and 0 < nprobe < self.ivf_clusters:
+            assert self.ivf_offsets is not None
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            for c in np.sort(probe):
+                start, end = int(self.ivf_offsets[c]), int(self.ivf_offsets[c + 1])
+                for a in range(start, end, CHUNK_ROWS):
+                    yield a, min(end, a + CHUNK_ROWS)
+            return
+        for a in range(0, self.count, CHUNK_ROWS):
+            yield a, min(self.count, a + CHUNK_ROWS)
+
+    def search_batch(self, queries: np.ndarray, k: int = 5, nprobe: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, row indices) per query, best first; missing entries are (-inf, -1).
+
+        `nprobe` > 0 searches only that many IVF clusters per query (when an
+        index exists); 0 is an exact scan.
+        """
+        q = _normalize_rows(np.atleast_2d(queries))
+        k = max(1, int(k))
+        best_s = np.full((q.shape[0], k), -np.inf, dtype=np.float32)
+        best_i = np.full((q.shape[0], k), -1, dtype=np.int64)
+        if self.count and self.centroids is not None and 0 < nprobe < self.ivf_clusters:
+            # Each query probes its own clusters
+            for j in range(q.shape[0]):
+                s, i = best_s[j : j + 1], best_i[j : j + 1]
+                for a, b in self._ranges(q[j], nprobe):
+                    s, i = _merge_topk(s, i, self._scores(a, b, q[j : j + 1]), a, k)
+                best_s[j : j + 1], best_i[j : j + 1] = s, i
+        else:
+            for a, b in self._ranges(None, 0):
+                best_s, best_i = _merge_topk(best_s, best_i, self._scores(a, b, q), a, k)
+        order = np.argsort(-best_s, axis=1)
+        return np.take_along_axis(best_s, order, axis=1), np.take_along_axis(best_i, order, axis=1)
+
+    def search(self, query: np.ndarray, k: int = 5, nprobe: int = 0) -> List[WatchlistMatch]:
+        """Top-k entries most similar to one embedding, with their metadata."""
+        scores, idx = self.search_batch(query, k, nprobe)
+        return [
+            WatchlistMatch(score=float(s), index=int(i), meta=self.metadata(int(i)))
+            for s, i in zip(scores[0], idx[0])
+            if i >= 0
+        ]
+
+
+def _train_centroids(sample: np.ndarray, clusters: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means on L2-normalised rows."""
+    centroids = sample[rng.choice(sample.shape[0], clusters, replace=False)].copy()
+    for _ in range(iters):
+        labels = _assign(sample, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=clusters)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[nonempty]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[nonempty] = _normalize_rows(sums)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            # Re-seed empty clusters on random rows
+            centroids[empty] = sample[rng.choice(sample.shape[0], empty.size, replace=False)]
+    return centroids
+
+
+def _assign(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    step = max(1024, (1 << 24) // max(1, centroids.shape[0]))  # ~64 MB of scores per block
+    out = np.empty(rows.shape[0], dtype=np.int64)
+    for a in range(0, rows.shape[0], step):
+        out[a : a + step] = np.argmax(rows[a : a + step] @ centroids.T, axis=1)
+    return out
+
+
+def build_watchlist(
+    path: str | os.PathLike,
+    embeddings: np.ndarray,
+    metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    dtype: Optional[str] = None,
+    ivf_clusters: int = 0,
+    append: bool = False,
+    seed: int = 0,
+    progress: Optional[Callable[[str], None]] = None,
+) -> VoiceWatchlist:
+    """Write (or with `append`, extend) the watchlist at `path` and return it opened.
+
+    `embeddings` may be a memory-mapped [n, dim] array; it is normalised and
+    encoded in chunks, so imports of millions of rows run in bounded memory.
+    `dtype` defaults to the existing storage type when appending, else float32.
+    An existing IVF index is rebuilt over all rows when appending (same
+    cluster count unless `ivf_clusters` is given). Files are written next to
+    the old ones and swapped in at the end, manifest last; a running server
+    keeps its mapping of the previous version until it reopens the watchlist.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    log = progress or (lambda msg: _logger.info(msg))
+    old = VoiceWatchlist(path) if append and (path / "manifest.json").exists() else None
+    dtype = dtype or (old.dtype if old is not None else "float32")
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}")
+    n_new, dim = int(embeddings.shape[0]), int(embeddings.shape[1])
+    if old is not None and old.dim != dim:
+        raise ValueError(f"embedding dim {dim} does not match the watchlist's {old.dim}")
+    if metadata is not None and len(metadata) != n_new:
+        raise ValueError(f"{len(metadata)} metadata entries for {n_new} embeddings")
+    n_old = 0 if old is None else old.count
+    total = n_old + n_new
+    if old is not None and not ivf_clusters:
+        ivf_clusters = old.ivf_clusters
+    np_dtype = np.int8 if dtype == "int8" else np.float32
+
+    def tmp(name: str) -> Path:
+        return path / (name + ".tmp")
+
+    emb = np.lib.format.open_memmap(tmp("embeddings.npy"), mode="w+", dtype=np_dtype, shape=(total, dim))
+    scales = None
+    if dtype == "int8":
+        scales = np.lib.format.open_memmap(tmp("scales.npy"), mode="w+", dtype=np.float32, shape=(total,))
+    spans = np.zeros((total, 2), dtype=np.int64)
+    row = 0
+    offset = 0
+    with open(tmp("meta.jsonl"), "wb") as meta_out:
+
+        def put(rows: np.ndarray, lines: List[bytes]) -> None:
+            nonlocal row, offset
+            n = rows.shape[0]
+            if scales is None:
+                emb[row : row + n] = rows
+            else:
+                emb[row : row + n], scales[row : row + n] = quantize_int8(rows)
+            for j, line in enumerate(lines):
+                meta_out.write(line + b"\n")
+                spans[row + j] = (offset, len(line))
+                offset += len(line) + 1
+            row += n
+
+        if old is not None:
+            # Existing rows in import order of their metadata, so meta.jsonl stays append-only
+            old_order = np.argsort(np.asarray(old._spans[:, 0]), kind="stable")
+            for a in range(0, n_old, CHUNK_ROWS):
+                idx = old_order[a : a + CHUNK_ROWS]
+                block = _dequantize(old.embeddings[idx], None if old.scales is None else old.scales[idx])
+                put(block, [old._meta_line(int(i)) for i in idx])
+        for a in range(0, n_new, CHUNK_ROWS):
+            block = _normalize_rows(embeddings[a : a + CHUNK_ROWS])
+            n = block.shape[0]
+            metas = metadata[a : a + n] if metadata is not None else [{"id": str(n_old + a + j)} for j in range(n)]
+            put(block, [json.dumps(m, separators=(",", ":")).encode("utf-8") for m in metas])
+        log(f"wrote {total} rows ({dtype}, dim {dim})")
+
+    ivf_files: Dict[str, np.ndarray] = {}
+    if ivf_clusters and total:
+        clusters = min(int(ivf_clusters), total)
+        rng = np.random.default_rng(seed)
+        sample_n = min(total, max(clusters * 32, 10000), 200_000)
+        sample_idx = np.sort(rng.choice(total, sample_n, replace=False))
+
+        def block(idx: Any) -> np.ndarray:
+            return _dequantize(emb[idx], None if scales is None else scales[idx])
+
+        sample = _normalize_rows(block(sample_idx))
+        centroids = _train_centroids(sample, clusters, iters=10, rng=rng).astype(np.float32)
+        chunks = range(0, total, CHUNK_ROWS)
+        labels = np.concatenate([_assign(block(slice(a, a + CHUNK_ROWS)), centroids) for a in chunks])
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=clusters))]).astype(np.int64)
+        # Store rows grouped by cluster so a probed list is one contiguous read
+        emb_sorted = np.lib.format.open_memmap(
+            tmp("embeddings.sorted.npy"), mode="w+", dtype=np_dtype, shape=(total, dim)
+        )
+        for a in chunks:
+            emb_sorted[a : a + CHUNK_ROWS] = emb[order[a : a + CHUNK_ROWS]]
+        emb_sorted.flush()
+        del emb_sorted
+        os.replace(tmp("embeddings.sorted.npy"), tmp("embeddings.npy"))
+        if scales is not None:
+            scales[:] = scales[order]
+        spans = spans[order]
+        ivf_files = {"ivf_centroids.npy": centroids, "ivf_offsets.npy": offsets}
+        log(f"built IVF index with {clusters} clusters")
+
+    # Drop the mappings before the files are swapped in (rebinding, not `del`: the helpers above close over them)
+    emb.flush()
+    emb = None
+    if scales is not None:
+        scales.flush()
+        scales = None
+    for name, arr in {"meta_spans.npy": spans, **ivf_files}.items():
+        with open(tmp(name), "wb") as f:  # a file object keeps np.save from appending ".npy"
+            np.save(f, arr)
+    n_clusters = int(ivf_files["ivf_centroids.npy"].shape[0]) if ivf_files else 0
+    manifest = {"version": WATCHLIST_VERSION, "dim": dim, "count": total, "dtype": dtype, "ivf_clusters": n_clusters}
+    tmp("manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    for name in ("embeddings.npy", "scales.npy", "meta.jsonl", "meta_spans.npy", *ivf_files):
+        if tmp(name).exists():
+            os.replace(tmp(name), path / name)
+    for name in ("scales.npy", "ivf_centroids.npy", "ivf_offsets.npy"):
+        stale = (name == "scales.npy" and dtype != "int8") or (name.startswith("ivf_") and not ivf_files)
+        if stale and (path / name).exists():
+            (path / name).unlink()
+    os.replace(tmp("manifest.json"), path / "manifest.json")
+    return VoiceWatchlist(path)
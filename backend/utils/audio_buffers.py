@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import numpy as np
 
+from .audio_codec import decode_into, wire_samples
+
 
 class SlidingWindowBuffer:
     """A fixed-capacity circular buffer for mono float32 audio samples.
@@ -9,19 +11,41 @@ class SlidingWindowBuffer:
     - Stores up to capacity_samples at 16-bit float32 values in [-1, 1].
     - push() appends samples (wraps on overflow) with O(n) copies on wrap.
     - get_recent(n) returns a contiguous np.ndarray copy of the last n samples.
+    - total_samples counts every sample ever pushed, so get_range(start, end)
+      can address audio by absolute sample index.
+
+    With mirrored=True every sample is stored twice (at pos and pos + capacity),
+    so any span of up to `capacity` samples is contiguous in memory and
+    get_recent_view()/get_range() return read-only views without copying. A view
+    stays valid until another `capacity - n` samples have been pushed; copy it
+    if it must outlive that.
     """
 
-    def __init__(self, capacity_samples: int) -> None:
+    def __init__(self, capacity_samples: int, mirrored: bool = False) -> None:
         if capacity_samples <= 0:
             raise ValueError("capacity_samples must be > 0")
         self.capacity = int(capacity_samples)
-        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.mirrored = bool(mirrored)
+        self._buffer = np.zeros(self.capacity * (2 if self.mirrored else 1), dtype=np.float32)
         self._write_pos = 0
         self._size = 0
+        self.total_samples = 0
 
     def clear(self) -> None:
         self._write_pos = 0
         self._size = 0
+        self.total_samples = 0
+
+    def _write(self, base: int, samples: np.ndarray) -> None:
+        # Write one copy of the ring located at self._buffer[base : base + capacity]
+        n = samples.shape[0]
+        end_pos = self._write_pos + n
+        if end_pos <= self.capacity:
+            self._buffer[base + self._write_pos : base + end_pos] = samples
+        else:
+            first = self.capacity - self._write_pos
+            self._buffer[base + self._write_pos : base + self.capacity] = samples[:first]
+            self._buffer[base : base + end_pos % self.capacity] = samples[first:]
 
     def push(self, samples: np.ndarray) -> None:
         if samples is None:
@@ -33,23 +57,61 @@ class SlidingWindowBuffer:
         n = samples.shape[0]
         if n <= 0:
             return
+        self.total_samples += n
+        if n > self.capacity:
+            # Only the newest capacity samples can be kept
+            self._write_pos = (self._write_pos + n - self.capacity) % self.capacity
+            samples = samples[-self.capacity :]
+            n = self.capacity
 
         # Write with wrap handling
-        end_pos = self._write_pos + n
-        if end_pos <= self.capacity:
-            self._buffer[self._write_pos:end_pos] = samples
-        else:
-            first = self.capacity - self._write_pos
-            self._buffer[self._write_pos :] = samples[:first]
-            self._buffer[: end_pos % self.capacity] = samples[first:]
+        self._write(0, samples)
+        if self.mirrored:
+            self._write(self.capacity, samples)
 
-        self._write_pos = end_pos % self.capacity
+        self._write_pos = (self._write_pos + n) % self.capacity
         self._size = min(self.capacity, self._size + n)
 
+    def push_encoded(self, data: bytes, codec: str = "pcm16") -> int:
+        """Decode a wire frame (see utils.audio_codec) straight into the ring; returns samples added.
+
+        The count is the whole frame in both modes (what `total_samples`
+        advanced by), even if only the last `capacity` samples are kept.
+        In mirrored mode the frame is decoded once into a contiguous slot that
+        may run into the mirror half, then the two pieces are copied to their
+        twins, so no intermediate float array is allocated.
+        """
+        src = wire_samples(data, codec)
+        n = src.shape[0]
+        if n == 0:
+            return 0
+        if not self.mirrored:
+            out = np.empty(n, dtype=np.float32)
+            decode_into(src, codec, out)
+            self.push(out)
+            return n
+        self.total_samples += n
+        added = n
+        if n > self.capacity:
+            self._write_pos = (self._write_pos + n - self.capacity) % self.capacity
+            src = src[-self.capacity :]
+            n = self.capacity
+        cap, wp = self.capacity, self._write_pos
+        decode_into(src, codec, self._buffer[wp : wp + n])
+        low = min(n, cap - wp)  # decoded part that landed in the first copy
+        self._buffer[wp + cap : wp + cap + low] = self._buffer[wp : wp + low]
+        if n > low:
+            self._buffer[: n - low] = self._buffer[cap : cap + n - low]
+        self._write_pos = (wp + n) % cap
+        self._size = min(cap, self._size + n)
+        return added
+
     def get_recent(self, n: int) -> np.ndarray:
         if self._size == 0 or n <= 0:
             return np.zeros(0, dtype=np.float32)
         n = int(min(n, self._size))
+        if self.mirrored:
+            return self.get_recent_view(n).copy()
         start = (self._write_pos - n) % self.capacity
         if start + n <= self.capacity:
             return self._buffer[start : start + n].copy()
@@ -59,7 +121,35 @@ class SlidingWindowBuffer:
         out[first:] = self._buffer[: n - first]
         return out
 
-    def size(self) -> int:
-        return self._size
+    def get_recent_view(self, n: int) -> np.ndarray:
+        """Read-only contiguous view of the last n samples (mirrored mode only)."""
+        if not self.mirrored:
+            raise ValueError("get_recent_view requires mirrored=True")
+        n = int(max(0, min(n, self._size)))
+        end = self._write_pos + self.capacity
+        view = self._buffer[end - n : end]
+        view.flags.writeable = False
+        return view
+
+    def get_range(self, start: int, end: int, copy: bool = False) -> np.ndarray:
+        """Samples [start, end) by absolute index, clipped to what is still buffered.
 
+        Returns a read-only view in mirrored mode unless copy=True.
+        """
+        oldest = self.total_samples - self._size
+        start = max(int(start), oldest)
+        end = min(int(end), self.total_samples)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        back = self.total_samples - start  # samples from start to the newest one
+        if not self.mirrored:
+            return self.get_recent(back)[: end - start]
+        base = self._write_pos + self.capacity - back
+        view = self._buffer[base : base + (end - start)]
+        if copy:
+            return view.copy()
+        view.flags.writeable = False
+        return view
 
+    def size(self) -> int:
+        return self._size
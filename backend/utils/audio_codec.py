@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Wire formats accepted on /ws/audio (negotiated with ?audio=...): 16 kHz mono
+#   pcm16: little-endian signed 16-bit (2 bytes/sample, default)
+#   mulaw: G.711 mu-law companded 8-bit (1 byte/sample)
+CODECS = ("pcm16", "mulaw")
+
+_PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def _mulaw_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    pcm = np.where(sign != 0, -magnitude, magnitude)
+    return (pcm.astype(np.float32) * _PCM16_SCALE).astype(np.float32)
+
+
+# Code -> float32 sample in [-1, 1]
+MULAW_LUT = _mulaw_table()
+
+
+def negotiate_codec(audio: str | None) -> str:
+    return audio if audio in CODECS else "pcm16"
+
+
+def wire_samples(data: bytes, codec: str) -> np.ndarray:
+    """Zero-copy view of the encoded samples in a frame (int16 or uint8)."""
+    if codec == "mulaw":
+        return np.frombuffer(data, dtype=np.uint8)
+    return np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+
+
+def decode_into(src: np.ndarray, codec: str, out: np.ndarray) -> None:
+    """Decode encoded samples into the float32 array `out` (same length) in one vectorised step."""
+    if codec == "mulaw":
+        np.take(MULAW_LUT, src, out=out, mode="clip")
+    else:
+        np.multiply(src, _PCM16_SCALE, out=out)
+
+
+def decode(data: bytes, codec: str = "pcm16") -> np.ndarray:
+    src = wire_samples(data, codec)
+    out = np.empty(src.shape[0], dtype=np.float32)
+    decode_into(src, codec, out)
+    return out
+
+
+def mulaw_encode(samples: np.ndarray) -> np.ndarray:
+    """float32 in [-1, 1] -> G.711 mu-law codes (for tests and load tools)."""
+    x = np.clip(np.asarray(samples, dtype=np.float32) * 32768.0, -32635, 32635).astype(np.int32)
+    sign = np.where(x < 0, 0x80, 0)
+    mag = np.abs(x) + 0x84
+    exponent = np.clip(np.floor(np.log2(mag)).astype(np.int32) - 7, 0, 7)
+    mantissa = (mag >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def _timed_call(call: Callable[[], T]) -> Tuple[T, float]:
+    # Module-level so it can be pickled for process-pool stages
+    t0 = time.perf_counter()
+    out = call()
+    return out, time.perf_counter() - t0
+
+
+class InferenceExecutor:
+    """Per-stage worker pools for blocking inference calls.
+
+    Each stage (e.g. "asr", "diarization", "spoof", "lid", "watchlist") gets
+    its own bounded pool plus a bounded queue of pending calls, so a slow
+    stage cannot block the asyncio event loop or starve the other stages.
+
+    - Thread pools suit CTranslate2/torch work, which releases the GIL.
+    - Stages listed in `process_stages` run in a process pool instead; the
+      callable and its arguments must then be picklable.
+    - At most `max_queue` calls per stage may be pending; further callers wait
+      (asynchronously) for a free queue slot.
+    """
+
+    def __init__(
+        self,
+        workers: Dict[str, int],
+        max_queue: int = 64,
+        process_stages: Iterable[str] = (),
+        metrics: Any = None,
+    ) -> None:
+        self._metrics = metrics  # optional utils.metrics.Metrics (execution and queue-wait times)
+        self._logger = logging.getLogger("vss")
+        self._pools: Dict[str, Executor] = {}
+        self._queues: Dict[str, asyncio.Semaphore] = {}
+        self._pending: Dict[str, int] = {}
+        self.max_queue = max(1, int(max_queue))
+        proc = set(process_stages)
+        for stage, n in workers.items():
+            n = max(1, int(n))
+            if stage in proc:
+                self._pools[stage] = ProcessPoolExecutor(max_workers=n)
+            else:
+                self._pools[stage] = ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"vss-{stage}")
+            self._queues[stage] = asyncio.Semaphore(self.max_queue)
+            self._pending[stage] = 0
+
+    @property
+    def stages(self) -> list[str]:
+        return list(self._pools)
+
+    def queue_depth(self, stage: str) -> int:
+        """Number of calls submitted or waiting for a queue slot on `stage`."""
+        return self._pending.get(stage, 0)
+
+    async def run(self, stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on the pool for `stage` and await its result."""
+        pool = self._pools.get(stage)
+        if pool is None:
+            raise KeyError(f"unknown inference stage: {stage}")
+        call = functools.partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        self._pending[stage] += 1
+        try:
+            submitted = time.perf_counter()
+            async with self._queues[stage]:
+                out, exec_s = await loop.run_in_executor(pool, _timed_call, call)
+            if self._metrics is not None:
+                self._metrics.observe_stage(stage, exec_s, waited=time.perf_counter() - submitted - exec_s)
+            return out
+        finally:
+            self._pending[stage] -= 1
+
+    def shutdown(self, wait: bool = False) -> None:
+        for stage, pool in self._pools.items():
+            try:
+                pool.shutdown(wait=wait, cancel_futures=True)
+            except Exception as e:
+                self._logger.warning("executor shutdown failed for %s: %s", stage, e)
+
+
+def build_executor(
+    asr: int = 2,
+    diarization: int = 1,
+    spoof: int = 1,
+    lid: int = 1,
+    watchlist: int = 1,
+    max_queue: int = 64,
+    process_stages: Optional[Iterable[str]] = None,
+    metrics: Any = None,
+) -> InferenceExecutor:
+    return InferenceExecutor(
+        workers={"asr": asr, "diarization": diarization, "spoof": spoof, "lid": lid, "watchlist": watchlist},
+        max_queue=max_queue,
+        process_stages=process_stages or (),
+        metrics=metrics,
+    )
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import socket
+import struct
+import sys
+import threading
+
+import numpy as np
+
+# Length-prefixed JSON frames on the local socket between I/O workers and the
+# inference server; audio never goes through the socket, only (segment, offset,
+# length) references into the worker's shared-memory arena.
+_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def send_msg(sock: socket.socket, msg: Dict[str, Any]) -> None:
+    body = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            raise ConnectionError("inference server closed the connection")
+        got += k
+    return bytes(buf)
+
+
+def recv_msg(sock: socket.socket) -> Dict[str, Any]:
+    (n,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if n > MAX_FRAME_BYTES:
+        raise ConnectionError(f"frame too large: {n} bytes")
+    return json.loads(_recv_exact(sock, n))
+
+
+async def read_msg(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    (n,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if n > MAX_FRAME_BYTES:
+        raise ConnectionError(f"frame too large: {n} bytes")
+    return json.loads(await reader.readexactly(n))
+
+
+async def write_msg(writer: asyncio.StreamWriter, msg: Dict[str, Any]) -> None:
+    body = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+    writer.write(_HEADER.pack(len(body)) + body)
+    await writer.drain()
+
+
+@dataclass
+class Lease:
+    """Contiguous float32 region of a `ShmArena` holding one request's arrays."""
+
+    start: int
+    end: int
+    # (offset, length) in samples of each array, relative to the segment start
+    slices: List[Tuple[int, int]]
+
+    def refs(self) -> List[List[int]]:
+        return [[off, n] for off, n in self.slices]
+
+
+class ShmArena:
+    """Worker-side shared-memory ring for audio handed to the inference server.
+
+    Arrays of one request are copied into a contiguous region (the only copy
+    on the worker side); the server maps the same segment and reads them in
+    place. A region stays leased until `release`, so it is never overwritten
+    while the server may still read it. Allocation wraps around like a ring
+    and waits for leases to be released when the arena is full.
+    """
+
+    def __init__(self, size_bytes: int) -> None:
+        self.capacity = max(1, int(size_bytes) // 4)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * 4)
+        self.name = self.shm.name
+        self._data = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf)
+        self._head = 0
+        self._leases: Dict[int, Tuple[int, int]] = {}  # id(lease) -> (start, end)
+        self._cond = threading.Condition()
+
+    def _fits(self, start: int, end: int) -> bool:
+        return all(end <= s or start >= e for s, e in self._leases.values())
+
+    def write(self, arrays: Sequence[np.ndarray], timeout: Optional[float] = None) -> Lease:
+        sizes = [int(a.shape[0]) for a in arrays]
+        total = sum(sizes)
+        if total > self.capacity:
+            raise ValueError(f"request of {total} samples exceeds the {self.capacity}-sample arena")
+        with self._cond:
+            while True:
+                start = self._head if self._head + total <= self.capacity else 0
+                if self._fits(start, start + total):
+                    break
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("shared-memory arena full")
+            lease = Lease(start, start + total, [])
+            self._leases[id(lease)] = (start, start + total)
+            self._head = start + total
+        off = start
+        for a, n in zip(arrays, sizes):
+            self._data[off : off + n] = a
+            lease.slices.append((off, n))
+            off += n
+        return lease
+
+    def view(self, offset: int, length: int) -> np.ndarray:
+        return self._data[offset : offset + length]
+
+    def release(self, lease: Lease) -> None:
+        with self._cond:
+            self._leases.pop(id(lease), None)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        self._data = None  # drop the exported buffer before closing
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Map a worker's arena in the inference server (the worker owns and unlinks it)."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching registers the segment with this process's resource
+    # tracker, which would unlink it when the server exits
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+def segment_view(shm: shared_memory.SharedMemory, offset: int, length: int) -> np.ndarray:
+    """Zero-copy float32 view of `length` samples at sample `offset`."""
+    return np.ndarray((int(length),), dtype=np.float32, buffer=shm.buf, offset=int(offset) * 4)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import threading
+import time
+
+# Latency buckets in seconds: 1 ms .. 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        # Unlabelled counters are exported as 0 before the first increment
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge set explicitly, or computed at scrape time from `fn` ({labels: value})."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def set_function(self, fn: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Compute this gauge's values lazily at scrape time."""
+        self._fn = fn
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+        if self._fn is not None:
+            try:
+                items.update(self._fn())
+            except Exception:
+                pass
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {v}" for k, v in items.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts incl. +Inf, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+                self._series[labels] = series
+            series[0][i] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = [(k, list(c), list(s)) for k, (c, s) in self._series.items()]
+        for labels, counts, (total, n) in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                le = f'le="{b}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, le)} {acc}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, labels, inf)} {int(n)}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, labels)} {int(n)}")
+        return lines
+
+
+class Metrics:
+    """Process-wide instrumentation with Prometheus text exposition.
+
+    When disabled, `timer()` returns a shared no-op context manager and all
+    record helpers return immediately, so instrumented code pays roughly one
+    attribute check per call.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._noop = nullcontext()
+        self.stage_seconds = Histogram("vss_stage_seconds", "Time spent executing a pipeline stage", ("stage",))
+        self.stage_wait_seconds = Histogram(
+            "vss_stage_queue_wait_seconds", "Time a stage call waited for a worker", ("stage",)
+        )
+        self.tick_seconds = Histogram("vss_tick_seconds", "Duration of one emit_loop tick")
+        self.tick_overruns = Counter("vss_tick_overruns_total", "Ticks that took longer than the tick interval")
+        self.sessions_total = Counter("vss_sessions_total", "WebSocket sessions accepted")
+        self.active_sessions = Gauge("vss_active_sessions", "Currently connected WebSocket sessions")
+        self.model_load_seconds = Gauge("vss_model_load_seconds", "Wall time to load a model", ("model",))
+        self.queue_depth = Gauge("vss_stage_queue_depth", "Pending calls per inference stage", ("stage",))
+        self.ticks_skipped = Counter("vss_ticks_skipped_total", "Stale ticks skipped instead of run late")
+        self.sessions_rejected = Counter("vss_sessions_rejected_total", "Sessions refused by admission control")
+        self.tick_scale = Gauge("vss_tick_scale", "Interval/window stretch applied to non-priority sessions")
+        self.sessions_by_tier = Gauge("vss_sessions_by_tier", "Connected sessions per cascade tier", ("tier",))
+        self.escalations = Counter(
+            "vss_escalations_total", "Screening sessions escalated to the full pipeline", ("reason",)
+        )
+        self._metrics: List[_Metric] = [
+            self.stage_seconds,
+            self.stage_wait_seconds,
+            self.tick_seconds,
+            self.tick_overruns,
+            self.sessions_total,
+            self.active_sessions,
+            self.model_load_seconds,
+            self.queue_depth,
+            self.ticks_skipped,
+            self.sessions_rejected,
+            self.tick_scale,
+            self.sessions_by_tier,
+            self.escalations,
+        ]
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def timer(self, stage: str):
+        """Context manager observing the wrapped block into vss_stage_seconds{stage}."""
+        if not self.enabled:
+            return self._noop
+        return self._timer(stage)
+
+    @contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - t0, stage)
+
+    def observe_stage(self, stage: str, seconds: float, waited: float = 0.0) -> None:
+        if self.enabled:
+            self.stage_seconds.observe(seconds, stage)
+            self.stage_wait_seconds.observe(waited, stage)
+
+    def observe_tick(self, seconds: float, interval: float) -> bool:
+        """Record a tick duration; returns True if it overran the interval."""
+        if not self.enabled:
+            return seconds > interval
+        self.tick_seconds.observe(seconds)
+        if seconds > interval:
+            self.tick_overruns.inc()
+            return True
+        return False
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics(enabled=True)
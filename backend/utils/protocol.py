@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+import json
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # optional dependency
+    msgpack = None  # type: ignore
+
+# Protocol versions for /ws/audio (negotiated with ?proto=N&enc=json|msgpack):
+#   1: a heartbeat plus a full JSON payload every tick (default, original format)
+#   2: one delta update per tick with only changed fields, transcript sent as
+#      appended text, and a full keyframe every `keyframe_every` updates
+PROTO_FULL = 1
+PROTO_DELTA = 2
+
+# Float fields are rounded before comparison so noise-level changes are not sent
+_FLOAT_DIGITS = {"tick_ms": 1}
+_DEFAULT_DIGITS = 3
+
+
+def negotiate(proto: Optional[str], enc: Optional[str]) -> tuple[int, str]:
+    """(protocol version, encoding) from query params; unknown values fall back to v1/json."""
+    try:
+        version = int(proto) if proto else PROTO_FULL
+    except ValueError:
+        version = PROTO_FULL
+    version = PROTO_DELTA if version >= PROTO_DELTA else PROTO_FULL
+    encoding = "msgpack" if (enc == "msgpack" and msgpack is not None and version >= PROTO_DELTA) else "json"
+    return version, encoding
+
+
+def encode_message(msg: Dict[str, Any], encoding: str) -> str | bytes:
+    """Serialize for ws.send_text (str) or ws.send_bytes (bytes)."""
+    if encoding == "msgpack":
+        return msgpack.packb(msg, use_bin_type=True)
+    return json.dumps(msg, separators=(",", ":"))
+
+
+class DeltaEncoder:
+    """Turns the full per-tick state of a session into protocol-v2 updates.
+
+    Scalar fields are sent only when their (rounded) value changed since the
+    last update. The committed transcript is append-only, so only its new
+    suffix is sent (`transcript_append`); the tentative tail is re-sent
+    (`tentative`) whenever it changes. Every `keyframe_every` updates a full
+    snapshot is sent instead (`kf: true`, with `transcript` = the last
+    `keyframe_transcript_chars` characters) so clients can resynchronise.
+    """
+
+    def __init__(self, keyframe_every: int = 20, keyframe_transcript_chars: int = 4000) -> None:
+        self.keyframe_every = max(1, int(keyframe_every))
+        self.keyframe_transcript_chars = int(keyframe_transcript_chars)
+        self.seq = 0
+        self._last: Dict[str, Any] = {}
+        self._transcript = ""
+        self._tentative = ""
+
+    @staticmethod
+    def _round(key: str, value: Any) -> Any:
+        if isinstance(value, float):
+            return round(value, _FLOAT_DIGITS.get(key, _DEFAULT_DIGITS))
+        return value
+
+    def encode(
+        self, state: Dict[str, Any], transcript: Optional[str] = None, tentative: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Update for `state` (plain fields) plus the committed transcript and tentative text."""
+        state = {k: self._round(k, v) for k, v in state.items()}
+        keyframe = self.seq % self.keyframe_every == 0
+        self.seq += 1
+        msg: Dict[str, Any] = {"seq": self.seq}
+        if keyframe:
+            msg["kf"] = True
+            msg.update(state)
+            self._last = dict(state)
+        else:
+            for k, v in state.items():
+                if k not in self._last or self._last[k] != v:
+                    msg[k] = v
+                    self._last[k] = v
+
+        if transcript is not None:
+            if keyframe or not transcript.startswith(self._transcript):
+                # Full (tail of the) transcript: keyframe, or the text was rewritten
+                msg["transcript"] = transcript[-self.keyframe_transcript_chars :]
+            elif len(transcript) > len(self._transcript):
+                msg["transcript_append"] = transcript[len(self._transcript) :]
+            self._transcript = transcript
+        if tentative is not None and (keyframe or tentative != self._tentative):
+            msg["tentative"] = tentative
+            self._tentative = tentative
+        return msg
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+
+@dataclass
+class ModelState:
+    # pending -> loading -> ready | unavailable (not configured / not installed) | failed (raised)
+    state: str = "pending"
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("ready", "unavailable", "failed")
+
+
+class Readiness:
+    """Background model loading with per-model state for `/ready`.
+
+    Each loader is a blocking callable returning whether the model is usable;
+    all of them run concurrently on worker threads so the event loop keeps
+    serving `/health` and accepting sessions while models load. The service
+    is ready once every loader finished, whatever the outcome: unavailable
+    models degrade to the existing fallbacks instead of blocking traffic.
+    """
+
+    def __init__(self) -> None:
+        self.models: Dict[str, ModelState] = {}
+        self.started_at: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._logger = logging.getLogger("vss")
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_seconds is not None
+
+    def start(self, loaders: Dict[str, Callable[[], bool]]) -> asyncio.Task:
+        """Schedule loading on the running loop (call from a startup hook)."""
+        self.started_at = time.perf_counter()
+        for name in loaders:
+            self.models[name] = ModelState()
+        self._task = asyncio.create_task(self._run(loaders))
+        return self._task
+
+    async def _load_one(self, name: str, fn: Callable[[], bool]) -> None:
+        st = self.models[name]
+        st.state = "loading"
+        t0 = time.perf_counter()
+        try:
+            ok = await asyncio.to_thread(fn)
+            st.state = "ready" if ok else "unavailable"
+        except Exception as e:
+            st.state = "failed"
+            st.error = repr(e)
+        st.seconds = time.perf_counter() - t0
+        self._logger.info("model %s: %s in %.2fs", name, st.state, st.seconds)
+
+    async def _run(self, loaders: Dict[str, Callable[[], bool]]) -> None:
+        await asyncio.gather(*(self._load_one(n, fn) for n, fn in loaders.items()))
+        self.ready_seconds = time.perf_counter() - (self.started_at or time.perf_counter())
+        self._logger.info("all models settled in %.2fs; ready", self.ready_seconds)
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "ready_seconds": self.ready_seconds,
+            "models": {name: asdict(st) for name, st in self.models.items()},
+        }
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from .timeline import EventTimeline
+
+# Session fields persisted next to the event timeline
+SESSION_FIELDS = ("id", "start", "end", "transcript", "lang", "last_label", "source", "tick_overruns")
+
+
+def _expired(start: Optional[float], end: Optional[float], cutoff: float) -> bool:
+    """Past retention: finished before `cutoff`, or never closed and started before it."""
+    t = end if end is not None else start
+    return t is not None and t < cutoff
+
+
+class ReportStore(ABC):
+    """Storage for per-session reports (metadata + event timeline).
+
+    Writers call `open_session`, `append_event` (every tick) and
+    `close_session`; these must not block the event loop. Readers get the
+    metadata with `get` and page through events with `events`, filtered by
+    time range. Old sessions are dropped by TTL and by a cap on their number;
+    a session never closed (its process died mid-call) expires one TTL after
+    it started.
+    """
+
+    @abstractmethod
+    def open_session(self, meta: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def append_event(self, session_id: str, event: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close_session(self, session_id: str, **fields: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def events(
+        self,
+        session_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_events(self, session_id: str, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    def iter_events(
+        self, session_id: str, since: Optional[float] = None, until: Optional[float] = None, page: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """All matching events, fetched `page` at a time (for streaming responses)."""
+        offset = 0
+        while True:
+            rows = self.events(session_id, offset=offset, limit=page, since=since, until=until)
+            yield from rows
+            if len(rows) < page:
+                return
+            offset += page
+
+    def downsampled_events(
+        self, session_id: str, max_points: int, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """At most `max_points` events, keeping label/tag changes and risk peaks (see EventTimeline.downsample)."""
+        tl = EventTimeline.from_events(self.events(session_id, since=since, until=until))
+        return tl.to_events(tl.downsample(max_points))
+
+    def prune(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryReportStore(ReportStore):
+    """Process-local store; bounded by `max_sessions` and `ttl_s` (oldest finished dropped first).
+
+    Events are kept in a columnar `EventTimeline` per session (a few bytes per tick).
+    """
+
+    def __init__(self, ttl_s: float = 72 * 3600.0, max_sessions: int = 1000) -> None:
+        self.ttl_s = float(ttl_s)
+        self.max_sessions = int(max_sessions)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._events: Dict[str, EventTimeline] = {}
+        self._lock = threading.Lock()
+
+    def open_session(self, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            self._sessions[meta["id"]] = {k: meta.get(k) for k in SESSION_FIELDS}
+            self._events.setdefault(meta["id"], EventTimeline())
+        self.prune()
+
+    def append_event(self, session_id: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            timeline = self._events.get(session_id)
+            if timeline is not None:
+                timeline.append_event(event)
+
+    def close_session(self, session_id: str, **fields: Any) -> None:
+        with self._lock:
+            meta = self._sessions.get(session_id)
+            if meta is not None:
+                meta.update({k: v for k, v in fields.items() if k in SESSION_FIELDS})
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            meta = self._sessions.get(session_id)
+            return dict(meta) if meta is not None else None
+
+    def events(self, session_id, offset=0, limit=None, since=None, until=None):
+        with self._lock:
+            timeline = self._events.get(session_id)
+            if timeline is None:
+                return []
+            idx = timeline.index_range(since, until)
+            return timeline.to_events(idx[offset : None if limit is None else offset + limit])
+
+    def count_events(self, session_id, since=None, until=None) -> int:
+        with self._lock:
+            timeline = self._events.get(session_id)
+            return 0 if timeline is None else int(timeline.index_range(since, until).size)
+
+    def downsampled_events(self, session_id, max_points, since=None, until=None):
+        with self._lock:
+            timeline = self._events.get(session_id)
+            if timeline is None:
+                return []
+            return timeline.to_events(timeline.downsample(max_points, timeline.index_range(since, until)))
+
+    def prune(self) -> int:
+        cutoff = time.time() - self.ttl_s
+        dropped = 0
+        with self._lock:
+            doomed = [sid for sid, m in self._sessions.items() if _expired(m.get("start"), m.get("end"), cutoff)]
+            excess = len(self._sessions) - len(doomed) - self.max_sessions
+            if excess > 0:
+                # Oldest finished sessions first; the cap never drops calls still in progress
+                expired = set(doomed)
+                doomed += [sid for sid, m in self._sessions.items() if sid not in expired and m.get("end") is not None][
+                    :excess
+                ]
+            for sid in doomed:
+                del self._sessions[sid]
+                self._events.pop(sid, None)
+                dropped += 1
+        return dropped
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    start REAL,
+    "end" REAL,
+    transcript TEXT,
+    lang TEXT,
+    last_label TEXT,
+    source TEXT,
+    tick_overruns INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_start ON sessions(start);
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    t REAL NOT NULL,
+    risk REAL,
+    label TEXT,
+    intent REAL,
+    spoof REAL,
+    tags TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session_t ON events(session_id, t);
+"""
+
+_EVENT_COLUMNS = ("t", "risk", "label", "intent", "spoof", "tags")
+
+
+class SQLiteReportStore(ReportStore):
+    """SQLite-backed store with write-behind batching.
+
+    Writes are queued and applied by a single background thread in one
+    transaction per batch (every `flush_interval_s` or `batch_size` writes),
+    so the event loop only pays for a `queue.put`. Reads flush pending writes
+    first and use their own connection (WAL mode, so they do not block the
+    writer). Retention runs on the writer thread every `prune_interval_s`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_s: float = 72 * 3600.0,
+        max_sessions: int = 10000,
+        flush_interval_s: float = 0.2,
+        batch_size: int = 500,
+        prune_interval_s: float = 60.0,
+    ) -> None:
+        self.path = str(path)
+        self.ttl_s = float(ttl_s)
+        self.max_sessions = int(max_sessions)
+        self.flush_interval_s = float(flush_interval_s)
+        self.batch_size = int(batch_size)
+        self.prune_interval_s = float(prune_interval_s)
+        self._logger = logging.getLogger("vss")
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._write_conn = self._connect()
+        self._write_conn.executescript(_SCHEMA)
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._last_prune = 0.0
+        self._thread = threading.Thread(target=self._writer, name="report-store-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # -- writes (any thread, non-blocking) --
+
+    def open_session(self, meta: Dict[str, Any]) -> None:
+        self._queue.put(("open", tuple(meta.get(k) for k in SESSION_FIELDS)))
+
+    def append_event(self, session_id: str, event: Dict[str, Any]) -> None:
+        row = (
+            session_id,
+            float(event["t"]),
+            event.get("risk"),
+            event.get("label"),
+            event.get("intent"),
+            event.get("spoof"),
+            json.dumps(event.get("tags") or []),
+        )
+        self._queue.put(("event", row))
+
+    def close_session(self, session_id: str, **fields: Any) -> None:
+        cols = [k for k in SESSION_FIELDS if k in fields and k != "id"]
+        if cols:
+            self._queue.put(("close", (session_id, cols, tuple(fields[k] for k in cols))))
+
+    # -- writer thread --
+
+    def _writer(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                first = ()
+            batch = [first] if first != () else []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            ops = [op for op in batch if op is not None and op[0] != "flush"]
+            if ops:
+                try:
+                    self._apply(ops)
+                except Exception:
+                    self._logger.exception("report store write failed (%d ops dropped)", len(ops))
+            # Readers waiting in flush() see everything queued before their marker
+            for op in batch:
+                if op is not None and op[0] == "flush":
+                    op[1].set()
+            if stop:
+                return
+            if time.monotonic() - self._last_prune >= self.prune_interval_s:
+                self._last_prune = time.monotonic()
+                try:
+                    self._prune()
+                except Exception:
+                    self._logger.exception("report store retention failed")
+
+    def _apply(self, ops: List[tuple]) -> None:
+        conn = self._write_conn
+        conn.execute("BEGIN")
+        try:
+            events = []
+            for kind, args in ops:
+                if kind == "event":
+                    events.append(args)
+                    continue
+                if events:
+                    conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+                    events = []
+                if kind == "open":
+                    conn.execute(
+                        'INSERT OR REPLACE INTO sessions (id, start, "end", transcript, lang, last_label, source, '
+                        "tick_overruns) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        args,
+                    )
+                elif kind == "close":
+                    sid, cols, values = args
+                    assignments = ", ".join(f'"{c}" = ?' for c in cols)
+                    conn.execute(f"UPDATE sessions SET {assignments} WHERE id = ?", (*values, sid))
+            if events:
+                conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _prune(self) -> int:
+        conn = self._write_conn
+        cutoff = time.time() - self.ttl_s
+        conn.execute("BEGIN")
+        try:
+            doomed = [
+                r[0]
+                for r in conn.execute(
+                    # Sessions never closed (the server died mid-call) expire by their start time
+                    'SELECT id FROM sessions WHERE "end" < ? OR ("end" IS NULL AND start < ?)',
+                    (cutoff, cutoff),
+                )
+            ]
+            (total,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            excess = total - len(doomed) - self.max_sessions
+            if excess > 0:
+                # Oldest finished sessions first; the cap never drops calls still in progress
+                doomed += [
+                    r[0]
+                    for r in conn.execute(
+                        'SELECT id FROM sessions WHERE "end" IS NOT NULL AND "end" >= ? ORDER BY start LIMIT ?',
+                        (cutoff, excess),
+                    )
+                ]
+            for sid in doomed:
+                conn.execute("DELETE FROM events WHERE session_id = ?", (sid,))
+                conn.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if doomed:
+            self._logger.info("report store: pruned %d sessions", len(doomed))
+        return len(doomed)
+
+    # -- reads --
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every write queued so far has been applied."""
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        self.flush()
+        with self._read_lock:
+            row = self._read_conn.execute(
+                'SELECT id, start, "end", transcript, lang, last_label, source, tick_overruns FROM sessions WHERE id = ?',
+                (session_id,),
+            ).fetchone()
+        return dict(zip(SESSION_FIELDS, row)) if row else None
+
+    @staticmethod
+    def _where(session_id: str, since: Optional[float], until: Optional[float]) -> tuple:
+        clause, params = "session_id = ?", [session_id]
+        if since is not None:
+            clause += " AND t >= ?"
+            params.append(since)
+        if until is not None:
+            clause += " AND t < ?"
+            params.append(until)
+        return clause, params
+
+    def events(self, session_id, offset=0, limit=None, since=None, until=None):
+        self.flush()
+        clause, params = self._where(session_id, since, until)
+        sql = (
+            f"SELECT t, risk, label, intent, spoof, tags FROM events WHERE {clause} ORDER BY t, rowid LIMIT ? OFFSET ?"
+        )
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, (*params, -1 if limit is None else int(limit), int(offset))).fetchall()
+        out = []
+        for row in rows:
+            ev = dict(zip(_EVENT_COLUMNS, row))
+            ev["tags"] = json.loads(ev["tags"] or "[]")
+            out.append(ev)
+        return out
+
+    def count_events(self, session_id, since=None, until=None) -> int:
+        self.flush()
+        clause, params = self._where(session_id, since, until)
+        with self._read_lock:
+            (n,) = self._read_conn.execute(f"SELECT COUNT(*) FROM events WHERE {clause}", params).fetchone()
+        return int(n)
+
+    def prune(self) -> int:
+        """Request a retention pass on the writer thread at its next wakeup."""
+        self._last_prune = 0.0
+        return 0
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._write_conn.close()
+        self._read_conn.close()
+
+
+def build_report_store(
+    kind: str, path: str, ttl_s: float, max_sessions: int, flush_interval_s: float = 0.2
+) -> ReportStore:
+    if kind == "memory":
+        return MemoryReportStore(ttl_s=ttl_s, max_sessions=max_sessions)
+    if kind == "sqlite":
+        return SQLiteReportStore(path, ttl_s=ttl_s, max_sessions=max_sessions, flush_interval_s=flush_interval_s)
+    raise ValueError(f"unknown report store: {kind!r} (expected 'sqlite' or 'memory')")
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import os
+import time
+
+# A session counts as priority (never slowed down) while its risk is rising or already elevated
+_RISK_RISING_EPS = 0.01
+_RISK_ELEVATED = 0.35
+
+
+class SessionTicker:
+    """Deadline-based tick clock of one session, driven by a shared `TickScheduler`."""
+
+    def __init__(self, scheduler: "TickScheduler", session_id: str) -> None:
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.cost_ema: Optional[float] = None  # seconds of wall time per tick
+        self.priority = False
+        self.skipped = 0
+        self._last_risk = 0.0
+        self._next: Optional[float] = None
+        self._last_start: Optional[float] = None
+
+    @property
+    def scale(self) -> float:
+        """Stretch factor applied to this session's interval and analysis windows (1.0 = nominal)."""
+        return 1.0 if self.priority else self.scheduler.scale
+
+    @property
+    def interval(self) -> float:
+        return self.scheduler.base_interval * self.scale
+
+    async def wait(self) -> float:
+        """Sleep until the next tick is due; returns the time since the previous tick started.
+
+        Ticks that became stale while the previous one ran are skipped rather
+        than run back to back, so an overloaded session never builds a queue.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        interval = self.interval
+        if self._next is None:
+            self._next = now + interval
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+        else:
+            missed = int((now - self._next) // interval)
+            if missed:
+                self.skipped += missed
+                self.scheduler.skipped_ticks += missed
+                if self.scheduler.metrics is not None:
+                    self.scheduler.metrics.ticks_skipped.inc(amount=missed)
+        start = loop.time()
+        self._next = max(self._next + interval, start + 0.5 * interval)
+        elapsed = interval if self._last_start is None else start - self._last_start
+        self._last_start = start
+        return elapsed
+
+    def done(self, cost: float, risk: Optional[float] = None) -> None:
+        """Report the wall time of the tick just finished and the current risk."""
+        a = self.scheduler.cost_alpha
+        self.cost_ema = cost if self.cost_ema is None else a * cost + (1.0 - a) * self.cost_ema
+        if risk is not None:
+            self.priority = risk > self._last_risk + _RISK_RISING_EPS or risk >= _RISK_ELEVATED
+            self._last_risk = float(risk)
+        self.scheduler.maybe_rebalance()
+
+
+class TickScheduler:
+    """Process-wide tick budget shared by all sessions.
+
+    Demand is the tick wall time all sessions would consume per second at the
+    nominal interval (sum of per-session cost EMAs / base_interval). While it
+    exceeds `budget` (tick-seconds per second, default: one per CPU core),
+    non-priority sessions are stretched by a common `scale` (longer intervals
+    and analysis windows, up to `max_interval`); sessions with rising or
+    elevated risk keep the nominal rate. When even the maximum stretch cannot
+    meet the budget, or `max_sessions` is reached, the node is saturated and
+    new sessions are queued or rejected by `admit`.
+    """
+
+    def __init__(
+        self,
+        base_interval: float = 0.5,
+        max_interval: float = 2.0,
+        budget: Optional[float] = None,
+        max_sessions: int = 0,
+        cost_alpha: float = 0.2,
+        rebalance_every_s: float = 0.25,
+        metrics: Any = None,
+    ) -> None:
+        self.base_interval = float(base_interval)
+        self.max_scale = max(1.0, float(max_interval) / self.base_interval)
+        self.budget = float(budget) if budget else float(os.cpu_count() or 1)
+        self.max_sessions = int(max_sessions)
+        self.cost_alpha = float(cost_alpha)
+        self.rebalance_every_s = float(rebalance_every_s)
+        self.sessions: Dict[str, SessionTicker] = {}
+        self.scale = 1.0
+        self.demand = 0.0
+        self.skipped_ticks = 0
+        self.rejected = 0
+        self._last_rebalance = 0.0
+        self.metrics = metrics  # optional utils.metrics.Metrics (skipped ticks, rejections, scale)
+        if metrics is not None:
+            metrics.tick_scale.set_function(lambda: {(): self.scale})
+        self._logger = logging.getLogger("vss")
+
+    def register(self, session_id: str) -> SessionTicker:
+        """Ticker of `session_id`; reuses the slot reserved by `admit` if there is one."""
+        ticker = self.sessions.get(session_id)
+        if ticker is None:
+            ticker = self.sessions[session_id] = SessionTicker(self, session_id)
+        return ticker
+
+    def unregister(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+        self.rebalance()
+
+    def maybe_rebalance(self) -> None:
+        now = time.monotonic()
+        if now - self._last_rebalance >= self.rebalance_every_s:
+            self.rebalance()
+
+    def rebalance(self) -> None:
+        self._last_rebalance = time.monotonic()
+        base = self.base_interval
+        costs = [(t.cost_ema, t.priority) for t in self.sessions.values() if t.cost_ema is not None]
+        self.demand = sum(c for c, _ in costs) / base
+        priority = sum(c for c, p in costs if p) / base
+        other = self.demand - priority
+        # Stretch only the non-priority share; priority sessions always run at the base rate
+        room = max(self.budget - priority, 0.1 * self.budget)
+        scale = min(self.max_scale, max(1.0, other / room)) if other > 0 else 1.0
+        if abs(scale - self.scale) >= 0.25 or (scale == 1.0) != (self.scale == 1.0):
+            self._logger.info(
+                "tick scheduler: scale %.2f -> %.2f (demand %.2f / budget %.2f)",
+                self.scale,
+                scale,
+                self.demand,
+                self.budget,
+            )
+        self.scale = scale
+
+    @property
+    def saturated(self) -> bool:
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            return True
+        # Load at the maximum stretch still over budget
+        return self.scale >= self.max_scale and self.demand / self.max_scale > self.budget
+
+    async def admit(
+        self,
+        session_id: str,
+        timeout_s: float,
+        notify: Optional[Callable[[dict], Awaitable[None]]] = None,
+        poll_s: float = 0.5,
+    ) -> bool:
+        """Wait up to `timeout_s` for capacity, reporting queue status via `notify`; False = reject.
+
+        On success the session's slot is already taken (registered before
+        returning, with no await in between), so concurrent handshakes and
+        queued sessions woken by the same poll cannot overshoot
+        `max_sessions`. The caller must `unregister` it on every exit path.
+        """
+        deadline = time.monotonic() + max(0.0, timeout_s)
+        while self.saturated:
+            if time.monotonic() >= deadline:
+                self.rejected += 1
+                if self.metrics is not None:
+                    self.metrics.sessions_rejected.inc()
+                return False
+            if notify is not None:
+                await notify({"status": "queued", "sessions": len(self.sessions), "scale": round(self.scale, 2)})
+            await asyncio.sleep(poll_s)
+            self.rebalance()
+        self.register(session_id)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "priority_sessions": sum(1 for t in self.sessions.values() if t.priority),
+            "scale": self.scale,
+            "interval_s": self.base_interval * self.scale,
+            "demand": self.demand,
+            "budget": self.budget,
+            "saturated": self.saturated,
+            "skipped_ticks": self.skipped_ticks,
+            "rejected_sessions": self.rejected,
+        }
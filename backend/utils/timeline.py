@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+# Interned labels and tags shared by every timeline in the process. Tags are
+# stored as bits of a uint64 mask, so at most 64 distinct tags are tracked.
+_LABELS: List[str] = ["SAFE", "SUSPICIOUS", "SCAM"]
+_LABEL_CODES: Dict[str, int] = {name: i for i, name in enumerate(_LABELS)}
+_TAGS: List[str] = []
+_TAG_BITS: Dict[str, int] = {}
+_MAX_TAGS = 64
+_MASK_CACHE: Dict[int, List[str]] = {}
+
+
+def label_code(label: str) -> int:
+    code = _LABEL_CODES.get(label)
+    if code is None:
+        code = _LABEL_CODES.setdefault(label, len(_LABELS))
+        if code == len(_LABELS):
+            _LABELS.append(label)
+    return code
+
+
+def tag_mask(tags: Iterable[str]) -> int:
+    mask = 0
+    for tag in tags:
+        bit = _TAG_BITS.get(tag)
+        if bit is None:
+            if len(_TAGS) >= _MAX_TAGS:
+                logging.getLogger("vss").warning("timeline: more than %d tags, dropping %r", _MAX_TAGS, tag)
+                continue
+            bit = _TAG_BITS.setdefault(tag, len(_TAGS))
+            if bit == len(_TAGS):
+                _TAGS.append(tag)
+        mask |= 1 << bit
+    return mask
+
+
+def mask_tags(mask: int) -> List[str]:
+    """Tags of a mask, in interning order (cached: a call has few distinct tag sets)."""
+    tags = _MASK_CACHE.get(mask)
+    if tags is None:
+        tags = [t for i, t in enumerate(_TAGS) if mask >> i & 1]
+        _MASK_CACHE[mask] = tags
+    return list(tags)
+
+
+class EventTimeline:
+    """Columnar per-session event log (one row per tick).
+
+    Columns live in preallocated NumPy arrays that double when full, so
+    `append` is amortised O(1) and a row costs 25 bytes: time as a float32
+    offset from the first event, risk/intent/spoof as float32, the label as a
+    uint8 code and tags as a uint64 bitmask of interned tags. `to_events`
+    converts whole column slices at once, and `downsample` thins long calls
+    for reports while keeping label changes, tag changes and risk peaks.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        capacity = max(1, int(capacity))
+        self.t0: Optional[float] = None
+        self._n = 0
+        self._dt = np.zeros(capacity, dtype=np.float32)
+        self._risk = np.zeros(capacity, dtype=np.float32)
+        self._intent = np.zeros(capacity, dtype=np.float32)
+        self._spoof = np.zeros(capacity, dtype=np.float32)
+        self._label = np.zeros(capacity, dtype=np.uint8)
+        self._tags = np.zeros(capacity, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._columns())
+
+    def _columns(self) -> List[np.ndarray]:
+        return [self._dt, self._risk, self._intent, self._spoof, self._label, self._tags]
+
+    def _grow(self) -> None:
+        cap = self._dt.shape[0] * 2
+        for name in ("_dt", "_risk", "_intent", "_spoof", "_label", "_tags"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[: self._n] = old[: self._n]
+            setattr(self, name, new)
+
+    def append(self, t: float, risk: float, label: str, tags: Sequence[str], intent: float, spoof: float) -> None:
+        if self._n == self._dt.shape[0]:
+            self._grow()
+        if self.t0 is None:
+            self.t0 = float(t)
+        i = self._n
+        self._dt[i] = t - self.t0
+        self._risk[i] = risk
+        self._intent[i] = intent
+        self._spoof[i] = spoof
+        self._label[i] = label_code(label)
+        self._tags[i] = tag_mask(tags)
+        self._n += 1
+
+    def append_event(self, event: Dict[str, Any]) -> None:
+        self.append(
+            event["t"],
+            event.get("risk", 0.0),
+            event.get("label", "SAFE"),
+            event.get("tags") or (),
+            event.get("intent", 0.0),
+            event.get("spoof", 0.0),
+        )
+
+    @classmethod
+    def from_events(cls, events: Sequence[Dict[str, Any]]) -> "EventTimeline":
+        tl = cls(capacity=max(1, len(events)))
+        for ev in events:
+            tl.append_event(ev)
+        return tl
+
+    def index_range(self, since: Optional[float] = None, until: Optional[float] = None) -> np.ndarray:
+        """Row indices with since <= t < until (times are non-decreasing, so this is a binary search)."""
+        if self._n == 0:
+            return np.zeros(0, dtype=np.int64)
+        dt = self._dt[: self._n]
+        lo = 0 if since is None else int(np.searchsorted(dt, np.float32(since - self.t0), side="left"))
+        hi = self._n if until is None else int(np.searchsorted(dt, np.float32(until - self.t0), side="left"))
+        return np.arange(lo, max(lo, hi))
+
+    def downsample(self, max_points: int, idx: Optional[np.ndarray] = None) -> np.ndarray:
+        """At most `max_points` row indices out of `idx` (default: all rows).
+
+        Kept first: the first and last row and every row where the label or
+        the tag set changes. The remaining budget is spread over equal-width
+        buckets, keeping the highest-risk row of each.
+        """
+        if idx is None:
+            idx = np.arange(self._n)
+        max_points = max(2, int(max_points))
+        if idx.size <= max_points:
+            return idx
+        label = self._label[idx]
+        tags = self._tags[idx]
+        change = np.zeros(idx.size, dtype=bool)
+        change[0] = change[-1] = True
+        change[1:] |= (label[1:] != label[:-1]) | (tags[1:] != tags[:-1])
+        keep = np.flatnonzero(change)
+        if keep.size >= max_points:
+            # Too many change points: thin them evenly, still including both ends
+            pick = np.unique(np.linspace(0, keep.size - 1, max_points).round().astype(np.int64))
+            return idx[keep[pick]]
+        budget = max_points - keep.size
+        risk = self._risk[idx]
+        bounds = np.linspace(0, idx.size, budget + 1).astype(np.int64)
+        peaks = [lo + int(np.argmax(risk[lo:hi])) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+        return idx[np.union1d(keep, np.asarray(peaks, dtype=np.int64))]
+
+    def to_events(self, idx: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Rows as report event dicts (`t`, `risk`, `label`, `tags`, `intent`, `spoof`)."""
+        if idx is None:
+            idx = np.arange(self._n)
+        if idx.size == 0:
+            return []
+        t = (self._dt[idx].astype(np.float64) + self.t0).tolist()
+        risk = self._risk[idx].tolist()
+        intent = self._intent[idx].tolist()
+        spoof = self._spoof[idx].tolist()
+        labels = [_LABELS[c] for c in self._label[idx].tolist()]
+        tags = [mask_tags(m) for m in self._tags[idx].tolist()]
+        return [
+            {"t": a, "risk": b, "label": c, "tags": d, "intent": e, "spoof": f}
+            for a, b, c, d, e, f in zip(t, risk, labels, tags, intent, spoof)
+        ]
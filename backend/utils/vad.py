@@ -1,11 +1,37 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
 import numpy as np
 
 
+@dataclass
+class VADResult:
+    """Frame-level VAD output for one analysed span of audio.
+
+    - mask: bool per frame (after hangover).
+    - segments: voiced (start, end) sample ranges; absolute when produced by `push`.
+    - voiced_ratio: fraction of voiced frames.
+    """
+
+    mask: np.ndarray
+    segments: List[Tuple[int, int]] = field(default_factory=list)
+    voiced_ratio: float = 0.0
+
+    @property
+    def active(self) -> bool:
+        return bool(self.mask.any())
+
+
 class EnergyVAD:
     """Simple energy-based VAD with hangover.
 
+    All frame energies of a window are computed in one NumPy pass over a
+    reshaped view (no per-frame Python loop), and the hangover is applied per
+    frame. `analyze` is stateless; `push` runs incrementally on streamed audio,
+    carrying partial frames and hangover state between calls.
+
     Parameters
     -----------
     sample_rate: int
@@ -30,25 +56,95 @@ class EnergyVAD:
         self.threshold_db = float(threshold_db)
         self.hangover_frames = int(round(hangover_ms / frame_ms))
         self._hang = 0
+        # Incremental state for push()
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._frames_done = 0
+
+    def frame_db(self, samples: np.ndarray) -> np.ndarray:
+        """dBFS energy of every complete frame in `samples`."""
+        n_full = samples.shape[0] // self.frame_len
+        if n_full == 0:
+            return np.zeros(0, dtype=np.float32)
+        x = samples[: n_full * self.frame_len].astype(np.float32, copy=False)
+        frames = x.reshape(n_full, self.frame_len)  # view, no copy
+        rms = np.sqrt(np.einsum("ij,ij->i", frames, frames) / self.frame_len)
+        return 20.0 * np.log10(rms + 1e-9)
+
+    def frame_mask(self, samples: np.ndarray) -> np.ndarray:
+        """Per-frame energy decision for the whole array (no hangover).
+
+        Returns a bool array with one entry per frame; a trailing partial
+        frame is evaluated on its own.
+        """
+        n = samples.shape[0]
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        mask = self.frame_db(samples) > self.threshold_db
+        rest = samples[mask.shape[0] * self.frame_len :]
+        if rest.size:
+            rms = np.sqrt(np.mean(np.square(rest.astype(np.float32, copy=False)))) + 1e-9
+            mask = np.append(mask, 20.0 * np.log10(rms) > self.threshold_db)
+        return mask
+
+    def _apply_hangover(self, active: np.ndarray, hang_in: int) -> Tuple[np.ndarray, int]:
+        """Extend every active frame by `hangover_frames`; returns (mask, hangover left)."""
+        n = active.shape[0]
+        h = self.hangover_frames
+        if n == 0:
+            return active.astype(bool), hang_in
+        idx = np.arange(n)
+        # Index of the most recent active frame (a carried-in hangover acts as a virtual earlier one)
+        seed = hang_in - 1 - h if hang_in > 0 else -(n + h + 1)
+        last = np.maximum.accumulate(np.where(active, idx, seed))
+        mask = (idx - last) <= h
+        hang_out = int(max(0, last[-1] + h - (n - 1)))
+        return mask, hang_out
+
+    def _segments(self, mask: np.ndarray, offset: int) -> List[Tuple[int, int]]:
+        if not mask.any():
+            return []
+        edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        fl = self.frame_len
+        return [(offset + int(s) * fl, offset + int(e) * fl) for s, e in zip(starts, ends)]
+
+    def analyze(self, samples: np.ndarray) -> VADResult:
+        """Stateless analysis of a whole window (segments relative to its start)."""
+        active = self.frame_mask(samples)
+        mask, _ = self._apply_hangover(active, 0)
+        ratio = float(mask.mean()) if mask.size else 0.0
+        segments = [(s, min(e, samples.shape[0])) for s, e in self._segments(mask, 0)]
+        return VADResult(mask=mask, segments=segments, voiced_ratio=ratio)
+
+    def push(self, samples: np.ndarray) -> VADResult:
+        """Incremental analysis of newly received audio.
+
+        Only complete frames are decided; a trailing partial frame is carried
+        into the next call. Segment positions are absolute sample indices
+        since the first push.
+        """
+        if samples is None or samples.size == 0:
+            return VADResult(mask=np.zeros(0, dtype=bool))
+        x = samples.astype(np.float32, copy=False)
+        if self._carry.size:
+            x = np.concatenate([self._carry, x])
+        n_full = x.shape[0] // self.frame_len
+        self._carry = x[n_full * self.frame_len :].copy()
+        active = self.frame_db(x) > self.threshold_db
+        mask, self._hang = self._apply_hangover(active, self._hang)
+        offset = self._frames_done * self.frame_len
+        self._frames_done += n_full
+        ratio = float(mask.mean()) if mask.size else 0.0
+        return VADResult(mask=mask, segments=self._segments(mask, offset), voiced_ratio=ratio)
+
+    def reset(self) -> None:
+        self._hang = 0
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._frames_done = 0
 
     def is_speech(self, samples: np.ndarray) -> bool:
+        """True if any frame of the window is voiced (hangover applied per frame)."""
         if samples.size == 0:
             return False
-        # Ensure 1D float32
-        if samples.dtype != np.float32:
-            samples = samples.astype(np.float32, copy=False)
-        # Frame-wise check using last frame
-        frame = samples[-self.frame_len :] if samples.size >= self.frame_len else samples
-        # RMS to dBFS
-        rms = np.sqrt(np.mean(np.square(frame))) + 1e-9
-        db = 20.0 * np.log10(rms)
-        active = db > self.threshold_db
-        if active:
-            self._hang = self.hangover_frames
-            return True
-        if self._hang > 0:
-            self._hang -= 1
-            return True
-        return False
-
-
+        return self.analyze(samples).active
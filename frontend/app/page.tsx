@@ -1,9 +1,14 @@
 "use client";
 import { useEffect, useRef, useState } from "react";
 import { useMicStream } from "../lib/useMicStream";
+import type { AudioCodec } from "../lib/useMicStream";
 import { StatusChip } from "./components/StatusChip";
 import { ProgressBar } from "./components/ProgressBar";
 
+// Uplink audio: 100 ms frames, PCM16 unless NEXT_PUBLIC_AUDIO_CODEC=mulaw
+const FRAME_MS = 100;
+const AUDIO_CODEC: AudioCodec = process.env.NEXT_PUBLIC_AUDIO_CODEC === "mulaw" ? "mulaw" : "pcm16";
+
 export default function Home() {
   const wsRef = useRef<WebSocket | null>(null);
   const [connected, setConnected] = useState(false);
@@ -14,28 +19,45 @@ export default function Home() {
   const [spoof, setSpoof] = useState<number>(0);
   const [heuristics, setHeuristics] = useState<number>(0);
   const [risk, setRisk] = useState<number>(0);
+  // Admission control: "queued" while the server is saturated, "overloaded" if the call was refused
+  const [serverStatus, setServerStatus] = useState<string>("");
+  // Protocol v2 sends the committed transcript as appended text plus a separate tentative tail
+  const committedRef = useRef<string>("");
+  const tentativeRef = useRef<string>("");
 
   useEffect(() => {
-    const ws = new WebSocket("ws://localhost:8000/ws/audio");
+    // proto=2: delta updates (only changed fields, heartbeat folded in, periodic keyframes)
+    const ws = new WebSocket(`ws://localhost:8000/ws/audio?proto=2&audio=${AUDIO_CODEC}`);
     wsRef.current = ws;
     ws.onopen = () => setConnected(true);
     ws.onmessage = (ev) => {
       try {
         const msg = JSON.parse(ev.data);
-        if (typeof msg.session_id === "string" && !sessionId) setSessionId(msg.session_id);
+        if (msg.status === "queued") setServerStatus("Server busy, waiting for capacity...");
+        if (msg.error === "overloaded") setServerStatus("Server overloaded, please retry shortly");
+        if (typeof msg.session_id === "string" && !sessionId) {
+          setSessionId(msg.session_id);
+          setServerStatus("");
+        }
         if (typeof msg.risk === "number") setRisk(Math.round(msg.risk * 100));
         if (typeof msg.intent === "number") setIntent(Math.round(msg.intent * 100));
         if (typeof msg.spoof === "number") setSpoof(Math.round(msg.spoof * 100));
         if (typeof msg.heuristics === "number") setHeuristics(Math.round(msg.heuristics * 100));
         if (typeof msg.label === "string") setLabel(msg.label);
         if (typeof msg.partial_transcript === "string") setTranscript(msg.partial_transcript);
+        if (typeof msg.transcript === "string") committedRef.current = msg.transcript;
+        if (typeof msg.transcript_append === "string") committedRef.current += msg.transcript_append;
+        if (typeof msg.tentative === "string") tentativeRef.current = msg.tentative;
+        if ("transcript" in msg || "transcript_append" in msg || "tentative" in msg) {
+          setTranscript(`${committedRef.current} ${tentativeRef.current}`.trim());
+        }
       } catch {}
     };
     ws.onclose = () => setConnected(false);
     return () => ws.close();
   }, []);
 
-  const { active, error, start, stop } = useMicStream({ wsRef, frameMs: 20 });
+  const { active, error, start, stop } = useMicStream({ wsRef, frameMs: FRAME_MS, codec: AUDIO_CODEC });
 
   const startDisabled = !connected;
   const statusColor = label === "SCAM" ? "bg-red-600" : label === "SUSPICIOUS" ? "bg-yellow-500" : "bg-emerald-600";
@@ -96,6 +118,7 @@ export default function Home() {
                 {active ? "Stop Recording" : "Start Recording"}
               </button>
               {error && <span className="text-red-400 text-sm">{error}</span>}
+              {serverStatus && <span className="text-yellow-400 text-sm">{serverStatus}</span>}
             </div>
           </div>
 
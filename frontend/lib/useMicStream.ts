@@ -30,12 +30,32 @@ function floatToPCM16(float32: Float32Array): Uint8Array {
   return new Uint8Array(buffer);
 }
 
+// G.711 mu-law: 8 bits per sample, half the bytes of PCM16 (server: ?audio=mulaw)
+function floatToMulaw(float32: Float32Array): Uint8Array {
+  const out = new Uint8Array(float32.length);
+  for (let i = 0; i < float32.length; i++) {
+    let x = Math.round(Math.max(-1, Math.min(1, float32[i])) * 32767);
+    const sign = x < 0 ? 0x80 : 0;
+    if (x < 0) x = -x;
+    if (x > 32635) x = 32635;
+    x += 0x84;
+    let exponent = 7;
+    for (let mask = 0x4000; (x & mask) === 0 && exponent > 0; mask >>= 1) exponent--;
+    const mantissa = (x >> (exponent + 3)) & 0x0f;
+    out[i] = ~(sign | (exponent << 4) | mantissa) & 0xff;
+  }
+  return out;
+}
+
+export type AudioCodec = "pcm16" | "mulaw";
+
 type UseMicStreamOptions = {
   wsRef?: MutableRefObject<WebSocket | null>;
-  frameMs?: number; // preferred output frame size in ms at 16kHz
+  frameMs?: number; // preferred output frame size in ms at 16kHz (60-200 ms keeps per-message overhead low)
+  codec?: AudioCodec; // must match the ?audio= query of the WebSocket
 };
 
-export function useMicStream({ wsRef, frameMs = 20 }: UseMicStreamOptions) {
+export function useMicStream({ wsRef, frameMs = 20, codec = "pcm16" }: UseMicStreamOptions) {
   const [active, setActive] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [framesSent, setFramesSent] = useState(0);
@@ -72,7 +92,7 @@ export function useMicStream({ wsRef, frameMs = 20 }: UseMicStreamOptions) {
         }
       }
 
-      const frameSamples = Math.round(ctx.sampleRate * 0.02); // 20ms native frames
+      const frameSamples = Math.round(ctx.sampleRate * (frameMs / 1000)); // native-rate frames of frameMs
       let worklet: AudioWorkletNode | null = null;
       try {
         if (workletReadyRef.current) {
@@ -112,7 +132,7 @@ export function useMicStream({ wsRef, frameMs = 20 }: UseMicStreamOptions) {
           for (let i = 0; i < chunk.length; i++) s += chunk[i] * chunk[i];
           const rms = Math.sqrt(s / chunk.length);
           setTxLevel(rms);
-          const pcm = floatToPCM16(chunk);
+          const pcm = codec === "mulaw" ? floatToMulaw(chunk) : floatToPCM16(chunk);
           const currentWs = wsRef?.current;
           if (currentWs && currentWs.readyState === WebSocket.OPEN) {
             currentWs.send(pcm);
@@ -159,7 +179,7 @@ export function useMicStream({ wsRef, frameMs = 20 }: UseMicStreamOptions) {
       setError(e?.message || "Failed to start mic stream");
       await stop();
     }
-  }, [active, wsRef, frameMs]);
+  }, [active, wsRef, frameMs, codec]);
 
   const stop = useCallback(async () => {
     try {
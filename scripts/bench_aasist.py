@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for AASIST checkpoints per backend and thread count.
+
+Loads each model through the same `AASISTScorer` the server uses (backend
+inferred from the extension: .onnx -> onnx, otherwise torchscript) and, for
+every thread count x batch size, reports per-window latency percentiles and
+windows/s throughput over random 64600-sample windows.
+
+Usage examples:
+  # Float vs int8 TorchScript vs ONNX, 1/2/4 threads, single windows and batches of 8
+  python scripts/bench_aasist.py backend/models/aasist_scripted.pt backend/models/aasist_scripted_int8.pt \
+      backend/models/aasist_scripted.onnx --threads 1,2,4 --batch 1,8 --out aasist_bench.json
+
+Thread counts are applied per run in a fresh worker process, since torch's
+intra-op thread pool is process-wide.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from pipeline.antispoof import AASISTScorer  # noqa: E402
+
+
+def backend_for(path: str) -> str:
+    return "onnx" if path.endswith(".onnx") else "torchscript"
+
+
+def run_one(path: str, threads: int, batch: int, iters: int, warmup: int, target_samples: int) -> dict:
+    scorer = AASISTScorer(
+        checkpoint_path=str(Path(path).resolve()),
+        device="cpu",
+        target_samples=target_samples,
+        backend=backend_for(path),
+        threads=threads,
+    )
+    result = {"model": path, "backend": scorer.backend, "threads": threads, "batch": batch}
+    if not scorer.available:
+        result["error"] = "model unavailable (missing file or runtime)"
+        return result
+    rng = np.random.default_rng(0)
+    x = (0.1 * rng.standard_normal((batch, target_samples))).astype(np.float32)
+    for _ in range(warmup):
+        scorer.forward(x)
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        scorer.forward(x)
+        times.append(time.perf_counter() - t0)
+    per_window_ms = np.asarray(times) * 1000.0 / batch
+    result.update(
+        {
+            "load_s": scorer.load_seconds,
+            "window_ms_p50": float(np.percentile(per_window_ms, 50)),
+            "window_ms_p95": float(np.percentile(per_window_ms, 95)),
+            "windows_per_s": float(batch * iters / sum(times)),
+        }
+    )
+    return result
+
+
+def _worker(conn, *args) -> None:
+    try:
+        conn.send(run_one(*args))
+    except Exception as e:
+        conn.send({"model": args[0], "threads": args[1], "batch": args[2], "error": repr(e)})
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("models", nargs="+", help="TorchScript (.pt) and/or ONNX (.onnx) AASIST checkpoints")
+    parser.add_argument("--threads", type=str, default="1,2,4", help="Comma-separated intra-op thread counts")
+    parser.add_argument("--batch", type=str, default="1,8", help="Comma-separated batch sizes")
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--target-samples", type=int, default=64600)
+    parser.add_argument("--out", type=str, default="", help="Write machine-readable JSON results here")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for path in args.models:
+        for threads in [int(t) for t in args.threads.split(",") if t]:
+            for batch in [int(b) for b in args.batch.split(",") if b]:
+                parent, child = ctx.Pipe(duplex=False)
+                proc = ctx.Process(
+                    target=_worker, args=(child, path, threads, batch, args.iters, args.warmup, args.target_samples)
+                )
+                proc.start()
+                res = parent.recv()
+                proc.join()
+                print(json.dumps(res), flush=True)
+                results.append(res)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark voice-watchlist build time, query latency and recall.
+
+Generates synthetic clustered speaker embeddings (unit-norm centres plus
+per-row noise, so near neighbours exist as they do for real ECAPA vectors),
+builds a watchlist per size x storage dtype x IVF setting in a scratch
+directory, and times single-embedding `search` calls the way a session
+does. Queries are noisy copies of random rows; recall@1 is measured
+against an exact float32 scan of the same rows.
+
+Usage examples:
+  # Sizes that fit a laptop; float32 and int8, exact scan vs IVF probing 8 of 1024 lists
+  python scripts/bench_watchlist.py --sizes 10000,100000 --ivf 0,1024 --nprobe 8
+  # Full sweep (1M x 192 float32 is ~770 MB on disk)
+  python scripts/bench_watchlist.py --sizes 10000,100000,1000000 --ivf 0,1024 --out watchlist_bench.json
+
+An IVF cluster count larger than a tenth of the size is scaled down to
+size // 10 (at least 16 lists).
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from pipeline.watchlist import VoiceWatchlist, build_watchlist  # noqa: E402
+
+
+def synthetic(n: int, dim: int, speakers: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((speakers, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    out = np.empty((n, dim), dtype=np.float32)
+    step = 65536
+    for a in range(0, n, step):
+        b = min(n, a + step)
+        who = rng.integers(0, speakers, size=b - a)
+        out[a:b] = centres[who] + noise * rng.standard_normal((b - a, dim)).astype(np.float32) / np.sqrt(dim)
+    return out
+
+
+def run_one(
+    base: np.ndarray, queries: np.ndarray, truth: np.ndarray, dtype: str, ivf: int, nprobe: int, k: int, root: Path
+) -> dict:
+    path = root / f"wl_{base.shape[0]}_{dtype}_{ivf}"
+    t0 = time.perf_counter()
+    build_watchlist(path, base, dtype=dtype, ivf_clusters=ivf, progress=lambda msg: None)
+    build_s = time.perf_counter() - t0
+    wl = VoiceWatchlist(path)
+    wl.search(queries[0], k, nprobe)  # warm the page cache and code paths
+    times, hits = [], 0
+    for q, want in zip(queries, truth):
+        t0 = time.perf_counter()
+        found = wl.search(q, k, nprobe)
+        times.append(time.perf_counter() - t0)
+        hits += bool(found) and wl.metadata(found[0].index).get("id") == str(want)
+    ms = np.asarray(times) * 1000.0
+    result = {
+        "size": int(base.shape[0]),
+        "dtype": dtype,
+        "ivf_clusters": wl.ivf_clusters,
+        "nprobe": nprobe if wl.ivf_clusters else 0,
+        "build_s": build_s,
+        "disk_mb": sum(f.stat().st_size for f in path.iterdir()) / 1e6,
+        "query_ms_p50": float(np.percentile(ms, 50)),
+        "query_ms_p95": float(np.percentile(ms, 95)),
+        "recall_at_1": hits / len(queries),
+    }
+    shutil.rmtree(path, ignore_errors=True)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=str, default="10000,100000", help="Comma-separated watchlist sizes")
+    parser.add_argument("--dim", type=int, default=192)
+    parser.add_argument("--dtypes", type=str, default="float32,int8")
+    parser.add_argument("--ivf", type=str, default="0,1024", help="Comma-separated IVF list counts (0 = exact scan)")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.5, help="Query noise relative to the row it was drawn from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", type=str, default="", help="Scratch directory (default: a temp dir)")
+    parser.add_argument("--out", type=str, default="", help="Write machine-readable JSON results here")
+    args = parser.parse_args()
+
+    root = Path(args.dir or tempfile.mkdtemp(prefix="wl_bench_"))
+    root.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(args.seed + 1)
+    results = []
+    try:
+        for n in [int(s) for s in args.sizes.split(",") if s]:
+            base = synthetic(n, args.dim, speakers=max(16, n // 50), noise=0.8, seed=args.seed)
+            picks = rng.choice(n, size=min(args.queries, n), replace=False)
+            queries = base[picks] + args.noise * rng.standard_normal((picks.size, args.dim)).astype(
+                np.float32
+            ) / np.sqrt(args.dim)
+            # Exact float32 nearest neighbour per query is the recall reference
+            qn = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+            best_s = np.full(picks.size, -np.inf, dtype=np.float32)
+            truth = np.zeros(picks.size, dtype=np.int64)
+            for a in range(0, n, 65536):
+                block = base[a : a + 65536]
+                s = (block / np.linalg.norm(block, axis=1, keepdims=True)) @ qn.T
+                j = np.argmax(s, axis=0)
+                better = s[j, np.arange(picks.size)] > best_s
+                best_s[better] = s[j, np.arange(picks.size)][better]
+                truth[better] = a + j[better]
+            for dtype in [d for d in args.dtypes.split(",") if d]:
+                for ivf in [int(c) for c in args.ivf.split(",") if c]:
+                    clusters = min(ivf, max(16, n // 10)) if ivf else 0
+                    res = run_one(base, queries, truth, dtype, clusters, args.nprobe, args.k, root)
+                    print(json.dumps(res), flush=True)
+                    results.append(res)
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
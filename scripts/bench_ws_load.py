@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the /ws/audio endpoint.
+
+Replays recorded calls (16 kHz mono PCM16 WAV or raw .pcm files) or synthesized
+speech-like audio as real-time-paced 20 ms PCM16 frames into N concurrent
+WebSocket sessions, and reports per level:
+  - server tick latency percentiles (`tick_ms` in each update) and update lateness
+    (beyond the tick interval the server reports, which stretches under load)
+  - frames dropped (never counted by the server by the end of the session),
+    frames backlogged (sent but not yet counted) and sender lag
+  - server CPU seconds and RSS, total and per session (when the server is spawned)
+  - downstream bytes per session-second (compare --proto 1 vs 2, --enc json vs msgpack)
+and the largest session count whose p95 tick latency stays within the SLO.
+
+Usage examples:
+  # Spawn a local server with stub models and ramp 1 -> 32 sessions
+  python scripts/bench_ws_load.py --spawn --stub --levels 1,4,8,16,32 --duration 20 --out bench.json
+
+  # Against an already running server, replaying fixtures
+  python scripts/bench_ws_load.py --url ws://127.0.0.1:8000/ws/audio --audio fixtures/ --levels 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import wave
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from utils.audio_codec import mulaw_encode  # noqa: E402
+
+SR = 16000
+FRAME = 320  # 20 ms default; --frame-ms overrides
+
+
+def load_pcm(path: Path) -> np.ndarray:
+    if path.suffix.lower() == ".wav":
+        with wave.open(str(path), "rb") as wf:
+            if wf.getframerate() != SR or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16 kHz mono PCM16")
+            return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    return np.fromfile(str(path), dtype="<i2")
+
+
+def synth_call(seconds: float, seed: int) -> np.ndarray:
+    """Speech-like audio: noise bursts with a syllable-rate envelope, separated by pauses."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SR)
+    t = np.arange(n) / SR
+    env = np.clip(np.sin(2 * np.pi * 4.0 * t + rng.uniform(0, 6)), 0, None)
+    # ~40% silence in 1-3 s talk spurts
+    talk = np.zeros(n, dtype=bool)
+    pos = 0
+    while pos < n:
+        dur = int(rng.uniform(1.0, 3.0) * SR)
+        talk[pos : pos + dur] = True
+        pos += dur + int(rng.uniform(0.3, 1.5) * SR)
+    voice = rng.standard_normal(n) * env * 0.15 * talk + rng.standard_normal(n) * 0.002
+    return (np.clip(voice, -1, 1) * 32767).astype(np.int16)
+
+
+def pick_audio(sources: list[np.ndarray], i: int, seconds: float) -> np.ndarray:
+    if sources:
+        pcm = sources[i % len(sources)]
+        reps = int(np.ceil(seconds * SR / max(1, pcm.shape[0])))
+        return np.tile(pcm, reps)[: int(seconds * SR)]
+    return synth_call(seconds, seed=i)
+
+
+class ProcSampler:
+    """CPU time and RSS of the server process from /proc (Linux)."""
+
+    def __init__(self, pid: Optional[int]) -> None:
+        self.pid = pid
+
+    def sample(self) -> Optional[dict]:
+        if self.pid is None:
+            return None
+        try:
+            stat = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            cpu = (int(stat[11]) + int(stat[12])) / ticks
+            rss_kb = 0
+            for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+            return {"cpu_s": cpu, "rss_mb": rss_kb / 1024.0}
+        except Exception:
+            return None
+
+
+def decode(raw) -> dict:
+    if isinstance(raw, bytes):
+        import msgpack  # only needed for --enc msgpack
+
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
+
+async def admitted(ws) -> None:
+    """Wait out admission control: skip `queued` notices until the session id arrives."""
+    while True:
+        msg = decode(await ws.recv())
+        if "session_id" in msg:
+            return
+        if "error" in msg:
+            raise RuntimeError(f"session rejected: {msg['error']}")
+
+
+async def run_session(url: str, pcm: np.ndarray, stats: dict, frame: int = FRAME, codec: str = "pcm16") -> None:
+    wire = mulaw_encode(pcm.astype(np.float32) / 32768.0) if codec == "mulaw" else pcm
+    async with websockets.connect(url, max_size=None) as ws:
+        await admitted(ws)
+        sent = 0
+        frames_received = 0  # v2 only sends it when it changed
+        done = asyncio.Event()
+
+        async def receiver() -> None:
+            nonlocal frames_received
+            last_update = None
+            interval = 0.5  # likewise tick_interval_s; the scheduler stretches it under load
+            try:
+                while True:
+                    raw = await ws.recv()
+                    stats["rx_bytes"] += len(raw)
+                    msg = decode(raw)
+                    frames_received = int(msg.get("frames_received", frames_received))
+                    if "tick_ms" in msg:
+                        now = time.perf_counter()
+                        stats["tick_ms"].append(float(msg["tick_ms"]))
+                        if last_update is not None:
+                            stats["lateness_ms"].append(max(0.0, (now - last_update - interval) * 1000.0))
+                        interval = float(msg.get("tick_interval_s", interval))
+                        last_update = now
+                        stats["backlog_frames"].append(max(0, sent - frames_received))
+            except Exception:
+                done.set()
+
+        rx = asyncio.create_task(receiver())
+        t0 = time.perf_counter()
+        for k in range(0, pcm.shape[0] - frame + 1, frame):
+            # Real-time pacing: frame k is due at t0 + k / SR
+            lag = time.perf_counter() - (t0 + k / SR)
+            if lag < 0:
+                await asyncio.sleep(-lag)
+            else:
+                stats["sender_lag_ms"].append(lag * 1000.0)
+            await ws.send(wire[k : k + frame].tobytes())
+            stats["tx_bytes"] += frame * wire.itemsize
+            sent += 1
+        stats["frames_sent"] += sent
+        await asyncio.sleep(1.0)  # let the last ticks arrive
+        rx.cancel()
+        stats["frames_dropped"] += max(0, sent - frames_received)
+
+
+def pct(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+async def run_level(
+    url: str,
+    n: int,
+    duration: float,
+    sources: list[np.ndarray],
+    sampler: ProcSampler,
+    frame: int = FRAME,
+    codec: str = "pcm16",
+) -> dict:
+    stats = {
+        "tick_ms": [],
+        "lateness_ms": [],
+        "backlog_frames": [],
+        "sender_lag_ms": [],
+        "frames_sent": 0,
+        "frames_dropped": 0,
+        "rx_bytes": 0,
+        "tx_bytes": 0,
+    }
+    before = sampler.sample()
+    t0 = time.perf_counter()
+    results = await asyncio.gather(
+        *[run_session(url, pick_audio(sources, i, duration), stats, frame, codec) for i in range(n)],
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - t0
+    after = sampler.sample()
+    errors = [repr(r) for r in results if isinstance(r, Exception)]
+    out = {
+        "sessions": n,
+        "duration_s": duration,
+        "errors": errors[:5],
+        "failed_sessions": len(errors),
+        "updates": len(stats["tick_ms"]),
+        "tick_ms_p50": pct(stats["tick_ms"], 50),
+        "tick_ms_p95": pct(stats["tick_ms"], 95),
+        "tick_ms_p99": pct(stats["tick_ms"], 99),
+        "lateness_ms_p95": pct(stats["lateness_ms"], 95),
+        "backlog_frames_p95": pct(stats["backlog_frames"], 95),
+        "backlog_frames_max": float(max(stats["backlog_frames"], default=0)),
+        "sender_lag_ms_p95": pct(stats["sender_lag_ms"], 95),
+        "frames_sent": stats["frames_sent"],
+        "frames_dropped": stats["frames_dropped"],
+        "tx_bytes_per_session_s": stats["tx_bytes"] / max(1e-9, n * duration),
+        "rx_bytes_per_session_s": stats["rx_bytes"] / max(1e-9, n * duration),
+    }
+    if before and after:
+        cpu = after["cpu_s"] - before["cpu_s"]
+        out.update(
+            {
+                "server_cpu_pct": 100.0 * cpu / wall,
+                "server_cpu_pct_per_session": 100.0 * cpu / wall / n,
+                "server_rss_mb": after["rss_mb"],
+                "server_rss_mb_per_session": (after["rss_mb"] - before["rss_mb"]) / n,
+            }
+        )
+    return out
+
+
+def spawn_server(port: int, stub: bool) -> subprocess.Popen:
+    backend = Path(__file__).resolve().parents[1] / "backend"
+    env = dict(os.environ)
+    if stub:
+        env["MODEL_BACKEND"] = "stub"
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=str(backend),
+        env=env,
+    )
+    return proc
+
+
+def ready_url(ws_url: str) -> str:
+    """`GET /ready` on the same host as the WebSocket endpoint."""
+    parts = urllib.parse.urlsplit(ws_url)
+    scheme = "https" if parts.scheme == "wss" else "http"
+    return urllib.parse.urlunsplit((scheme, parts.netloc, "/ready", "", ""))
+
+
+def probe_ready(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=5.0) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False  # not listening yet, or 503 while models load
+
+
+async def wait_ready(ws_url: str, timeout: float = 120.0) -> None:
+    """Poll `/ready` until every model has loaded (the socket accepts earlier, and a probe
+    session would take an admission slot)."""
+    url = ready_url(ws_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if await asyncio.to_thread(probe_ready, url):
+            return
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"server at {url} was not ready within {timeout:.0f}s")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    sources: list[np.ndarray] = []
+    for spec in args.audio or []:
+        p = Path(spec)
+        files = sorted(p.glob("*.wav")) + sorted(p.glob("*.pcm")) if p.is_dir() else [p]
+        sources.extend(load_pcm(f) for f in files)
+
+    proc = None
+    url = args.url
+    if args.spawn:
+        proc = spawn_server(args.port, args.stub)
+        url = f"ws://127.0.0.1:{args.port}/ws/audio"
+    url += ("&" if "?" in url else "?") + f"proto={args.proto}&enc={args.enc}&audio={args.audio_codec}"
+    try:
+        await wait_ready(url)
+        sampler = ProcSampler(proc.pid if proc else args.server_pid)
+        levels = [int(x) for x in args.levels.split(",") if x.strip()]
+        report = {"url": url, "slo_p95_ms": args.slo_p95_ms, "stub": bool(args.stub), "levels": []}
+        max_ok = 0
+        for n in levels:
+            frame = max(1, int(SR * args.frame_ms / 1000))
+            res = await run_level(url, n, args.duration, sources, sampler, frame, args.audio_codec)
+            res["slo_ok"] = res["failed_sessions"] == 0 and res["tick_ms_p95"] <= args.slo_p95_ms
+            report["levels"].append(res)
+            print(json.dumps(res))
+            if not res["slo_ok"]:
+                break
+            max_ok = n
+        report["max_sessions_within_slo"] = max_ok
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2))
+        print(json.dumps({"max_sessions_within_slo": max_ok}))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", type=str, default="ws://127.0.0.1:8000/ws/audio")
+    parser.add_argument("--spawn", action="store_true", help="Start a local uvicorn server for the run")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn")
+    parser.add_argument(
+        "--stub", action="store_true", help="With --spawn: use stub model backends (MODEL_BACKEND=stub)"
+    )
+    parser.add_argument("--server-pid", type=int, default=None, help="PID to sample CPU/RSS when not spawning")
+    parser.add_argument("--audio", action="append", help="WAV/PCM file or directory (repeatable); default: synthesized")
+    parser.add_argument("--proto", type=int, default=1, help="WebSocket protocol version (2 = delta updates)")
+    parser.add_argument(
+        "--enc", choices=["json", "msgpack"], default="json", help="Update encoding (msgpack needs proto 2)"
+    )
+    parser.add_argument("--frame-ms", type=float, default=20.0, help="Uplink frame size (the browser client uses 100)")
+    parser.add_argument("--audio-codec", choices=["pcm16", "mulaw"], default="pcm16", help="Uplink sample encoding")
+    parser.add_argument("--levels", type=str, default="1,2,4,8,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of audio per session")
+    parser.add_argument("--slo-p95-ms", type=float, default=250.0, help="p95 tick latency SLO")
+    parser.add_argument("--out", type=str, default="", help="Write machine-readable JSON results here")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,19 @@
 # scripts/export_aasist_torchscript.py
-import sys, json, argparse
+#
+# Exports AASIST to float32 TorchScript and optionally to:
+#   --int8        dynamically int8-quantized TorchScript (<out>_int8.pt; nn.Linear layers)
+#   --onnx        ONNX with a dynamic batch axis (<out>.onnx; run with AASIST_BACKEND=onnx)
+#   --onnx-int8   dynamically int8-quantized ONNX (<out>_int8.onnx; needs onnxruntime)
+# Every variant is compared with the float model on --check-samples random windows
+# (plus windows cut from --check-audio WAVs): max/mean absolute difference of the
+# spoof probability and decision agreement at 0.5. Exits 1 if any variant exceeds
+# --tolerance. Benchmark the outputs with scripts/bench_aasist.py.
+import argparse
+import json
+import sys
+import wave
 from pathlib import Path
+import numpy as np
 import torch
 
 parser = argparse.ArgumentParser()
@@ -9,6 +22,13 @@ parser.add_argument("--ckpt", type=str, default="")
 parser.add_argument("--config-py", type=str, default="", help="Path to AASIST config .py exposing d_args/model_config (optional if using .conf)")
 parser.add_argument("--config-json", type=str, default="", help="Path to AASIST JSON .conf (contains model_config)")
 parser.add_argument("--out", type=str, default=str(Path(__file__).resolve().parents[1] / "backend" / "models" / "aasist_scripted.pt"))
+parser.add_argument("--int8", action="store_true", help="Also export dynamically int8-quantized TorchScript")
+parser.add_argument("--onnx", action="store_true", help="Also export ONNX")
+parser.add_argument("--onnx-int8", action="store_true", help="Also export dynamically int8-quantized ONNX (implies --onnx)")
+parser.add_argument("--opset", type=int, default=17)
+parser.add_argument("--check-samples", type=int, default=8, help="Random windows for the accuracy check")
+parser.add_argument("--check-audio", type=str, default="", help="WAV file or directory (16 kHz mono PCM16) for the accuracy check")
+parser.add_argument("--tolerance", type=float, default=0.05, help="Max allowed |p_variant - p_float|")
 args = parser.parse_args()
 
 # Paths
@@ -129,4 +149,98 @@ except Exception:
     pass
 
 scripted.save(str(OUT))
-print(json.dumps({"ok": True, "saved_to": str(OUT), "ckpt": str(CKPT)}))
\ No newline at end of file
+outputs = {"torchscript": OUT}
+
+# --- Optional int8 TorchScript (dynamic quantization: weights int8, activations quantized per call) ---
+if args.int8:
+    qmodel = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    try:
+        q_scripted = torch.jit.script(qmodel)
+    except Exception:
+        q_scripted = torch.jit.trace(qmodel, example, strict=False)
+    q_out = OUT.with_name(OUT.stem + "_int8.pt")
+    q_scripted.save(str(q_out))
+    outputs["torchscript_int8"] = q_out
+
+# --- Optional ONNX (float, and int8 via onnxruntime's dynamic quantizer) ---
+if args.onnx or args.onnx_int8:
+    onnx_out = OUT.with_suffix(".onnx")
+    export_kwargs = dict(
+        input_names=["waveform"],
+        dynamic_axes={"waveform": {0: "batch"}},
+        opset_version=args.opset,
+    )
+    try:
+        torch.onnx.export(model, example, str(onnx_out), dynamo=False, **export_kwargs)
+    except TypeError:  # older torch without the dynamo switch
+        torch.onnx.export(model, example, str(onnx_out), **export_kwargs)
+    outputs["onnx"] = onnx_out
+    if args.onnx_int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        onnx_q_out = OUT.with_name(OUT.stem + "_int8.onnx")
+        quantize_dynamic(str(onnx_out), str(onnx_q_out), weight_type=QuantType.QInt8)
+        outputs["onnx_int8"] = onnx_q_out
+
+
+# --- Accuracy check against the float eager model ---
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+from pipeline.antispoof import logits_to_probs  # noqa: E402
+
+
+def check_windows() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    windows = [0.1 * rng.standard_normal(nb_samp).astype(np.float32) for _ in range(max(0, args.check_samples))]
+    if args.check_audio:
+        src = Path(args.check_audio)
+        for path in sorted(src.glob("*.wav")) if src.is_dir() else [src]:
+            with wave.open(str(path), "rb") as w:
+                x = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float32) / 32768.0
+            for start in range(0, max(1, x.shape[0] - nb_samp + 1), nb_samp):
+                win = x[start : start + nb_samp]
+                windows.append(np.pad(win, (0, nb_samp - win.shape[0])))
+    return np.stack(windows, axis=0) if windows else np.zeros((0, nb_samp), dtype=np.float32)
+
+
+def variant_probs(name: str, path: Path, x: np.ndarray):
+    if name.startswith("onnx"):
+        try:
+            import onnxruntime as ort
+        except Exception:
+            return None
+        sess = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        return logits_to_probs(sess.run(None, {sess.get_inputs()[0].name: x}))
+    m = torch.jit.load(str(path), map_location="cpu")
+    m.eval()
+    with torch.no_grad():
+        return logits_to_probs(m(torch.from_numpy(x)))
+
+
+X = check_windows()
+checks = {}
+if X.shape[0]:
+    with torch.no_grad():
+        ref = logits_to_probs(model(torch.from_numpy(X)))
+    for name, path in outputs.items():
+        probs = variant_probs(name, path, X)
+        if probs is None:
+            checks[name] = {"skipped": "onnxruntime not installed"}
+            continue
+        diff = np.abs(probs - ref)
+        checks[name] = {
+            "max_abs_diff": float(diff.max()),
+            "mean_abs_diff": float(diff.mean()),
+            "decision_agreement": float(np.mean((probs >= 0.5) == (ref >= 0.5))),
+            "size_bytes": path.stat().st_size,
+            "ok": bool(diff.max() <= args.tolerance),
+        }
+
+ok = all(c.get("ok", True) for c in checks.values())
+print(json.dumps({
+    "ok": ok,
+    "saved_to": {name: str(path) for name, path in outputs.items()},
+    "ckpt": str(CKPT),
+    "check_windows": int(X.shape[0]),
+    "checks": checks,
+}))
+sys.exit(0 if ok else 1)
\ No newline at end of file
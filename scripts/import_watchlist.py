@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Build or extend the voice watchlist searched by `/ws/audio` and batch scoring.
+
+Embeddings come either from a precomputed [n, dim] .npy file (memory-mapped,
+so imports of millions of rows run in bounded memory) with an optional JSONL
+file of per-row metadata, or from a directory of recordings (16 kHz mono
+PCM16 WAV or raw s16le, one known speaker per file) embedded with the same
+pyannote embedder the diarizer uses (needs PYANNOTE_TOKEN). Without a
+metadata file every row gets {"source": <file>, "row": <row in file>}.
+
+Usage examples (from the repo root):
+  # 1M precomputed ECAPA embeddings, int8 with a 1024-list IVF index
+  python scripts/import_watchlist.py /data/watchlist --npy fraud_voices.npy --meta fraud_voices.jsonl \
+      --int8 --ivf 1024
+  # Add known callers from recordings to an existing watchlist
+  python scripts/import_watchlist.py /data/watchlist --wav-dir /data/known_callers --append
+
+Point WATCHLIST_PATH at the output directory and restart the server (or
+re-run batch scoring) to pick it up.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from batch_score import SR, iter_calls, open_pcm  # noqa: E402
+from config import settings  # noqa: E402
+from pipeline.watchlist import build_watchlist  # noqa: E402
+
+
+def load_meta(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def embed_recordings(wav_dir: str, max_seconds: float) -> tuple:
+    from pipeline.diarization import OnlineDiarizer
+
+    diarizer = OnlineDiarizer(hf_token=settings.pyannote_token)
+    if not diarizer.has_embedder:
+        raise SystemExit("speaker embedder unavailable (set PYANNOTE_TOKEN and install pyannote.audio)")
+    rows, meta = [], []
+    for path in iter_calls([wav_dir]):
+        try:
+            pcm = open_pcm(path)
+        except ValueError as e:
+            print(f"skip {e}", file=sys.stderr)
+            continue
+        audio = np.asarray(pcm[: int(max_seconds * SR)], dtype=np.float32) / 32768.0
+        if audio.size < SR:
+            print(f"skip {path}: shorter than 1 s", file=sys.stderr)
+            continue
+        rows.append(diarizer.embed(audio))
+        meta.append({"id": path.stem, "source": str(path)})
+        print(f"embedded {path}", flush=True)
+    if not rows:
+        raise SystemExit(f"no usable recordings under {wav_dir}")
+    return np.stack(rows).astype(np.float32), meta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out", help="Watchlist directory (created if missing)")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--npy", type=str, help="Precomputed [n, dim] float embeddings")
+    src.add_argument("--wav-dir", type=str, help="Directory of single-speaker recordings to embed")
+    parser.add_argument("--meta", type=str, default="", help="JSONL metadata, one object per --npy row")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Audio embedded per recording")
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Store int8 rows (4x smaller, slower brute-force scans); appends keep the existing type by default",
+    )
+    parser.add_argument("--ivf", type=int, default=0, help="Build an IVF index with this many lists (0 = exact scan)")
+    parser.add_argument("--append", action="store_true", help="Add rows to an existing watchlist")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.npy:
+        embeddings = np.load(args.npy, mmap_mode="r")
+        if embeddings.ndim != 2:
+            raise SystemExit(f"{args.npy}: expected a 2-D array, got shape {embeddings.shape}")
+        meta = (
+            load_meta(args.meta) if args.meta else [{"source": args.npy, "row": i} for i in range(embeddings.shape[0])]
+        )
+    else:
+        embeddings, meta = embed_recordings(args.wav_dir, args.max_seconds)
+
+    wl = build_watchlist(
+        args.out,
+        embeddings,
+        metadata=meta,
+        dtype="int8" if args.int8 else None,
+        ivf_clusters=args.ivf,
+        append=args.append,
+        seed=args.seed,
+        progress=lambda msg: print(msg, flush=True),
+    )
+    print(
+        json.dumps(
+            {"path": args.out, "count": wl.count, "dim": wl.dim, "dtype": wl.dtype, "ivf_clusters": wl.ivf_clusters}
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in for intent refinement.
+
+Serves `POST /v1/chat/completions` and answers with the JSON shape the backend
+expects (score, tags, rationale, summary), derived from simple keyword rules.
+Useful for tests, load benchmarks and offline deployments.
+
+Usage:
+  python scripts/llm_stub_server.py --port 8090 [--latency-ms 300]
+
+Then run the backend with:
+  LLM_BASE_URL=http://127.0.0.1:8090/v1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+import uvicorn
+
+RULES = {
+    "CREDENTIAL_REQUEST": ["password", "contraseña", "mot de passe", "login"],
+    "OTP_REQUEST": ["code", "código", "otp"],
+    "PAYMENT": ["gift card", "bitcoin", "transfer", "payment", "pago", "virement"],
+    "LINK": ["link", "enlace", "lien"],
+}
+WEIGHTS = {"CREDENTIAL_REQUEST": 0.5, "OTP_REQUEST": 0.5, "PAYMENT": 0.3, "LINK": 0.3}
+
+
+def classify(prompt: str) -> dict:
+    text = prompt.split("ranscript:", 1)[-1].lower()
+    tags = [tag for tag, keys in RULES.items() if any(k in text for k in keys)]
+    score = min(1.0, sum(WEIGHTS[t] for t in tags))
+    return {
+        "score": score,
+        "tags": tags,
+        "rationale": "stub: " + (", ".join(tags) if tags else "nothing suspicious"),
+        "summary": text.strip()[-200:],
+    }
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        prompt = str(messages[-1].get("content", "")) if messages else ""
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000.0)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(classify(prompt))},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": 40,
+                "total_tokens": len(prompt) // 4 + 40,
+            },
+        }
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial response delay")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())